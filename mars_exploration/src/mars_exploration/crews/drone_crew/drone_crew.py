@@ -1,19 +1,9 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from typing import List
-from pydantic import BaseModel, Field
-from mars_exploration.tools.drone_tools import DroneInfoTool, NodeDistanceTool
-
-# Para cada dron necesito ID, Objetivo, Ruta, Distancia, Notas
-class DroneAssignment(BaseModel):
-    drone_id: str = Field(..., description="ID of the drone assigned")
-    target_id: str = Field(..., description="ID or name of the target objective")
-    path_nodes: List[str] = Field(..., description="List of node IDs representing the flight path")
-    total_distance: float = Field(..., description="Total distance of the calculated path")
-    notes: str = Field(..., description="Reason for assignment (e.g., 'Has 20MP camera for high-res requirement')")
-
-class DroneFleetPlan(BaseModel):
-    assignments: List[DroneAssignment] = Field(..., description="List of all drone assignments and paths")
+from mars_exploration.models.drone_models import DroneFleetPlan
+from mars_exploration.tools.drone_tools import DroneAssignmentTool, DroneInfoTool, DroneReachabilityTool, NodeDistanceTool
+from mars_exploration.utils.llm_cache import crew_llm
+from mars_exploration.utils.task_artifacts import IncrementalTask
 
 @CrewBase
 class DroneCrew():
@@ -23,11 +13,13 @@ class DroneCrew():
     tasks_config = 'config/drone_tasks.yaml'
 
     def __init__(self) -> None:
-        self.llm = 'ollama/qwen3:4b'
+        self.llm = crew_llm(crew='drone')
 
     # Tools
     drone_info_tool = DroneInfoTool()
     node_distance_tool = NodeDistanceTool()
+    drone_reachability_tool = DroneReachabilityTool()
+    drone_assignment_tool = DroneAssignmentTool()
 
     # Agentes
     @agent
@@ -43,7 +35,7 @@ class DroneCrew():
         return Agent(
             config=self.agents_config['drone_fleet_manager'],
             # Este necesita tools de distancias y drones
-            tools=[self.drone_info_tool, self.node_distance_tool],
+            tools=[self.drone_info_tool, self.drone_assignment_tool, self.drone_reachability_tool, self.node_distance_tool],
             verbose=True,
             llm=self.llm,
             allow_delegation=False
@@ -70,26 +62,26 @@ class DroneCrew():
     # Tasks
     @task
     def analyze_mission_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['analyze_mission_task'],
         )
 
     @task
     def plan_routes_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['plan_routes_task'],
             output_pydantic=DroneFleetPlan
         )
 
     @task
     def validate_safety_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['validate_safety_task'],
         )
 
     @task
     def generate_report_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['generate_report_task'],
             output_file='drone_mission_report.md'
         )
@@ -3,6 +3,9 @@ from crewai.project import CrewBase, agent, crew, task
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Literal
 
+from mars_exploration.utils.llm_cache import crew_llm
+from mars_exploration.utils.task_artifacts import IncrementalTask
+
 # --- SUB-MODELS FOR INDIVIDUAL STATES ---
 class RoverState(BaseModel):
     id: str = Field(description="Rover ID (e.g., RVR-01)")
@@ -76,7 +79,7 @@ class IntegrationCrew():
     # Asegúrate de que el modelo coincida con el que usáis (ej. gemini, gpt-4, etc.)
     def __init__(self) -> None:
         #self.llm = 'gemini/gemini-2.0-flash' 
-        self.llm = "ollama/qwen3:8b" # Asegúrate de que es el nombre correcto
+        self.llm = crew_llm(crew="integration") # modelo en CREW_MODELS (utils/llm_gateway.py)
         
     @agent
     def data_fusioner(self) -> Agent:
@@ -108,27 +111,27 @@ class IntegrationCrew():
     
     @task
     def fuse_data_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['fuse_data_task'],
             output_pydantic=UnifiedGlobalState
         )
     
     @task
     def detect_anomalies_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['detect_anomalies_task'],
             output_pydantic=DetailedAnomalyReport
         )
 
     @task
     def generate_plan_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['generate_plan_task']
         )
 
     @task
     def coordinate_mission_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['coordinate_mission_task'],
             #output_pydantic=MasterMissionPlan,
             output_file='outputs/final_mission.md'
@@ -141,5 +144,4 @@ class IntegrationCrew():
             tasks=self.tasks,
             process=Process.sequential,
             verbose=True,
-            max_rpm=3
         )
\ No newline at end of file
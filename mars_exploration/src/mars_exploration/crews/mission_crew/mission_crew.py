@@ -10,7 +10,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from mars_exploration.tools.markdown import MarkdownReaderTool
-from mars_exploration.tools.graphTool import GraphMLReaderTool
+from mars_exploration.tools.graphTool import GraphMLReaderTool, TerrainRegionTool
+from mars_exploration.utils.llm_cache import crew_llm
+from mars_exploration.utils.task_artifacts import IncrementalTask
 
 class MissionObjective(BaseModel):
     node_id: str
@@ -92,10 +94,11 @@ class MissionCrew():
     tasks_config = 'config/mission_tasks.yaml'
 
     def __init__(self) -> None:
-        self.llm = 'ollama/qwen3:4b'
+        self.llm = crew_llm(crew='mission')
         #self.llm = 'gemini/gemini-2.5-flash'
         self.markdown_tool = MarkdownReaderTool()
         self.graphml_tool = GraphMLReaderTool()
+        self.region_tool = TerrainRegionTool()
 
     @agent
     def mission_planner(self) -> Agent:
@@ -117,7 +120,7 @@ class MissionCrew():
         return Agent(
             config=self.agents_config['hazard_assessment'],
             llm=self.llm,
-            tools=[self.markdown_tool, self.graphml_tool],
+            tools=[self.markdown_tool, self.region_tool, self.graphml_tool],
             verbose=False,
             allow_delegation=False
         )
@@ -130,7 +133,7 @@ class MissionCrew():
         return Agent(
             config=self.agents_config['resource_optimization'],
             llm=self.llm,
-            tools=[self.markdown_tool, self.graphml_tool],
+            tools=[self.markdown_tool, self.region_tool, self.graphml_tool],
             verbose=False,
             allow_delegation=False
         )
@@ -143,7 +146,7 @@ class MissionCrew():
         return Agent(
             config=self.agents_config['scientific_target_evaluator'],
             llm=self.llm,
-            tools=[self.markdown_tool, self.graphml_tool],
+            tools=[self.markdown_tool, self.region_tool, self.graphml_tool],
             verbose=False,
             allow_delegation=False
         )
@@ -163,7 +166,7 @@ class MissionCrew():
 
     @task
     def analyze_mission_report_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['analyze_mission_report_task'],
             output_pydantic=MissionReportSummary
             )
@@ -171,14 +174,14 @@ class MissionCrew():
     
     @task
     def assess_hazard_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['assess_hazards_task'],
             output_pydantic=HazardAssessmentOutput,
         )
     
     @task
     def optimize_resources_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['optimize_resources_task'],
             context=[self.analyze_mission_report_task()],
             output_pydantic=ResourceOptimizationOutput
@@ -186,7 +189,7 @@ class MissionCrew():
     
     @task
     def prioritize_science_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['prioritize_science_task'],
             context=[
                 self.analyze_mission_report_task(),
@@ -197,7 +200,7 @@ class MissionCrew():
     
     @task
     def synthesize_final_plan_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config['synthesize_final_plan_task'],
             context=[
                 self.prioritize_science_task(), 
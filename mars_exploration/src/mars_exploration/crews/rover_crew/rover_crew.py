@@ -3,6 +3,9 @@ from __future__ import annotations
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 
+from mars_exploration.utils.llm_cache import crew_llm
+from mars_exploration.utils.task_artifacts import IncrementalTask
+
 
 @CrewBase
 class RoverCrew:
@@ -12,9 +15,11 @@ class RoverCrew:
     tasks_config = "config/rover_tasks.yaml"
 
     def __init__(self) -> None:
-        self.llm = "ollama/qwen3:4b"
+        self.llm = crew_llm(crew="rover")
         self.node_distance_tool = None
         self.rover_info_tool = None
+        self.pareto_route_tool = None
+        self.tour_planner_tool = None
 
         # Tools are optional; the crew must still run even if tools are unavailable.
         try:
@@ -23,6 +28,18 @@ class RoverCrew:
         except Exception:
             self.node_distance_tool = None
 
+        try:
+            from mars_exploration.tools.rover_tools import ParetoRouteTool
+            self.pareto_route_tool = ParetoRouteTool()
+        except Exception:
+            self.pareto_route_tool = None
+
+        try:
+            from mars_exploration.tools.rover_tools import RoverTourTool
+            self.tour_planner_tool = RoverTourTool()
+        except Exception:
+            self.tour_planner_tool = None
+
     # ---------------- Agents ----------------
     @agent
     def rover_coordinator_agent(self) -> Agent:
@@ -45,7 +62,11 @@ class RoverCrew:
 
     @agent
     def pathfinding_agent(self) -> Agent:
-        tools = [t for t in [self.node_distance_tool, self.rover_info_tool] if t is not None]
+        tools = [
+            t
+            for t in [self.node_distance_tool, self.pareto_route_tool, self.tour_planner_tool, self.rover_info_tool]
+            if t is not None
+        ]
         return Agent(
             config=self.agents_config["pathfinding_agent"],
             llm=self.llm,
@@ -56,7 +77,7 @@ class RoverCrew:
 
     @agent
     def energy_management_agent(self) -> Agent:
-        tools = [t for t in [self.rover_info_tool] if t is not None]
+        tools = [t for t in [self.pareto_route_tool, self.rover_info_tool] if t is not None]
         return Agent(
             config=self.agents_config["energy_management_agent"],
             llm=self.llm,
@@ -76,25 +97,25 @@ class RoverCrew:
     # ---------------- Tasks ----------------
     @task
     def analyze_rover_objectives_task(self) -> Task:
-        return Task(config=self.tasks_config["analyze_rover_objectives_task"])
+        return IncrementalTask(config=self.tasks_config["analyze_rover_objectives_task"])
 
     @task
     def terrain_traversability_task(self) -> Task:
-        return Task(config=self.tasks_config["terrain_traversability_task"])
+        return IncrementalTask(config=self.tasks_config["terrain_traversability_task"])
 
     @task
     def plan_rover_routes_task(self) -> Task:
         # IMPORTANT: no output_pydantic (prevents LiteLLM/Ollama JSON conversion crash)
-        return Task(config=self.tasks_config["plan_rover_routes_task"])
+        return IncrementalTask(config=self.tasks_config["plan_rover_routes_task"])
 
     @task
     def estimate_energy_budget_task(self) -> Task:
         # IMPORTANT: no output_pydantic (prevents LiteLLM/Ollama JSON conversion crash)
-        return Task(config=self.tasks_config["estimate_energy_budget_task"])
+        return IncrementalTask(config=self.tasks_config["estimate_energy_budget_task"])
 
     @task
     def generate_rover_operation_plan_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config["generate_rover_operation_plan_task"],
             output_file="outputs/rover_operation_plan.md",
         )
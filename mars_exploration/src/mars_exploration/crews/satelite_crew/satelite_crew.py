@@ -7,7 +7,14 @@ from typing import Any, Dict, List
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 
-from mars_exploration.tools.satellite_tools import SatelliteInfoTool, SatelliteLinkTool
+from mars_exploration.tools.satellite_tools import (
+    CommunicationScheduleTool,
+    SatelliteCoverageTool,
+    SatelliteInfoTool,
+    SatelliteLinkTool,
+)
+from mars_exploration.utils.llm_cache import crew_llm
+from mars_exploration.utils.task_artifacts import IncrementalTask
 
 
 @CrewBase
@@ -18,11 +25,13 @@ class SatelliteCrew:
     tasks_config = "config/satelite_tasks.yaml"
 
     def __init__(self) -> None:
-        self.llm = "ollama/qwen3:4b"
+        self.llm = crew_llm(crew="satellite")
         self.mars_root = Path(__file__).resolve().parents[4]  # mars_exploration/
         
         self.info_tool = SatelliteInfoTool()
         self.graph_tool = SatelliteLinkTool()
+        self.comm_schedule_tool = CommunicationScheduleTool()
+        self.coverage_tool = SatelliteCoverageTool()
         # Optional tools could be added here (same pattern as RoverCrew)
 
     # ---------------- Agents ----------------
@@ -41,7 +50,7 @@ class SatelliteCrew:
             config=self.agents_config["orbital_imaging_agent"],
             llm=self.llm,
             verbose=True,
-            tools = [self.info_tool, self.graph_tool],
+            tools = [self.info_tool, self.graph_tool, self.coverage_tool],
             allow_delegation=False,
         )
 
@@ -51,7 +60,7 @@ class SatelliteCrew:
             config=self.agents_config["communication_relay_agent"],
             llm=self.llm,
             verbose=True,
-            tools = [self.info_tool, self.graph_tool],
+            tools = [self.info_tool, self.graph_tool, self.comm_schedule_tool],
             allow_delegation=False,
         )
 
@@ -61,6 +70,7 @@ class SatelliteCrew:
             config=self.agents_config["environment_monitoring_agent"],
             llm=self.llm,
             verbose=True,
+            tools = [self.coverage_tool],
             allow_delegation=False,
         )
 
@@ -76,42 +86,42 @@ class SatelliteCrew:
     # ---------------- Tasks ----------------
     @task
     def analyze_mission_plan_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config["analyze_mission_plan_task"],
             agent=self.satellite_coordination_agent(),
         )
 
     @task
     def orbit_planning_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config["orbit_planning_task"],
             agent=self.orbit_planning_agent(),
         )
 
     @task
     def orbital_imaging_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config["orbital_imaging_task"],
             agent=self.orbital_imaging_agent(),
         )
 
     @task
     def communication_relay_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config["communication_relay_task"],
             agent=self.communication_relay_agent(),
         )
 
     @task
     def environment_monitoring_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config["environment_monitoring_task"],
             agent=self.environment_monitoring_agent(),
         )
 
     @task
     def generate_satellite_plan_task(self) -> Task:
-        return Task(
+        return IncrementalTask(
             config=self.tasks_config["generate_satellite_plan_task"],
             agent=self.satellite_coordination_agent(),
             output_file="outputs/satelite_plan.md",
@@ -1,6 +1,9 @@
 #!/usr/bin/env python
+import asyncio
 import os
+import time
 from pathlib import Path
+from typing import Dict
 from pydantic import BaseModel
 from crewai.flow.flow import Flow, listen, start, router, and_
 
@@ -11,8 +14,15 @@ from mars_exploration.crews.integration_crew.integration_crew import Integration
 from mars_exploration.crews.satelite_crew.satelite_crew import SatelliteCrew
 
 # Utils
-from mars_exploration.tests.test_rover_crew import extract_rover_steps, build_routes_hint
+from mars_exploration.tests.test_rover_crew import extract_rover_steps, build_routes_hint, build_terrain_prompt
 from mars_exploration.utils.utils_markdown import mission_crew_markdown
+from mars_exploration.utils.llm_cache import cache_report
+from mars_exploration.utils.llm_cassette import cassette_report
+from mars_exploration.utils.llm_gateway import gateway_report, warm_crews
+from mars_exploration.utils.terrain_encoding import estimate_tokens
+from mars_exploration.utils.task_artifacts import artifacts_report
+from mars_exploration.utils.tool_cache import tool_cache_report
+from mars_exploration.utils.tracing import start_tracing
 
 
 class MarsExplorationState(BaseModel):
@@ -22,11 +32,44 @@ class MarsExplorationState(BaseModel):
     drone_report_path: str = "outputs/drone_report.md"
     satellite_report_path: str = "outputs/satelite_plan.md"
     final_report_path: str = "outputs/final_mission.md"
+    # Rover, drone and satellite crews running at the same time (1 = one after another)
+    max_concurrent_crews: int = 3
+    branch_wall_times: Dict[str, float] = {}
+    branches_wall_time: float = 0.0
 
 class MarsExplorationFlow(Flow[MarsExplorationState]):
 
+    _flow_started = None
+    _branch_slots = None
+    _branches_started = None
+
+    async def _run_branch(self, name: str, work):
+        """
+        Runs a blocking crew branch in a worker thread, at most
+        ``max_concurrent_crews`` at a time, and records its wall time.
+        """
+        if self._branch_slots is None:
+            self._branch_slots = asyncio.Semaphore(max(1, self.state.max_concurrent_crews))
+        if self._branches_started is None:
+            self._branches_started = time.perf_counter()
+
+        async with self._branch_slots:
+            began = time.perf_counter()
+            try:
+                return await asyncio.to_thread(work)
+            finally:
+                elapsed = time.perf_counter() - began
+                self.state.branch_wall_times[name] = elapsed
+                print(f"{name} branch finished in {elapsed:.1f}s")
+                # With one branch left, load the integration model while it finishes
+                if len(self.state.branch_wall_times) >= 2:
+                    warm_crews(["integration"])
+
     @start()
     def strategic_assessment(self):
+        self._flow_started = time.perf_counter()
+        # The mission crew and the three branches after it
+        warm_crews(["mission", "rover", "drone", "satellite"])
         Path("outputs").mkdir(exist_ok=True)
         
         plan_path = Path(self.state.mission_plan_path)
@@ -46,8 +89,18 @@ class MarsExplorationFlow(Flow[MarsExplorationState]):
         return result
 
     @listen("strategic_assessment")
-    def run_rover_mission(self, mission_output):
-        
+    async def run_rover_mission(self, mission_output):
+        return await self._run_branch("Rover", self._rover_mission)
+
+    @listen("strategic_assessment")
+    async def run_drone_mission(self, mission_output):
+        return await self._run_branch("Drone", self._drone_mission)
+
+    @listen("strategic_assessment")
+    async def run_satellite_mission(self, mission_output):
+        return await self._run_branch("Satellite", self._satellite_mission)
+
+    def _rover_mission(self):
         print("Rover Crew Running")
 
         terrain_path = Path("src/mars_exploration/inputs/mars_terrain.graphml")
@@ -57,10 +110,12 @@ class MarsExplorationFlow(Flow[MarsExplorationState]):
 
         rover_steps = extract_rover_steps(mission_plan_text)
         routes_hint = build_routes_hint(terrain_path, rovers_path, rover_steps)
+        terrain_prompt = build_terrain_prompt(terrain_path, routes_hint, rover_steps)
+        print(f"Terrain prompt: ~{estimate_tokens(terrain_prompt)} tokens")
         
         rover_inputs = {
             "mission_plan": mission_plan_text,
-            "terrain_graphml": terrain_path.read_text(encoding="utf-8"),
+            "terrain_graph": terrain_prompt,
             "rovers_json": rovers_path.read_text(encoding="utf-8"),
             "routes_hint": routes_hint
         }
@@ -69,8 +124,8 @@ class MarsExplorationFlow(Flow[MarsExplorationState]):
         
         Path(self.state.rover_report_path).write_text(result.raw, encoding="utf-8")
         return result
-    @listen("strategic_assessment")
-    def run_drone_mission(self, mission_output):
+
+    def _drone_mission(self):
         print("Drone Crew")
 
         drone_inputs = {
@@ -88,8 +143,7 @@ class MarsExplorationFlow(Flow[MarsExplorationState]):
         # Path(self.state.drone_report_path).write_text(result.raw, encoding="utf-8")
         return result
     
-    @listen("strategic_assessment")
-    def run_satellite_mission(self, mission_output):
+    def _satellite_mission(self):
         print("Satellite Crew Running")
 
         mission_plan_text = Path(self.state.mission_plan_path).read_text(encoding="utf-8")
@@ -109,6 +163,15 @@ class MarsExplorationFlow(Flow[MarsExplorationState]):
 
     @listen(and_(run_rover_mission, run_drone_mission, run_satellite_mission))
     def finalize_integration(self, results):
+        # The parallel stage lasts as long as its slowest crew, not the sum of all three
+        self.state.branches_wall_time = time.perf_counter() - self._branches_started
+        times = self.state.branch_wall_times
+        print(
+            "Crew wall times: "
+            + ", ".join(f"{name} {elapsed:.1f}s" for name, elapsed in times.items())
+            + f" | parallel stage {self.state.branches_wall_time:.1f}s (sequential would take {sum(times.values()):.1f}s)"
+        )
+
         print("Integration Crew")
 
         integration_inputs = {
@@ -125,14 +188,26 @@ class MarsExplorationFlow(Flow[MarsExplorationState]):
 
         report_path.write_text(output_content, encoding="utf-8")
 
+        if self._flow_started is not None:
+            print(f"Total flow wall time: {time.perf_counter() - self._flow_started:.1f}s")
         return final_result
     
 def run():
+    tracer = start_tracing()
     try:
         flow = MarsExplorationFlow()
         flow.kickoff()
     except Exception as e:
         print(f"❌ Error en el Flow: {e}")
+    finally:
+        print(cache_report())
+        print(cassette_report())
+        print(artifacts_report())
+        print(gateway_report())
+        print(tool_cache_report())
+        if tracer is not None:
+            tracer.close()
+            print(f"Trace written to {tracer.path} (trace_report {tracer.path})")
 
 if __name__ == "__main__":
     run()
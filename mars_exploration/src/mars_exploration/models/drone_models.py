@@ -0,0 +1,17 @@
+# src/mars_exploration/models/drone_models.py
+"""Output models of the drone crew, shared with ``utils/drone_assignment.py``."""
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+# Para cada dron necesito ID, Objetivo, Ruta, Distancia, Notas
+class DroneAssignment(BaseModel):
+    drone_id: str = Field(..., description="ID of the drone assigned")
+    target_id: str = Field(..., description="ID or name of the target objective")
+    path_nodes: List[str] = Field(..., description="List of node IDs representing the flight path")
+    total_distance: float = Field(..., description="Total distance of the calculated path")
+    notes: str = Field(..., description="Reason for assignment (e.g., 'Has 20MP camera for high-res requirement')")
+
+class DroneFleetPlan(BaseModel):
+    assignments: List[DroneAssignment] = Field(..., description="List of all drone assignments and paths")
@@ -4,7 +4,6 @@ import json
 from pathlib import Path
 from datetime import datetime
 
-import networkx as nx
 from crewai.flow.flow import Flow, listen, start
 
 # Resolve src directory: .../mars_exploration/src
@@ -13,6 +12,12 @@ if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
 
 from mars_exploration.crews.rover_crew.rover_crew import RoverCrew
+from mars_exploration.utils.hazards import get_hazard_registry
+from mars_exploration.utils.pareto_router import get_pareto_router
+from mars_exploration.utils.rover_profiles import rover_signatures
+from mars_exploration.utils.terrain_encoding import encode_terrain_region, estimate_tokens
+from mars_exploration.utils.terrain_graph import load_compact_terrain
+from mars_exploration.utils.tour_optimizer import optimize_tours
 
 
 def extract_rover_steps(mission_plan_text: str) -> list[dict]:
@@ -48,50 +53,99 @@ def extract_rover_steps(mission_plan_text: str) -> list[dict]:
 def build_routes_hint(graphml_path: Path, rovers_json_path: Path, rover_steps: list[dict]) -> str:
     """
     Deterministically compute shortest paths and distances.
+
+    Runs one single-source search per distinct rover start location and reads
+    every target's route, distance and energy sum from that search tree.
+    Routes avoid the known hazards of the mission report; rovers or targets
+    inside a hazard zone get no route. When a longer route uses less energy,
+    the least-energy one is attached as ``min_energy_alternative``.
+
+    Each rover only drives terrain in its ``terrain_compatibility`` list;
+    rovers with the same list share one masked view and its route cache.
+
+    ``tours`` holds the optimized multi-target plan: which rover visits which
+    targets, in what order, with ETA, energy and recharge stops per stop.
     """
-    g = nx.read_graphml(str(graphml_path))
+    g = load_compact_terrain(graphml_path)
+    hazards = get_hazard_registry(graphml_path)
     rovers = json.loads(rovers_json_path.read_text(encoding="utf-8"))
+    signatures = rover_signatures(rovers)
 
     targets = sorted({s["target"] for s in rover_steps if s["target"].startswith("N")})
-    routes = []
+    targets = [t for t in targets if t in g]
 
+    starts = {}
+    for rover in rovers:
+        if rover.get("id") and rover.get("location") in g:
+            starts.setdefault(signatures[rover["id"]], []).append(rover["location"])
+    trees = {
+        terrain: get_hazard_registry(graphml_path, terrain=terrain).many_to_many(locations, targets, accumulate=("energy",))
+        for terrain, locations in starts.items()
+    }
+    least_energy = {}
+
+    routes = []
     for rover in rovers:
         rover_id = rover.get("id")
         start = rover.get("location")
-        if not rover_id or not start or start not in g.nodes:
+        if not rover_id or not start or start not in g:
             continue
 
         for target in targets:
-            if target not in g.nodes:
+            terrain = signatures[rover_id]
+            found = trees[terrain][start].get(target)
+            if found is None:
                 continue
+            energy_cost = found.totals["energy"]
+            entry = {
+                "rover_id": rover_id,
+                "start": start,
+                "target": target,
+                "route": found.path,
+                "distance": float(found.distance),
+                "energy_cost": float(energy_cost) if energy_cost is not None else None,
+            }
+
+            key = (terrain, start, target)
+            if key not in least_energy:
+                least_energy[key] = get_pareto_router(graphml_path, terrain).front(start, target)[-1]
+            cheapest = least_energy[key]
+            if energy_cost is not None and cheapest.energy < energy_cost - 1e-9:
+                entry["min_energy_alternative"] = {
+                    "route": cheapest.path,
+                    "distance": float(cheapest.length),
+                    "energy_cost": float(cheapest.energy),
+                }
+            routes.append(entry)
+
+    plan = optimize_tours(targets, rovers, graphml_path).to_dict()
+    return json.dumps(
+        {
+            "routes": routes,
+            "tours": [t for t in plan["tours"] if len(t["stops"]) > 1],
+            "unassigned_targets": plan["unassigned"],
+            "hazards": hazards.hazards(),
+        },
+        ensure_ascii=False,
+    )
+
+
+def build_terrain_prompt(graphml_path: Path, routes_hint: str, rover_steps: list[dict], hops: int = 1) -> str:
+    """
+    Compact terrain encoding for the rover crew.
 
-            try:
-                path = nx.shortest_path(g, start, target, weight="length")
-                dist = nx.shortest_path_length(g, start, target, weight="length")
-
-                energy_cost = 0.0
-                has_energy = True
-                for a, b in zip(path, path[1:]):
-                    e = g.edges[a, b].get("energy")
-                    if e is None:
-                        has_energy = False
-                        break
-                    energy_cost += float(e)
-
-                routes.append(
-                    {
-                        "rover_id": rover_id,
-                        "start": start,
-                        "target": target,
-                        "route": path,
-                        "distance": float(dist),
-                        "energy_cost": float(energy_cost) if has_energy else None,
-                    }
-                )
-            except Exception:
-                continue
+    Restricted to ``hops`` around the rover targets and every node on the
+    hinted routes and tours; the whole map is encoded when there are no rover steps.
+    """
+    focus = {s["target"] for s in rover_steps}
+    hint = json.loads(routes_hint)
+    for route in hint.get("routes", []):
+        focus.update(route["route"])
+    for tour in hint.get("tours", []):
+        for stop in tour["stops"]:
+            focus.update(stop["path"])
 
-    return json.dumps({"routes": routes}, ensure_ascii=False)
+    return encode_terrain_region(graphml_path, focus, hops=hops)
 
 
 class RoverTestFlow(Flow):
@@ -138,9 +192,12 @@ class RoverTestFlow(Flow):
         rover_steps = extract_rover_steps(mission_plan_text)
         routes_hint = build_routes_hint(terrain_path, rovers_path, rover_steps)
 
+        terrain_prompt = build_terrain_prompt(terrain_path, routes_hint, rover_steps)
+        print(f"Terrain prompt: ~{estimate_tokens(terrain_prompt)} tokens")
+
         inputs = {
             "mission_plan": mission_plan_text,
-            "terrain_graphml": terrain_path.read_text(encoding="utf-8"),
+            "terrain_graph": terrain_prompt,
             "rovers_json": rovers_path.read_text(encoding="utf-8"),
             "routes_hint": routes_hint,
         }
@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+from mars_exploration.tools.drone_tools import NodeDistanceTool
+from mars_exploration.tools.satellite_tools import SatelliteLinkTool
+from mars_exploration.utils.hazards import get_hazard_registry
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+from mars_exploration.utils.tool_cache import tool_result_cache
+
+
+def test_hazard_added_after_cached_call_changes_tool_answer():
+    """A memoized route must not outlive a hazard added at runtime on it."""
+    tool = NodeDistanceTool(map_path=str(DEFAULT_TERRAIN_PATH))
+    before = tool._run(start_node="N43", end_node="N12")
+    assert "'N8'" in before
+
+    registry = get_hazard_registry(DEFAULT_TERRAIN_PATH)
+    registry.add("N8")
+    try:
+        detour = tool._run(start_node="N43", end_node="N12")
+        assert "'N8'" not in detour
+        assert detour.endswith(f"{registry.route('N43', 'N12')[0]:.2f}")
+    finally:
+        registry.remove("N8")
+
+    assert tool._run(start_node="N43", end_node="N12") == before
+
+
+def test_map_edit_invalidates_default_path_tool_outside_project_root():
+    """The default map path is hashed into the key whatever the working directory."""
+    def misses():
+        stats = tool_result_cache.stats().get("SatelliteLinkTool")
+        return stats.misses if stats else 0
+
+    original = DEFAULT_TERRAIN_PATH.read_bytes()
+    st = os.stat(DEFAULT_TERRAIN_PATH)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as elsewhere:
+        os.chdir(elsewhere)
+        try:
+            tool = SatelliteLinkTool()
+            before = tool._run(start_node="N43", end_node="N12")
+            assert before.startswith("SUCCESS")
+            count = misses()
+            assert tool._run(start_node="N43", end_node="N12") == before
+            assert misses() == count
+
+            # Same graph, different bytes: the cached link must not be reused
+            DEFAULT_TERRAIN_PATH.write_bytes(original + b"\n<!-- edited -->\n")
+            assert SatelliteLinkTool()._run(start_node="N43", end_node="N12") == before
+            assert misses() == count + 1
+        finally:
+            DEFAULT_TERRAIN_PATH.write_bytes(original)
+            os.utime(DEFAULT_TERRAIN_PATH, ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_hazard_added_after_cached_call_changes_tool_answer()
+    test_map_edit_invalidates_default_path_tool_outside_project_root()
+    print("OK")
@@ -5,7 +5,15 @@ from pydantic import Field
 import os
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-from typing import Type, Optional
+from typing import List, Type, Optional, Union
+
+from mars_exploration.utils.drone_assignment import plan_drone_assignments
+from mars_exploration.utils.drone_reachability import DEFAULT_DRONES_PATH, get_drone_reachability
+from mars_exploration.utils.hazards import DEFAULT_MISSION_REPORT_PATH, HazardBlockedError, get_hazard_registry, hazard_version
+from mars_exploration.utils.rover_profiles import DEFAULT_ROVERS_PATH, rover_signature
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+from mars_exploration.utils.terrain_graph import load_compact_terrain
+from mars_exploration.utils.tool_cache import memoize_tool
 
 class NodeDistanceSchema(BaseModel):
     """Input schema for NodeDistanceTool."""
@@ -13,7 +21,26 @@ class NodeDistanceSchema(BaseModel):
     end_node: str = Field(..., description="The ending node ID (e.g., 'N52').")
     # Al usar Optional y default=None no da error si no se envía
     max_range: Optional[float] = Field(None, description="The maximum range of the drone. If provided, checks if distance > range.")
+    rover_id: Optional[str] = Field(None, description="Rover ID (e.g., 'rover_1'). If provided, only terrain this rover can drive is used.")
+
+class DroneReachabilitySchema(BaseModel):
+    """Input schema for DroneReachabilityTool."""
+    target_nodes: Optional[Union[List[str], str]] = Field(
+        None,
+        description="Target node IDs to check, e.g. ['N12', 'N45'] or 'N12, N45'. Leave empty to list every reachable node.",
+    )
+
+class DroneAssignmentSchema(BaseModel):
+    """Input schema for DroneAssignmentTool."""
+    targets: Union[List[str], str] = Field(
+        ...,
+        description=(
+            "Target node IDs, optionally with the minimum camera resolution they need, "
+            "e.g. ['N5:15MP', 'N12'] or 'N5:15MP, N12'."
+        ),
+    )
 
+@memoize_tool(files=(DEFAULT_DRONES_PATH,))
 class DroneInfoTool(BaseTool):
     name: str = "Drone Info Reader"
     description: str = "Reads the technical specifications of the drone fleet. Returns a list of drones with their ranges and capabilities. No input required."
@@ -40,15 +67,20 @@ class DroneInfoTool(BaseTool):
         except Exception as e:
             return f"Error reading drone file: {str(e)}"
 
+@memoize_tool(
+    path_fields=("map_path",),
+    files=(DEFAULT_MISSION_REPORT_PATH, DEFAULT_ROVERS_PATH),
+    state=lambda tool: hazard_version(tool.map_path),
+)
 class NodeDistanceTool(BaseTool):
     name: str = "Node Distance Tool"
-    description: str = "Calculates shortest path between two nodes. Returns 'FAILURE' if distance > max_range. Inputs: start_node, end_node, max_range (optional)."
+    description: str = "Calculates shortest path between two nodes, avoiding the known hazard nodes of the mission report. Returns 'FAILURE' if distance > max_range or an endpoint is a hazard. Inputs: start_node, end_node, max_range (optional), rover_id (optional, rovers only)."
     
     args_schema: Type[BaseModel] = NodeDistanceSchema
 
-    map_path: str = Field(default='src/mars_exploration/inputs/mars_terrain.graphml', description="Path to GraphML")
+    map_path: str = Field(default=str(DEFAULT_TERRAIN_PATH), description="Path to GraphML")
 
-    def _run(self, start_node: str, end_node: str, max_range: float = None) -> str:
+    def _run(self, start_node: str, end_node: str, max_range: float = None, rover_id: str = None) -> str:
         try:
             if not os.path.exists(self.map_path):
                 base_path = os.path.dirname(os.path.abspath(__file__))
@@ -58,13 +90,22 @@ class NodeDistanceTool(BaseTool):
             if not os.path.exists(self.map_path):
                 return f"Error: Map file not found at {self.map_path}"
 
-            G = nx.read_graphml(self.map_path)
+            G = load_compact_terrain(self.map_path)
             
             if start_node not in G or end_node not in G:
                  return f"Error: Node {start_node} or {end_node} does not exist."
 
+            # Terreno que el rover puede recorrer (sin restricción para drones)
+            try:
+                terrain = rover_signature(rover_id) if rover_id else None
+            except KeyError:
+                return f"Error: Rover {rover_id} does not exist."
+
+            # Ruta más corta que evita los nodos peligrosos del informe de misión
             try:
-                distance = nx.shortest_path_length(G, source=start_node, target=end_node, weight='length')
+                distance, path = get_hazard_registry(self.map_path, terrain=terrain).route(start_node, end_node)
+            except HazardBlockedError as e:
+                return f"FAILURE: {e}"
             except nx.NetworkXNoPath:
                 return "FAILURE: No path exists (unreachable)."
 
@@ -73,9 +114,109 @@ class NodeDistanceTool(BaseTool):
                 limit = float(max_range)
                 if distance > limit:
                     return f"FAILURE: Target too far. Dist: {distance:.2f} > Range: {limit}. Pick closer target."
-            
-            path = nx.shortest_path(G, source=start_node, target=end_node, weight='length')
+
             return f"SUCCESS: Path: {path}, Total Distance: {distance:.2f}"
 
         except Exception as e:
-            return f"Error calculating path: {str(e)}"
\ No newline at end of file
+            return f"Error calculating path: {str(e)}"
+
+@memoize_tool(
+    path_fields=("map_path", "drones_path"),
+    files=(DEFAULT_MISSION_REPORT_PATH,),
+    state=lambda tool: hazard_version(tool.map_path),
+)
+class DroneReachabilityTool(BaseTool):
+    name: str = "Drone Reachability Matrix"
+    description: str = (
+        "In ONE call, tells which targets every drone can reach within its range (avoiding known hazards), "
+        "with the flight distance of each. Use it before assigning drones instead of checking pairs one by one. "
+        "Input: target_nodes (optional)."
+    )
+    args_schema: Type[BaseModel] = DroneReachabilitySchema
+
+    map_path: str = Field(default=str(DEFAULT_TERRAIN_PATH), description="Path to GraphML")
+    drones_path: str = Field(default=str(DEFAULT_DRONES_PATH), description="Path to drones.json")
+
+    # Con mapas grandes, sin objetivos, solo se listan los nodos más cercanos
+    max_listed: int = 25
+
+    def _run(self, target_nodes=None) -> str:
+        try:
+            if not os.path.exists(self.map_path):
+                base_path = os.path.dirname(os.path.abspath(__file__))
+                self.map_path = os.path.normpath(os.path.join(base_path, '..', 'inputs', 'mars_terrain.graphml'))
+
+            if not os.path.exists(self.map_path):
+                return f"Error: Map file not found at {self.map_path}"
+
+            if isinstance(target_nodes, str):
+                target_nodes = [t.strip().strip("'\"") for t in target_nodes.replace(";", ",").split(",") if t.strip()]
+
+            matrix = get_drone_reachability(self.map_path, self.drones_path)
+            lines = ["--- Drone Reachability (distance within range; hazards avoided) ---"]
+            for drone in matrix.drones:
+                reachable = matrix.reachable(drone["id"])
+                header = (
+                    f"{drone['id']} @ {drone.get('location')} "
+                    f"(range {drone.get('range')}, camera {drone.get('camera_resolution', 'N/A')})"
+                )
+                if target_nodes:
+                    wanted = set(target_nodes)
+                    reachable = [(n, d) for n, d in reachable if n in wanted]
+                    listed = reachable
+                else:
+                    listed = reachable[:self.max_listed]
+                body = ", ".join(f"{n} ({d:.2f})" for n, d in listed) or "none"
+                more = f" ... and {len(reachable) - len(listed)} more" if len(reachable) > len(listed) else ""
+                lines.append(f"{header}: {body}{more}")
+
+            if target_nodes:
+                unreachable = [t for t in target_nodes if t not in matrix or not matrix.drones_for(t)]
+                if unreachable:
+                    lines.append(f"Targets no drone can reach: {', '.join(unreachable)}")
+            return "\n".join(lines)
+
+        except Exception as e:
+            return f"Error computing drone reachability: {str(e)}"
+
+@memoize_tool(
+    path_fields=("map_path", "drones_path"),
+    files=(DEFAULT_MISSION_REPORT_PATH,),
+    state=lambda tool: hazard_version(tool.map_path),
+)
+class DroneAssignmentTool(BaseTool):
+    name: str = "Drone Assignment Solver"
+    description: str = (
+        "Computes the optimal drone-to-target assignment in ONE call: every drone flies to at most one target, "
+        "only within its range, avoiding known hazards, and only with a camera meeting the target's resolution. "
+        "Returns a ready DroneFleetPlan JSON (paths and distances included) plus the targets left unassigned. "
+        "Input: targets, e.g. 'N5:15MP, N12, N90'."
+    )
+    args_schema: Type[BaseModel] = DroneAssignmentSchema
+
+    map_path: str = Field(default=str(DEFAULT_TERRAIN_PATH), description="Path to GraphML")
+    drones_path: str = Field(default=str(DEFAULT_DRONES_PATH), description="Path to drones.json")
+
+    def _run(self, targets) -> str:
+        try:
+            if not os.path.exists(self.map_path):
+                base_path = os.path.dirname(os.path.abspath(__file__))
+                self.map_path = os.path.normpath(os.path.join(base_path, '..', 'inputs', 'mars_terrain.graphml'))
+
+            if not os.path.exists(self.map_path):
+                return f"Error: Map file not found at {self.map_path}"
+
+            result = plan_drone_assignments(targets, self.map_path, self.drones_path)
+            if not result.plan.assignments and not result.unassigned:
+                return "Error: No valid target node IDs were given."
+
+            lines = [
+                "Proposed DroneFleetPlan (optimal; every distance is within the drone's range):",
+                result.plan.model_dump_json(),
+            ]
+            if result.unassigned:
+                lines.append(f"Unassigned targets (no free drone in range / camera too low): {', '.join(result.unassigned)}")
+            return "\n".join(lines)
+
+        except Exception as e:
+            return f"Error solving drone assignment: {str(e)}"
@@ -1,56 +1,199 @@
 # src/mars_exploration/tools/graphTool.py
-import networkx as nx
 from crewai.tools import BaseTool
 from pathlib import Path
-from typing import Type
-from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Type, Union
+from pydantic import BaseModel, Field, field_validator
+
+from mars_exploration.utils.graphml_stream import page_graphml, summarize_graphml
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH, load_terrain_graph
+from mars_exploration.utils.terrain_graph import load_compact_terrain
+from mars_exploration.utils.tool_cache import memoize_tool
+
+# Maps up to this size are still listed in full when no mode is given
+FULL_LISTING_MAX_NODES = 200
 
 class GraphMLInput(BaseModel):
     """Input for GraphMLReaderTool."""
     file_path: str = Field(
         ..., description="Path to the .graphml file containing the Mars map."
     )
+    mode: Optional[Literal["summary", "nodes", "edges", "full"]] = Field(
+        None,
+        description=(
+            "'summary' for counts and statistics, 'nodes' or 'edges' for one page of the listing, "
+            "'full' for everything. Leave empty to get the full listing on small maps and the summary on large ones."
+        ),
+    )
+    cursor: int = Field(0, ge=0, description="Position of the first node/edge of the page (use the 'next cursor' from the previous page).")
+    page_size: int = Field(100, ge=1, le=1000, description="Number of nodes/edges per page.")
 
+@memoize_tool(path_args=("file_path",))
 class GraphMLReaderTool(BaseTool):
     name: str = "Mars Terrain Graph Reader"
     description: str = (
         "Loads and analyzes the topological map of Mars. "
         "Extracts information about nodes (coordinates, terrain type) "
-        "and their connections (edges) for route planning."
+        "and their connections (edges) for route planning. "
+        "Large maps are summarized; request mode='nodes' or mode='edges' with a cursor to page through them."
     )
     args_schema: Type[BaseModel] = GraphMLInput
 
-    def _run(self, file_path: str) -> str:
+    def _run(self, file_path: str, mode: Optional[str] = None, cursor: int = 0, page_size: int = 100) -> str:
         try:
             path = Path(file_path)
             if not path.exists():
                 return f"Error: Terrain file not found at {file_path}"
 
-            # Load the graph using NetworkX
-            G = nx.read_graphml(path)
-            
-            # 1. Extract Node information (terrain attributes)
-            nodes_info = []
-            for node, data in G.nodes(data=True):
-                # Extract common attributes such as 'terrain', 'elevation', etc.
-                terrain = data.get('terrain_type', 'unknown')
-                nodes_info.append(f"Node {node}: Terrain={terrain}")
-
-            # 2. Extract Edge information (available paths)
-            edges_info = []
-            for u, v, data in G.edges(data=True):
-                distance = data.get('distance', 'N/A')
-                edges_info.append(f"{u} <-> {v} (Distance: {distance})")
-
-            # 3. Format output for the Agent
-            summary = (
-                f"--- Mars Map Summary ---\n"
-                f"Total locations (Nodes): {G.number_of_nodes()}\n"
-                f"Total routes (Edges): {G.number_of_edges()}\n\n"
-                f"Terrain Details:\n" + "\n".join(nodes_info) + "\n\n"
-                f"Network Connections:\n" + "\n".join(edges_info)
-            )
-            return summary
+            if mode in ("nodes", "edges"):
+                return self._page(path, mode, cursor, page_size)
+
+            if mode == "full":
+                return self._full_listing(path)
+
+            # Streaming pass: never builds the graph
+            stats = summarize_graphml(path)
+            if mode is None and stats["nodes"] <= FULL_LISTING_MAX_NODES:
+                return self._full_listing(path)
+            return self._format_summary(stats, page_size)
 
         except Exception as e:
             return f"Error processing the Mars graph: {str(e)}"
+
+    @staticmethod
+    def _full_listing(path: Path) -> str:
+        # Load the graph through the shared terrain cache
+        G = load_terrain_graph(path)
+
+        # 1. Extract Node information (terrain attributes)
+        nodes_info = []
+        for node, data in G.nodes(data=True):
+            terrain = data.get('terrain', data.get('terrain_type', 'unknown'))
+            nodes_info.append(f"Node {node}: Terrain={terrain}")
+
+        # 2. Extract Edge information (available paths)
+        edges_info = []
+        for u, v, data in G.edges(data=True):
+            distance = data.get('length', data.get('distance', 'N/A'))
+            edges_info.append(f"{u} <-> {v} (Distance: {distance})")
+
+        # 3. Format output for the Agent
+        return (
+            f"--- Mars Map Summary ---\n"
+            f"Total locations (Nodes): {G.number_of_nodes()}\n"
+            f"Total routes (Edges): {G.number_of_edges()}\n\n"
+            f"Terrain Details:\n" + "\n".join(nodes_info) + "\n\n"
+            "Network Connections:\n" + "\n".join(edges_info)
+        )
+
+    @staticmethod
+    def _format_summary(stats: dict, page_size: int) -> str:
+        terrain = ", ".join(f"{t}={c}" for t, c in stats["terrain"].items()) or "none"
+        degree = stats["degree"]
+        length = stats["length"]
+        lines = [
+            "--- Mars Map Summary ---",
+            f"Total locations (Nodes): {stats['nodes']}",
+            f"Total routes (Edges): {stats['edges']}",
+            f"Terrain histogram: {terrain}",
+            f"Degree: min={degree['min']}, max={degree['max']}, mean={degree['mean']:.2f}",
+        ]
+        if length["mean"] is not None:
+            lines.append(f"Edge length: min={length['min']:.2f}, max={length['max']:.2f}, mean={length['mean']:.2f}")
+        node_pages = -(-stats["nodes"] // page_size)
+        edge_pages = -(-stats["edges"] // page_size)
+        lines.append(
+            f"\nListing is paginated: {node_pages} node page(s) and {edge_pages} edge page(s) of {page_size}. "
+            f"Call again with mode='nodes' or mode='edges' and cursor=<page index * {page_size}>."
+        )
+        return "\n".join(lines)
+
+    @staticmethod
+    def _page(path: Path, mode: str, cursor: int, page_size: int) -> str:
+        records, next_cursor = page_graphml(path, mode[:-1], cursor, page_size)
+        if mode == "nodes":
+            body = [f"Node {r['id']}: Terrain={r.get('terrain', 'unknown')}" for r in records]
+        else:
+            body = [
+                f"{r['source']} <-> {r['target']} (Distance: {r.get('length', 'N/A')}, Energy: {r.get('energy', 'N/A')})"
+                for r in records
+            ]
+        header = f"--- Mars Map {mode.capitalize()} [{cursor}..{cursor + len(records)}) ---"
+        footer = f"Next cursor: {next_cursor}" if next_cursor is not None else "End of listing."
+        return "\n".join([header, *body, footer])
+
+
+class TerrainRegionInput(BaseModel):
+    """Input for TerrainRegionTool."""
+    node_ids: Union[List[str], str] = Field(
+        ..., description="Node IDs at the centre of the region, e.g. ['N12', 'N22'] or 'N12, N22'."
+    )
+    hops: Optional[int] = Field(
+        None, ge=0, le=10, description="Include nodes up to this many edges away (default 1 when no max_distance is given)."
+    )
+    max_distance: Optional[float] = Field(
+        None, gt=0, description="Include nodes whose shortest-path length to a centre node is at most this value."
+    )
+
+    @field_validator("node_ids")
+    @classmethod
+    def _split_ids(cls, value):
+        if isinstance(value, str):
+            value = value.replace(";", ",").split(",")
+        return [v.strip().strip("'\"") for v in value if v and v.strip()]
+
+@memoize_tool(path_fields=("map_path",))
+class TerrainRegionTool(BaseTool):
+    name: str = "Mars Terrain Region Reader"
+    description: str = (
+        "Returns only the part of the Mars map around the given nodes: each node's terrain and the "
+        "length/energy of every route between them. Inputs: node_ids, and either hops (default 1) "
+        "or max_distance. Prefer this over reading the whole map."
+    )
+    args_schema: Type[BaseModel] = TerrainRegionInput
+
+    map_path: str = Field(default=str(DEFAULT_TERRAIN_PATH), description="Path to GraphML")
+
+    def _run(self, node_ids, hops: Optional[int] = None, max_distance: Optional[float] = None) -> str:
+        try:
+            if isinstance(node_ids, str):
+                node_ids = TerrainRegionInput(node_ids=node_ids).node_ids
+            if not Path(self.map_path).exists():
+                return f"Error: Map file not found at {self.map_path}"
+
+            T = load_compact_terrain(self.map_path)
+            missing = [n for n in node_ids if n not in T]
+            seeds = [T.index[n] for n in node_ids if n in T]
+            if not seeds:
+                return f"Error: None of the nodes {node_ids} exist in the map."
+
+            if max_distance is None and hops is None:
+                hops = 1
+            nodes = T.region(seeds, hops=hops, max_distance=max_distance)
+            edges = T.induced_edges(nodes)
+            sources = T.edge_source(edges)
+
+            radius = []
+            if hops is not None:
+                radius.append(f"{hops} hop(s)")
+            if max_distance is not None:
+                radius.append(f"distance <= {max_distance}")
+
+            lines = [
+                f"--- Mars Terrain Region (centre: {', '.join(T.ids(seeds))}; radius: {', '.join(radius)}) ---",
+                f"Nodes ({len(nodes)}):",
+            ]
+            lines += [f"Node {T.node_ids[i]}: Terrain={T.terrain(i)}" for i in nodes]
+            lines.append(f"\nRoutes ({len(edges)}):")
+            for u, k in zip(sources.tolist(), edges.tolist()):
+                energy = T.energy[k]
+                energy = "N/A" if energy != energy else round(float(energy), 2)
+                lines.append(
+                    f"{T.node_ids[u]} <-> {T.node_ids[T.indices[k]]} "
+                    f"(Distance: {round(float(T.length[k]), 2)}, Energy: {energy})"
+                )
+            if missing:
+                lines.append(f"\nWarning: unknown node(s) ignored: {', '.join(missing)}")
+            return "\n".join(lines)
+
+        except Exception as e:
+            return f"Error extracting the terrain region: {str(e)}"
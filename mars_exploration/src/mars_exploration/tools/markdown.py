@@ -4,12 +4,15 @@ from pathlib import Path
 from typing import Type
 from pydantic import BaseModel, Field
 
+from mars_exploration.utils.tool_cache import memoize_tool
+
 class MarkdownReaderInput(BaseModel):
     """Input for MarkdownReaderTool."""
     file_path: str = Field(
         ..., description="Path to the mission .md file."
     )
 
+@memoize_tool(path_args=("file_path",))
 class MarkdownReaderTool(BaseTool):
     name: str = "Mission Report Reader"
     description: str = (
@@ -0,0 +1,174 @@
+import os
+import networkx as nx
+import re
+from typing import Type, Optional
+from pydantic import BaseModel, Field
+from crewai.tools import BaseTool
+
+from mars_exploration.utils.hazards import DEFAULT_MISSION_REPORT_PATH, HazardBlockedError, get_hazard_registry, hazard_version
+from mars_exploration.utils.pareto_router import get_pareto_router
+from mars_exploration.utils.rover_profiles import DEFAULT_ROVERS_PATH, load_rovers, rover_signature
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+from mars_exploration.utils.tool_cache import memoize_tool
+from mars_exploration.utils.tour_optimizer import DEFAULT_RECHARGE_RATE, RECHARGE_THRESHOLD, optimize_tours
+
+# --- Schema para ParetoRouteTool ---
+class ParetoRouteSchema(BaseModel):
+    """Input schema for ParetoRouteTool."""
+    start_node: str = Field(..., description="The rover's starting node ID (e.g., 'N43').")
+    end_node: str = Field(..., description="The target node ID (e.g., 'N22').")
+    energy_budget: Optional[float] = Field(
+        None,
+        description="Maximum energy the route may consume. Routes above it are discarded.",
+    )
+    rover_id: Optional[str] = Field(
+        None,
+        description="Rover ID (e.g., 'rover_3'). If provided, only terrain this rover can drive is used.",
+    )
+
+# --- Pareto Route Tool ---
+@memoize_tool(
+    path_fields=("map_path",),
+    files=(DEFAULT_MISSION_REPORT_PATH, DEFAULT_ROVERS_PATH),
+    state=lambda tool: hazard_version(tool.map_path),
+)
+class ParetoRouteTool(BaseTool):
+    name: str = "Rover Energy-Aware Route Planner"
+    description: str = (
+        "Lists every trade-off route between two nodes: from the shortest route to the one "
+        "that uses the least energy, avoiding known hazards. Use it for rovers with low battery. "
+        "Inputs: start_node, end_node, energy_budget (optional), rover_id (optional)."
+    )
+    args_schema: Type[BaseModel] = ParetoRouteSchema
+
+    map_path: str = Field(default=str(DEFAULT_TERRAIN_PATH), description="Path to GraphML")
+
+    def _run(
+        self,
+        start_node: str,
+        end_node: str,
+        energy_budget: Optional[float] = None,
+        rover_id: Optional[str] = None,
+    ) -> str:
+        try:
+            if not os.path.exists(self.map_path):
+                return f"Error: Map file not found at {self.map_path}"
+
+            try:
+                terrain = rover_signature(rover_id) if rover_id else None
+            except KeyError:
+                return f"Error: Rover {rover_id} does not exist."
+
+            view = get_hazard_registry(self.map_path, terrain=terrain).view()
+            for node in (start_node, end_node):
+                if node not in view:
+                    return f"Error: Node {node} does not exist."
+                if view.is_blocked(node):
+                    return f"FAILURE: {node} is inside a hazard zone."
+            if start_node != end_node and not view.can_enter(end_node):
+                terrain_type = view.graph.terrain(view.graph.index[end_node])
+                return f"FAILURE: {end_node} is {terrain_type} terrain, which {rover_id} cannot drive."
+
+            try:
+                front = get_pareto_router(self.map_path, terrain).front(start_node, end_node, energy_budget)
+            except (HazardBlockedError, nx.NetworkXNoPath):
+                return "FAILURE: No path exists (unreachable)."
+
+            if not front:
+                return f"FAILURE: No route reaches {end_node} within the energy budget of {energy_budget}."
+
+            lines = [f"Routes from {start_node} to {end_node} (shortest first, least energy last):"]
+            for i, route in enumerate(front, start=1):
+                tags = []
+                if i == 1:
+                    tags.append("shortest")
+                if i == len(front):
+                    tags.append("least energy")
+                tag = f" [{', '.join(tags)}]" if tags else ""
+                lines.append(
+                    f"Option {i}{tag}: Distance: {route.length:.2f}, Energy: {route.energy:.2f}, Path: {route.path}"
+                )
+            return "\n".join(lines)
+
+        except Exception as e:
+            return f"Error calculating energy-aware routes: {str(e)}"
+
+
+# --- Schema para RoverTourTool ---
+class RoverTourSchema(BaseModel):
+    """Input schema for RoverTourTool."""
+    target_nodes: str = Field(..., description="Comma-separated target node IDs to visit (e.g., 'N12, N22, N5').")
+    rover_ids: Optional[str] = Field(
+        None,
+        description="Comma-separated rover IDs to use (e.g., 'rover_0, rover_3'). Defaults to the whole fleet.",
+    )
+    recharge_nodes: Optional[str] = Field(
+        None,
+        description="Comma-separated recharge station node IDs. If omitted, rovers recharge where they stand.",
+    )
+
+# --- Rover Tour Tool ---
+@memoize_tool(
+    path_fields=("map_path",),
+    files=(DEFAULT_MISSION_REPORT_PATH, DEFAULT_ROVERS_PATH),
+    state=lambda tool: hazard_version(tool.map_path),
+)
+class RoverTourTool(BaseTool):
+    name: str = "Rover Multi-Target Tour Planner"
+    description: str = (
+        "Splits several targets among the rovers and orders each rover's visits to finish the "
+        f"whole set as early as possible, respecting terrain, speed and battery (recharge stop "
+        f"whenever energy would drop below {RECHARGE_THRESHOLD:g}%). Avoids known hazards. "
+        "Inputs: target_nodes, rover_ids (optional), recharge_nodes (optional)."
+    )
+    args_schema: Type[BaseModel] = RoverTourSchema
+
+    map_path: str = Field(default=str(DEFAULT_TERRAIN_PATH), description="Path to GraphML")
+    recharge_rate: float = Field(default=DEFAULT_RECHARGE_RATE, description="Energy points recovered per time unit")
+
+    def _run(self, target_nodes: str, rover_ids: Optional[str] = None, recharge_nodes: Optional[str] = None) -> str:
+        try:
+            if not os.path.exists(self.map_path):
+                return f"Error: Map file not found at {self.map_path}"
+
+            # Acepta "N1, N2", "['N1', 'N2']" o "N1 N2"
+            targets = re.findall(r"N\d+", target_nodes or "", flags=re.IGNORECASE)
+            targets = [t.upper() for t in targets]
+            if not targets:
+                return "Error: No target nodes given."
+            stations = [n.upper() for n in re.findall(r"N\d+", recharge_nodes or "", flags=re.IGNORECASE)]
+
+            rovers = load_rovers()
+            if rover_ids:
+                wanted = [r.strip().strip("'\"[]") for r in rover_ids.split(",") if r.strip()]
+                known = {r["id"] for r in rovers if r.get("id")}
+                unknown = [r for r in wanted if r not in known]
+                if unknown:
+                    return f"Error: Rover(s) {', '.join(unknown)} do not exist."
+                rovers = [r for r in rovers if r.get("id") in wanted]
+
+            plan = optimize_tours(targets, rovers, self.map_path, recharge_rate=self.recharge_rate, recharge_nodes=stations)
+
+            lines = ["Rover tours (eta in distance/speed units, energy in %):"]
+            for tour in plan.tours:
+                if len(tour.stops) < 2:
+                    continue
+                lines.append(
+                    f"{tour.rover_id}: Duration: {tour.duration:.2f}, Distance: {tour.distance:.2f}, "
+                    f"Energy used: {tour.energy_used:.2f}, Recharges: {tour.recharges}"
+                )
+                for stop in tour.stops[1:]:
+                    label = "Recharge at" if stop.action == "recharge" else "Visit"
+                    lines.append(
+                        f"  - {label} {stop.node}: ETA {stop.eta:.2f}, Energy {stop.energy:.1f}, Path: {stop.path}"
+                    )
+                for warning in tour.warnings:
+                    lines.append(f"  WARNING: {warning}")
+            if len(lines) == 1:
+                lines.append("No rover can reach any of the targets.")
+            if plan.unassigned:
+                lines.append(f"Unreachable for every rover (hazard, terrain or unknown node): {', '.join(plan.unassigned)}")
+            return "\n".join(lines)
+
+        except Exception as e:
+            return f"Error planning rover tours: {str(e)}"
@@ -1,10 +1,26 @@
 import json
 import os
+import re
 import networkx as nx
 from typing import Type, Optional
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
 
+from mars_exploration.utils.comm_scheduler import (
+    BASE_NODE,
+    CONTACT_INTERVAL_HOURS,
+    DEFAULT_CONTACT_MINUTES,
+    DEFAULT_SATELLITES_PATH,
+    SOL_HOURS,
+    load_satellites,
+    schedule_contacts,
+)
+from mars_exploration.utils.coverage_index import get_coverage_index
+from mars_exploration.utils.routing_engine import get_routing_engine
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+from mars_exploration.utils.terrain_graph import load_compact_terrain
+from mars_exploration.utils.tool_cache import memoize_tool
+
 # --- 1. Schema para SatelliteLinkTool ---
 class SatelliteLinkSchema(BaseModel):
     """Input schema for SatelliteLinkTool."""
@@ -15,7 +31,34 @@ class SatelliteLinkSchema(BaseModel):
         description="Maximum communication range of the satellite. If provided, fails when distance exceeds it."
     )
 
+# --- Schema para CommunicationScheduleTool ---
+class CommunicationScheduleSchema(BaseModel):
+    """Input schema for CommunicationScheduleTool."""
+    horizon_hours: Optional[float] = Field(
+        None,
+        description=f"Mission horizon in hours (default one sol, {SOL_HOURS} h).",
+    )
+    max_gap_hours: Optional[float] = Field(
+        None,
+        description=f"Maximum time between two contacts with the base (default {CONTACT_INTERVAL_HOURS:g} h).",
+    )
+    contact_minutes: Optional[float] = Field(
+        None,
+        description=f"Length of each contact slot in minutes (default {DEFAULT_CONTACT_MINUTES:g}).",
+    )
+
+# --- Schema para SatelliteCoverageTool ---
+class SatelliteCoverageSchema(BaseModel):
+    """Input schema for SatelliteCoverageTool."""
+    node_ids: str = Field(..., description="Comma-separated terrain node IDs (e.g., 'N22, N23, N90').")
+    start_hour: Optional[float] = Field(None, description="Start of the time range in mission hours (default 0).")
+    end_hour: Optional[float] = Field(
+        None,
+        description="End of the time range in mission hours (default: one full orbit after start_hour).",
+    )
+
 # --- 2. Satellite Info Tool ---
+@memoize_tool(files=(DEFAULT_SATELLITES_PATH,))
 class SatelliteInfoTool(BaseTool):
     name: str = "Satellite Info Reader"
     description: str = (
@@ -41,6 +84,7 @@ class SatelliteInfoTool(BaseTool):
             return f"Error reading satellite file: {str(e)}"
 
 # --- 3. Satellite Link Tool ---
+@memoize_tool(path_fields=("map_path",))
 class SatelliteLinkTool(BaseTool):
     name: str = "Satellite Link Distance Tool"
     description: str = (
@@ -51,7 +95,7 @@ class SatelliteLinkTool(BaseTool):
     args_schema: Type[BaseModel] = SatelliteLinkSchema
 
     map_path: str = Field(
-        default='src/mars_exploration/inputs/mars_terrain.graphml',
+        default=str(DEFAULT_TERRAIN_PATH),
         description="GraphML file representing satellite and relay network."
     )
 
@@ -70,18 +114,14 @@ class SatelliteLinkTool(BaseTool):
             if not os.path.exists(self.map_path):
                 return f"Error: Network map not found at {self.map_path}"
 
-            G = nx.read_graphml(self.map_path)
+            G = load_compact_terrain(self.map_path)
 
             if start_node not in G or end_node not in G:
                 return f"Error: Node {start_node} or {end_node} does not exist in the network."
 
+            # Oracle, contraction hierarchy or Dijkstra, whichever has been built
             try:
-                distance = nx.shortest_path_length(
-                    G,
-                    source=start_node,
-                    target=end_node,
-                    weight='length'
-                )
+                distance, path = get_routing_engine(self.map_path).route(start_node, end_node)
             except nx.NetworkXNoPath:
                 return "FAILURE: No communication path available."
 
@@ -93,14 +133,112 @@ class SatelliteLinkTool(BaseTool):
                         f"Dist: {distance:.2f} > Range: {limit}"
                     )
 
-            path = nx.shortest_path(
-                G,
-                source=start_node,
-                target=end_node,
-                weight='length'
-            )
-
             return f"SUCCESS: Link Path: {path}, Total Distance: {distance:.2f}"
 
         except Exception as e:
             return f"Error calculating satellite link: {str(e)}"
+
+# --- 4. Communication Schedule Tool ---
+@memoize_tool(path_fields=("satellites_path",))
+class CommunicationScheduleTool(BaseTool):
+    name: str = "Communication Window Scheduler"
+    description: str = (
+        f"Builds the contact schedule with the base station {BASE_NODE}: which satellite talks to the base and when, "
+        f"so that contacts are never more than {CONTACT_INTERVAL_HOURS:g} hours apart. Also lists the periods with "
+        "no satellite in range and every break of the contact rule. "
+        "Inputs: horizon_hours, max_gap_hours, contact_minutes (all optional)."
+    )
+    args_schema: Type[BaseModel] = CommunicationScheduleSchema
+
+    satellites_path: str = Field(default=str(DEFAULT_SATELLITES_PATH), description="Path to satellites.json")
+
+    # Horizontes de varios soles: solo se listan los primeros contactos
+    max_listed: int = 40
+
+    def _run(
+        self,
+        horizon_hours: Optional[float] = None,
+        max_gap_hours: Optional[float] = None,
+        contact_minutes: Optional[float] = None,
+    ) -> str:
+        try:
+            if not os.path.exists(self.satellites_path):
+                return f"Error: Satellite configuration file not found at {self.satellites_path}"
+
+            horizon = float(horizon_hours or SOL_HOURS)
+            max_gap = float(max_gap_hours or CONTACT_INTERVAL_HOURS)
+            schedule = schedule_contacts(
+                load_satellites(self.satellites_path),
+                horizon=horizon,
+                max_gap=max_gap,
+                contact_minutes=float(contact_minutes or DEFAULT_CONTACT_MINUTES),
+            )
+
+            lines = [
+                f"Contact schedule with base {BASE_NODE} over {horizon:.2f} h "
+                f"(max {max_gap:g} h between contacts, base in range {schedule.coverage:.0%} of the time):"
+            ]
+            for contact in schedule.contacts[: self.max_listed]:
+                lines.append(f"- {contact.start:.2f}h-{contact.end:.2f}h: {contact.satellite_id}")
+            if len(schedule.contacts) > self.max_listed:
+                lines.append(f"... {len(schedule.contacts) - self.max_listed} more contacts")
+
+            if schedule.gaps:
+                gaps = ", ".join(f"{a:.2f}h-{b:.2f}h" for a, b in schedule.gaps[: self.max_listed])
+                lines.append(f"No satellite in range: {gaps}")
+            if schedule.violations:
+                lines.append(f"FAILURE: The {max_gap:g}-hour contact rule cannot be met between:")
+                for a, b in schedule.violations[: self.max_listed]:
+                    lines.append(f"- {a:.2f}h and {b:.2f}h ({b - a:.2f} h without contact)")
+            else:
+                lines.append("SUCCESS: The contact rule is met for the whole horizon.")
+            return "\n".join(lines)
+
+        except Exception as e:
+            return f"Error scheduling communication windows: {str(e)}"
+
+# --- 5. Satellite Coverage Tool ---
+@memoize_tool(path_fields=("map_path", "satellites_path"))
+class SatelliteCoverageTool(BaseTool):
+    name: str = "Satellite Coverage Index"
+    description: str = (
+        "Tells which satellites see each terrain node and when, for several nodes in ONE call. "
+        "Use it to plan imaging or monitoring passes instead of asking node by node. "
+        "Inputs: node_ids, start_hour (optional), end_hour (optional)."
+    )
+    args_schema: Type[BaseModel] = SatelliteCoverageSchema
+
+    map_path: str = Field(default=str(DEFAULT_TERRAIN_PATH), description="Path to GraphML")
+    satellites_path: str = Field(default=str(DEFAULT_SATELLITES_PATH), description="Path to satellites.json")
+
+    def _run(self, node_ids: str, start_hour: Optional[float] = None, end_hour: Optional[float] = None) -> str:
+        try:
+            for path in (self.map_path, self.satellites_path):
+                if not os.path.exists(path):
+                    return f"Error: File not found at {path}"
+
+            nodes = [n.upper() for n in re.findall(r"N\d+", node_ids or "", flags=re.IGNORECASE)]
+            if not nodes:
+                return "Error: No node IDs given."
+
+            index = get_coverage_index(self.map_path, self.satellites_path)
+            start = float(start_hour or 0.0)
+            end = float(end_hour) if end_hour is not None else start + index.horizon
+            if end <= start:
+                return "Error: end_hour must be after start_hour."
+
+            covered = index.covered(nodes, start, end)
+            lines = [f"Satellite coverage from {start:.2f}h to {end:.2f}h:"]
+            for node in nodes:
+                if node not in index:
+                    lines.append(f"- {node}: Error: node does not exist.")
+                    continue
+                if not covered[node]:
+                    lines.append(f"- {node}: FAILURE: no satellite sees it in this range.")
+                    continue
+                spans = ", ".join(f"{sat} {a:.2f}h-{b:.2f}h" for sat, a, b in index.passes(node, start, end))
+                lines.append(f"- {node}: {spans}")
+            return "\n".join(lines)
+
+        except Exception as e:
+            return f"Error querying satellite coverage: {str(e)}"
@@ -0,0 +1,233 @@
+# src/mars_exploration/utils/comm_scheduler.py
+"""
+Communication-window scheduler for the satellite fleet.
+
+``inputs/satellites.json`` only gives each satellite an ``orbit_path`` and a
+``communication_window`` (e.g. ``"3h"``), so the timeline uses a simple orbit
+model:
+
+* every orbit passes over the base station once per ``orbit_period`` hours
+  (default: one sol), and a satellite can talk to the base for its
+  ``communication_window`` hours on each pass;
+* satellites sharing an orbit are spread evenly along it, and the distinct
+  orbits are staggered evenly over the period (in ``orbit_path`` order);
+* a satellite entry may override the model with ``orbit_period`` and
+  ``phase`` (hours after mission start of its first pass).
+
+From the resulting windows a sweep line computes the coverage gaps (times no
+satellite sees the base), and a greedy scheduler places contact slots so that
+consecutive contacts are at most ``max_gap`` hours apart. Placing each
+contact as late as the rule allows is optimal: no schedule meets the rule
+with fewer contacts, and every unavoidable violation is reported.
+"""
+import json
+import re
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+
+DEFAULT_SATELLITES_PATH = DEFAULT_TERRAIN_PATH.parent / "satellites.json"
+
+SOL_HOURS = 24.6597
+BASE_NODE = "N1"
+# Mission report: contact with the base station at least every 2 hours
+CONTACT_INTERVAL_HOURS = 2.0
+DEFAULT_CONTACT_MINUTES = 10.0
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)\s*(h|hr|hrs|hours?|m|min|mins|minutes?|s|sec|secs|seconds?)?", re.IGNORECASE)
+_ORBIT_NUMBER = re.compile(r"(\d+)")
+
+
+class Window(NamedTuple):
+    start: float
+    end: float
+    satellite_id: str
+
+
+class Contact(NamedTuple):
+    start: float
+    end: float
+    satellite_id: str
+
+
+class CommSchedule(NamedTuple):
+    horizon: float
+    max_gap: float
+    windows: List[Window]
+    contacts: List[Contact]
+    gaps: List[Tuple[float, float]]  # no satellite sees the base
+    violations: List[Tuple[float, float]]  # more than max_gap between contacts
+
+    @property
+    def coverage(self) -> float:
+        """Fraction of the horizon with at least one satellite in contact range."""
+        if self.horizon <= 0:
+            return 0.0
+        return 1.0 - sum(end - start for start, end in self.gaps) / self.horizon
+
+
+def load_satellites(satellites_path: Union[str, Path] = DEFAULT_SATELLITES_PATH) -> List[dict]:
+    return json.loads(Path(satellites_path).read_text(encoding="utf-8"))
+
+
+def parse_duration(value) -> float:
+    """``"3h"``, ``"90 min"``, ``"1h30m"`` or a number of hours -> hours (0.0 when unreadable)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    hours = 0.0
+    for amount, unit in _DURATION.findall(str(value or "")):
+        unit = (unit or "h").lower()
+        scale = 1.0 if unit.startswith("h") else 1 / 60 if unit.startswith("m") else 1 / 3600
+        hours += float(amount) * scale
+    return hours
+
+
+def _orbit_key(orbit: str):
+    m = _ORBIT_NUMBER.search(orbit)
+    return (int(m.group(1)) if m else float("inf"), orbit)
+
+
+class OrbitPass(NamedTuple):
+    satellite_id: str
+    phase: float  # hours after mission start of a pass over the base
+    period: float
+    window: float  # hours the base stays in view on each pass
+
+
+def orbit_passes(satellites: List[dict], orbit_period: float = SOL_HOURS) -> List[OrbitPass]:
+    """Orbit model of each satellite (see module docstring); satellites without a window are left out."""
+    by_orbit: Dict[str, List[dict]] = {}
+    for sat in satellites:
+        if sat.get("id"):
+            by_orbit.setdefault(str(sat.get("orbit_path", "")), []).append(sat)
+
+    orbits = sorted(by_orbit, key=_orbit_key)
+    passes = []
+    for k, orbit in enumerate(orbits):
+        members = by_orbit[orbit]
+        for j, sat in enumerate(members):
+            period = float(sat.get("orbit_period") or orbit_period)
+            length = min(parse_duration(sat.get("communication_window")), period)
+            if length <= 0 or period <= 0:
+                continue
+            if sat.get("phase") is not None:
+                phase = float(sat["phase"])
+            else:
+                phase = period * (k / len(orbits) + j / (len(orbits) * len(members)))
+            passes.append(OrbitPass(sat["id"], phase, period, length))
+    return passes
+
+
+def contact_windows(
+    satellites: List[dict],
+    horizon: float = SOL_HOURS,
+    orbit_period: float = SOL_HOURS,
+) -> List[Window]:
+    """Every contact window with the base station in ``[0, horizon]``, sorted by start."""
+    windows = []
+    for orbit in orbit_passes(satellites, orbit_period):
+        period = orbit.period
+        # Passes are periodic: start with the one that may still be open at t=0
+        first = orbit.phase - np.ceil(orbit.phase / period) * period
+        starts = first + period * np.arange(int(np.ceil((horizon - first) / period)) + 1)
+        for start in starts:
+            end = min(start + orbit.window, horizon)
+            start = max(start, 0.0)
+            if end > start:
+                windows.append(Window(float(start), float(end), orbit.satellite_id))
+    windows.sort()
+    return windows
+
+
+def coverage_gaps(windows: List[Window], horizon: float) -> List[Tuple[float, float]]:
+    """Sweep line over the window edges: the spans of ``[0, horizon]`` no window covers."""
+    if not windows:
+        return [(0.0, horizon)] if horizon > 0 else []
+    starts = np.array([w.start for w in windows])
+    ends = np.array([w.end for w in windows])
+    times = np.concatenate([starts, ends, [0.0, horizon]])
+    # Ends sort before starts at the same instant so touching windows do not leave a gap
+    deltas = np.concatenate([np.ones(len(starts)), -np.ones(len(ends)), [0.0, 0.0]])
+    order = np.lexsort((deltas, times))
+    times, active = times[order], np.cumsum(deltas[order])
+
+    gaps = []
+    for i in range(len(times) - 1):
+        if active[i] == 0 and times[i + 1] > times[i]:
+            if gaps and gaps[-1][1] == times[i]:
+                gaps[-1] = (gaps[-1][0], float(times[i + 1]))
+            else:
+                gaps.append((float(times[i]), float(times[i + 1])))
+    return gaps
+
+
+class _LatestSlot:
+    """Latest slot start ``<= t`` inside some window (prefix maximum over windows sorted by start)."""
+
+    def __init__(self, windows: List[Window], length: float):
+        usable = [w for w in windows if w.end - w.start >= length]
+        self.starts = [w.start for w in usable]
+        self.windows = usable
+        self.best: List[int] = []
+        for i, w in enumerate(usable):
+            if not self.best or w.end > usable[self.best[-1]].end:
+                self.best.append(i)
+            else:
+                self.best.append(self.best[-1])
+        self.length = length
+
+    def latest(self, t: float) -> Optional[Tuple[float, Window]]:
+        idx = bisect_right(self.starts, t)
+        if idx == 0:
+            return None
+        w = self.windows[self.best[idx - 1]]
+        return min(t, w.end - self.length), w
+
+    def earliest_after(self, t: float) -> Optional[Tuple[float, Window]]:
+        """First slot of a window opening after ``t`` (once ``latest(t)`` found nothing new)."""
+        idx = bisect_right(self.starts, t)
+        if idx < len(self.windows):
+            w = self.windows[idx]
+            return w.start, w
+        return None
+
+
+def schedule_contacts(
+    satellites: List[dict],
+    horizon: float = SOL_HOURS,
+    max_gap: float = CONTACT_INTERVAL_HOURS,
+    contact_minutes: float = DEFAULT_CONTACT_MINUTES,
+    orbit_period: float = SOL_HOURS,
+) -> CommSchedule:
+    """
+    Contact slots keeping the base in touch at least every ``max_gap`` hours.
+
+    Contacts last ``contact_minutes``; the gap is measured between contact
+    starts, and from mission start to the first contact. Each contact goes
+    to the satellite whose window stays open the longest.
+    """
+    windows = contact_windows(satellites, horizon, orbit_period)
+    length = contact_minutes / 60.0
+    slots = _LatestSlot(windows, length)
+
+    contacts: List[Contact] = []
+    violations: List[Tuple[float, float]] = []
+    last = 0.0
+    while last + max_gap < horizon:
+        found = slots.latest(last + max_gap)
+        if found is None or found[0] <= last + 1e-9:
+            # Nothing before the deadline: report the silence and resume at the next window
+            found = slots.earliest_after(last + max_gap)
+            if found is None:
+                violations.append((last, horizon))
+                break
+            violations.append((last, found[0]))
+        start, window = found
+        contacts.append(Contact(start, start + length, window.satellite_id))
+        last = start
+
+    return CommSchedule(horizon, max_gap, windows, contacts, coverage_gaps(windows, horizon), violations)
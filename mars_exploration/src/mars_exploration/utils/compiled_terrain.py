@@ -0,0 +1,181 @@
+# src/mars_exploration/utils/compiled_terrain.py
+"""
+Binary compiled terrain format (``.mterrain``).
+
+``compile-terrain`` converts a GraphML map into a single file that loads by
+memory-mapping its arrays, so no XML is parsed at start-up.
+
+File layout (little-endian)::
+
+    8 bytes   magic  b"MTERRAIN"
+    uint32    format version
+    uint32    header length in bytes
+    ...       UTF-8 JSON header (source stamp/hash, node ids, terrain
+              categories, array table {name: [offset, dtype, shape]})
+    ...       arrays, each starting on a 64-byte boundary
+
+A compiled file is only used while it matches its source GraphML (same
+size and mtime, or failing that the same content hash); otherwise callers
+fall back to parsing the GraphML.
+"""
+import argparse
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Optional, Union
+
+import networkx as nx
+import numpy as np
+
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH, file_content_hash
+from mars_exploration.utils.terrain_graph import TerrainGraph
+
+MAGIC = b"MTERRAIN"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+def compiled_path(graph_path: Union[str, Path]) -> Path:
+    """Default location of the compiled file for a GraphML map."""
+    return Path(graph_path).with_suffix(".mterrain")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def write_compiled(T: TerrainGraph, out_path: Union[str, Path], source: Optional[Union[str, Path]] = None) -> Path:
+    """Serialize ``T``; ``source`` (the GraphML it came from) is stamped into the header."""
+    out_path = Path(out_path)
+
+    rows = np.repeat(np.arange(T.number_of_nodes(), dtype=np.int32), np.diff(T.indptr))
+    keep = rows <= T.indices if not T.directed else np.ones(len(rows), dtype=bool)
+    arrays = {
+        "terrain_codes": np.ascontiguousarray(T.terrain_codes, dtype=np.uint8),
+        "indptr": np.ascontiguousarray(T.indptr, dtype=np.int64),
+        "indices": np.ascontiguousarray(T.indices, dtype=np.int32),
+        "length": np.ascontiguousarray(T.length, dtype=np.float64),
+        "energy": np.ascontiguousarray(T.energy, dtype=np.float64),
+        "edge_u": np.ascontiguousarray(rows[keep], dtype=np.int32),
+        "edge_v": np.ascontiguousarray(T.indices[keep], dtype=np.int32),
+    }
+
+    stamp = {}
+    if source is not None:
+        st = os.stat(source)
+        stamp = {
+            "source_name": Path(source).name,
+            "source_size": st.st_size,
+            "source_mtime_ns": st.st_mtime_ns,
+            "source_sha256": file_content_hash(source),
+        }
+
+    def header_bytes(table):
+        header = {
+            **stamp,
+            "directed": T.directed,
+            "node_ids": T.node_ids,
+            "terrain_categories": T.terrain_categories,
+            "arrays": table,
+        }
+        return json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    # Offsets depend on the header length, which depends on the offsets:
+    # lay out once with placeholders, then again with the real values
+    # (padding absorbs the small size difference).
+    table = {name: [0, a.dtype.str, list(a.shape)] for name, a in arrays.items()}
+    for _ in range(2):
+        offset = _align(_PREAMBLE.size + len(header_bytes(table)) + _ALIGN)
+        for name, a in arrays.items():
+            table[name][0] = offset
+            offset = _align(offset + a.nbytes)
+    header = header_bytes(table)
+
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, a in arrays.items():
+            f.seek(table[name][0])
+            f.write(a.tobytes())
+    os.replace(tmp, out_path)
+    return out_path
+
+
+def read_header(path: Union[str, Path]) -> Optional[dict]:
+    """Parsed header, or None if the file is missing or not a supported version."""
+    try:
+        with open(path, "rb") as f:
+            magic, version, length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                return None
+            return json.loads(f.read(length).decode("utf-8"))
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+def load_compiled(path: Union[str, Path], header: Optional[dict] = None) -> TerrainGraph:
+    """Open a compiled map; every array is a read-only memory map of the file."""
+    header = header or read_header(path)
+    if header is None:
+        raise ValueError(f"{path} is not a compiled terrain file (version {FORMAT_VERSION})")
+
+    arrays = {}
+    for name, (offset, dtype, shape) in header["arrays"].items():
+        if 0 in shape:
+            # numpy cannot map a zero-length region
+            arrays[name] = np.empty(tuple(shape), dtype=np.dtype(dtype))
+        else:
+            arrays[name] = np.memmap(path, dtype=np.dtype(dtype), mode="r", offset=offset, shape=tuple(shape))
+    return TerrainGraph(
+        header["node_ids"],
+        arrays["terrain_codes"],
+        header["terrain_categories"],
+        arrays["indptr"],
+        arrays["indices"],
+        arrays["length"],
+        arrays["energy"],
+        directed=header["directed"],
+    )
+
+
+def is_fresh(header: dict, graph_path: Union[str, Path]) -> bool:
+    """Whether a compiled header still describes ``graph_path``."""
+    try:
+        st = os.stat(graph_path)
+    except OSError:
+        return False
+    if header.get("source_size") == st.st_size and header.get("source_mtime_ns") == st.st_mtime_ns:
+        return True
+    return header.get("source_sha256") == file_content_hash(graph_path)
+
+
+def load_fresh_compiled(graph_path: Union[str, Path]) -> Optional[TerrainGraph]:
+    """The compiled form of ``graph_path`` if it exists and is current, else None."""
+    path = compiled_path(graph_path)
+    header = read_header(path)
+    if header is None or not is_fresh(header, graph_path):
+        return None
+    return load_compiled(path, header)
+
+
+def compile_terrain(graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH, out_path: Optional[Union[str, Path]] = None) -> Path:
+    """Parse ``graph_path`` once and write its compiled form."""
+    T = TerrainGraph.from_networkx(nx.read_graphml(graph_path))
+    return write_compiled(T, out_path or compiled_path(graph_path), source=graph_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a GraphML terrain map into the binary .mterrain format.")
+    parser.add_argument("graph", nargs="?", default=str(DEFAULT_TERRAIN_PATH), help="Path to the GraphML map")
+    parser.add_argument("--out", default=None, help="Output file (default: <map>.mterrain)")
+    args = parser.parse_args()
+
+    out = compile_terrain(args.graph, args.out)
+    print(f"Compiled terrain written to {out}")
+
+
+if __name__ == "__main__":
+    main()
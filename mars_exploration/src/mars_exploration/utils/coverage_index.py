@@ -0,0 +1,218 @@
+# src/mars_exploration/utils/coverage_index.py
+"""
+Bitset index of which satellite sees which terrain node, and when.
+
+The map has no coordinates, so ground tracks follow the orbit model of
+``utils/comm_scheduler.py``: every orbit sweeps the whole map once per
+period, in order of hop distance from the base station, and a satellite's
+footprint spans the fraction ``communication_window / period`` of that
+sweep. The base is therefore in view exactly during the contact windows
+the scheduler uses.
+
+The period is cut into fixed slots. For every satellite and slot the
+covered nodes are stored as a packed bitset, so the whole index is one
+``(satellites, slots, words)`` ``uint64`` array; node sets are packed the
+same way and every query is a vectorized AND/OR over that array. A
+footprint is a run of consecutive track ranks, so each row is built by
+setting the nodes of that run only, one row at a time.
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from mars_exploration.utils.comm_scheduler import (
+    BASE_NODE,
+    DEFAULT_SATELLITES_PATH,
+    SOL_HOURS,
+    load_satellites,
+    orbit_passes,
+)
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+from mars_exploration.utils.terrain_graph import TerrainGraph, load_compact_terrain
+
+DEFAULT_SLOT_MINUTES = 10.0
+
+
+def track_ranks(graph: TerrainGraph, base: str = BASE_NODE) -> np.ndarray:
+    """Rank of every node along the ground track: by hop distance from ``base``, then index."""
+    n = graph.number_of_nodes()
+    hops = graph.hop_distances([graph.index[base]]) if base in graph else np.full(n, -1)
+    # Nodes the base cannot reach come last
+    hops = np.where(hops < 0, np.iinfo(np.int32).max, hops)
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), hops))] = np.arange(n)
+    return rank
+
+
+def pack_rows(mask: np.ndarray) -> np.ndarray:
+    """Boolean ``(..., nodes)`` array -> ``(..., words)`` ``uint64`` bitsets (bit ``i % 64`` of word ``i // 64``)."""
+    n = mask.shape[-1]
+    words = (n + 63) // 64
+    padded = np.zeros(mask.shape[:-1] + (words * 64,), dtype=bool)
+    padded[..., :n] = mask
+    packed = np.packbits(padded, axis=-1, bitorder="little")
+    return np.ascontiguousarray(packed).view("<u8").astype(np.uint64, copy=False)
+
+
+def unpack_rows(bits: np.ndarray, n: int) -> np.ndarray:
+    """Inverse of ``pack_rows``."""
+    as_bytes = np.ascontiguousarray(bits.astype("<u8", copy=False)).view(np.uint8)
+    return np.unpackbits(as_bytes, axis=-1, bitorder="little")[..., :n].astype(bool)
+
+
+class CoverageIndex:
+    """Satellites x time slots x node bitsets over one orbit period (times wrap around it)."""
+
+    def __init__(
+        self,
+        satellite_ids: List[str],
+        node_ids: List[str],
+        bits: np.ndarray,
+        slot_hours: float,
+        horizon: float,
+    ):
+        self.satellite_ids = satellite_ids
+        self.node_ids = node_ids
+        self.bits = bits
+        self.slot_hours = slot_hours
+        self.horizon = horizon
+        self._node = {n: i for i, n in enumerate(node_ids)}
+        self._sat = {s: i for i, s in enumerate(satellite_ids)}
+
+    @property
+    def slots(self) -> int:
+        return self.bits.shape[1]
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._node
+
+    def slot(self, hour: float) -> int:
+        return int((hour % self.horizon) // self.slot_hours) % self.slots
+
+    def slot_range(self, start: float, end: Optional[float] = None) -> np.ndarray:
+        """Slot indices touched by ``[start, end)`` (a single slot without ``end``; wraps around the period)."""
+        first = int(start // self.slot_hours)
+        last = first + 1 if end is None else max(int(np.ceil(end / self.slot_hours)), first + 1)
+        return np.arange(first, min(last, first + self.slots)) % self.slots
+
+    def node_mask(self, nodes: Iterable[str]) -> np.ndarray:
+        """Packed bitset of ``nodes``; unknown ids are ignored."""
+        mask = np.zeros(len(self.node_ids), dtype=bool)
+        mask[[self._node[n] for n in nodes if n in self._node]] = True
+        return pack_rows(mask)
+
+    def _rows(self, satellites: Optional[Iterable[str]]) -> np.ndarray:
+        if satellites is None:
+            return np.arange(len(self.satellite_ids))
+        return np.array([self._sat[s] for s in satellites if s in self._sat], dtype=np.int64)
+
+    def satellites_seeing(self, node_id: str, hour: float) -> List[str]:
+        """Satellites whose footprint covers ``node_id`` at ``hour``."""
+        i = self._node[node_id]
+        column = self.bits[:, self.slot(hour), i // 64] >> np.uint64(i % 64)
+        return [self.satellite_ids[k] for k in np.flatnonzero(column & np.uint64(1))]
+
+    def covered(
+        self,
+        nodes: Iterable[str],
+        start: float,
+        end: Optional[float] = None,
+        satellites: Optional[Iterable[str]] = None,
+    ) -> Dict[str, bool]:
+        """Whether each node is seen by at least one of ``satellites`` at some time in ``[start, end)``."""
+        nodes = [n for n in dict.fromkeys(nodes) if n in self._node]
+        window = self.bits[np.ix_(self._rows(satellites), self.slot_range(start, end))]
+        union = np.bitwise_or.reduce(window.reshape(-1, self.bits.shape[2]), axis=0)
+        seen = unpack_rows(union & self.node_mask(nodes), len(self.node_ids))
+        return {n: bool(seen[self._node[n]]) for n in nodes}
+
+    def coverage_by_satellite(self, nodes: Iterable[str], start: float, end: Optional[float] = None) -> Dict[str, List[str]]:
+        """``{satellite: [nodes it sees in [start, end)]}`` for the satellites that see any of ``nodes``."""
+        mask = self.node_mask(nodes)
+        per_sat = np.bitwise_or.reduce(self.bits[:, self.slot_range(start, end)], axis=1) & mask
+        seen = unpack_rows(per_sat, len(self.node_ids))
+        return {
+            self.satellite_ids[k]: [self.node_ids[j] for j in np.flatnonzero(seen[k])]
+            for k in np.flatnonzero(seen.any(axis=1))
+        }
+
+    def passes(self, node_id: str, start: float = 0.0, end: Optional[float] = None) -> List[Tuple[str, float, float]]:
+        """(satellite, from hour, to hour) spans in which ``node_id`` is in view, in ``[start, end)``."""
+        end = start + self.horizon if end is None else end
+        i = self._node[node_id]
+        slots = self.slot_range(start, end)
+        first = int(start // self.slot_hours)
+        visible = (self.bits[:, slots, i // 64] >> np.uint64(i % 64)) & np.uint64(1)
+        spans = []
+        for k in np.flatnonzero(visible.any(axis=1)):
+            edges = np.diff(np.concatenate([[0], visible[k].astype(np.int8), [0]]))
+            for a, b in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+                spans.append((
+                    self.satellite_ids[k],
+                    float(max((first + a) * self.slot_hours, start)),
+                    float(min((first + b) * self.slot_hours, end)),
+                ))
+        spans.sort(key=lambda span: (span[1], span[0]))
+        return spans
+
+
+def build_coverage_index(
+    graph: TerrainGraph,
+    satellites: List[dict],
+    slot_minutes: float = DEFAULT_SLOT_MINUTES,
+    orbit_period: float = SOL_HOURS,
+    base: str = BASE_NODE,
+) -> CoverageIndex:
+    """Coverage bitsets of every satellite over one ``orbit_period``."""
+    slot_hours = slot_minutes / 60.0
+    slots = max(int(np.ceil(orbit_period / slot_hours)), 1)
+    n = graph.number_of_nodes()
+    rank = track_ranks(graph, base)
+
+    # Nodes in track order: the ranks [a, b) of a footprint are order[a:b]
+    order = np.argsort(rank)
+
+    # Footprint at the middle of each slot
+    times = (np.arange(slots) + 0.5) * slot_hours
+    passes = orbit_passes(satellites, orbit_period)
+    bits = np.zeros((len(passes), slots, (n + 63) // 64), dtype=np.uint64)
+    row = np.zeros(n, dtype=bool)
+    for k, orbit in enumerate(passes):
+        # Track position under the satellite (in ranks); the footprint trails it by window/period
+        head = np.floor(((times - orbit.phase) / orbit.period) % 1.0 * n).astype(np.int64) + 1
+        count = min(int(round(orbit.window / orbit.period * n)), n)
+        start = (head - count) % n
+        for s, a in enumerate(start):
+            row[:] = False
+            row[order[a:a + count]] = True
+            if a + count > n:
+                row[order[: a + count - n]] = True
+            bits[k, s] = pack_rows(row)
+    return CoverageIndex([p.satellite_id for p in passes], list(graph.node_ids), bits, slot_hours, slots * slot_hours)
+
+_cache: Dict[tuple, Tuple[TerrainGraph, tuple, CoverageIndex]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_coverage_index(
+    graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+    satellites_path: Union[str, Path] = DEFAULT_SATELLITES_PATH,
+    slot_minutes: float = DEFAULT_SLOT_MINUTES,
+) -> CoverageIndex:
+    """Shared index, rebuilt only when the map or the satellite file changes."""
+    graph = load_compact_terrain(graph_path)
+    st = os.stat(satellites_path)
+    key = (str(Path(graph_path).resolve()), str(Path(satellites_path).resolve()), slot_minutes)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _cache.get(key)
+        # The entry keeps its graph alive, so ``is`` cannot match a recycled object
+        if cached is not None and cached[0] is graph and cached[1] == stamp:
+            return cached[2]
+    index = build_coverage_index(graph, load_satellites(satellites_path), slot_minutes)
+    with _cache_lock:
+        _cache[key] = (graph, stamp, index)
+    return index
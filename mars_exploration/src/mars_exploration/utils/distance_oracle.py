@@ -0,0 +1,229 @@
+# src/mars_exploration/utils/distance_oracle.py
+"""
+Offline all-pairs distance oracle for the terrain graph.
+
+``compile_distance_oracle`` runs one Dijkstra per source node (sharded across
+worker processes) and stores the distance and predecessor matrices as ``.npy``
+files next to the map, tagged with the map's content hash. At query time the
+matrices are memory-mapped, so a distance lookup is O(1) and a path lookup is
+O(path length).
+
+Layout of ``<map>.oracle/``::
+
+    meta.json   version, content hash, weight, node ids
+    dist.npy    float64 [n, n], inf when unreachable
+    pred.npy    int32   [n, n], -1 when there is no predecessor
+"""
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from mars_exploration.utils.terrain_cache import (
+    DEFAULT_TERRAIN_PATH,
+    load_terrain_graph,
+    terrain_graph_hash,
+)
+
+ORACLE_VERSION = 1
+
+# Below this size the process pool costs more than it saves
+_PARALLEL_MIN_NODES = 2000
+
+
+def oracle_dir(graph_path: Union[str, Path]) -> Path:
+    """Default location of the compiled oracle for a GraphML file."""
+    return Path(graph_path).with_suffix(".oracle")
+
+
+def _adjacency(G: nx.Graph, nodes: List[str], weight: str) -> csr_matrix:
+    index = {n: i for i, n in enumerate(nodes)}
+    rows, cols, vals = [], [], []
+    for u, v, w in G.edges(data=weight, default=1.0):
+        rows.append(index[u])
+        cols.append(index[v])
+        vals.append(float(w))
+    n = len(nodes)
+    return csr_matrix((vals, (rows, cols)), shape=(n, n))
+
+
+# --- worker side ---
+_worker_state: dict = {}
+
+
+def _init_worker(matrix, directed, dist_path, pred_path):
+    _worker_state["matrix"] = matrix
+    _worker_state["directed"] = directed
+    _worker_state["dist"] = np.load(dist_path, mmap_mode="r+")
+    _worker_state["pred"] = np.load(pred_path, mmap_mode="r+")
+
+
+def _solve_shard(bounds: Tuple[int, int]) -> int:
+    start, stop = bounds
+    dist, pred = dijkstra(
+        _worker_state["matrix"],
+        directed=_worker_state["directed"],
+        indices=np.arange(start, stop),
+        return_predecessors=True,
+    )
+    pred[pred < 0] = -1
+    _worker_state["dist"][start:stop] = dist
+    _worker_state["pred"][start:stop] = pred
+    _worker_state["dist"].flush()
+    _worker_state["pred"].flush()
+    return stop - start
+
+
+def compile_distance_oracle(
+    graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+    out_dir: Optional[Union[str, Path]] = None,
+    weight: str = "length",
+    workers: Optional[int] = None,
+) -> Path:
+    """Compute all-pairs distances/predecessors for ``graph_path`` and persist them."""
+    G = load_terrain_graph(graph_path)
+    out = Path(out_dir) if out_dir else oracle_dir(graph_path)
+    out.mkdir(parents=True, exist_ok=True)
+
+    nodes = [str(n) for n in G.nodes]
+    n = len(nodes)
+    matrix = _adjacency(G, nodes, weight)
+    directed = G.is_directed()
+
+    dist_path = out / "dist.npy"
+    pred_path = out / "pred.npy"
+    dist = np.lib.format.open_memmap(dist_path, mode="w+", dtype=np.float64, shape=(n, n))
+    pred = np.lib.format.open_memmap(pred_path, mode="w+", dtype=np.int32, shape=(n, n))
+    del dist, pred
+
+    workers = workers or os.cpu_count() or 1
+    shard = max(1, -(-n // (workers * 4)))
+    shards = [(s, min(s + shard, n)) for s in range(0, n, shard)]
+
+    if workers == 1 or n < _PARALLEL_MIN_NODES:
+        _init_worker(matrix, directed, dist_path, pred_path)
+        for bounds in shards:
+            _solve_shard(bounds)
+        _worker_state.clear()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(matrix, directed, dist_path, pred_path),
+        ) as pool:
+            for _ in pool.map(_solve_shard, shards):
+                pass
+
+    meta = {
+        "version": ORACLE_VERSION,
+        "content_hash": terrain_graph_hash(graph_path),
+        "weight": weight,
+        "directed": directed,
+        "nodes": nodes,
+    }
+    # Written last: a missing meta.json means an unfinished compile
+    (out / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    return out
+
+
+class DistanceOracle:
+    """Read-only view over a compiled oracle directory."""
+
+    def __init__(self, directory: Path, meta: dict):
+        self.directory = directory
+        self.content_hash = meta["content_hash"]
+        self.weight = meta["weight"]
+        self.nodes: List[str] = meta["nodes"]
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(self.nodes)}
+        self.dist = np.load(directory / "dist.npy", mmap_mode="r")
+        self.pred = np.load(directory / "pred.npy", mmap_mode="r")
+
+    @classmethod
+    def load(
+        cls,
+        graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+        out_dir: Optional[Union[str, Path]] = None,
+        weight: str = "length",
+    ) -> Optional["DistanceOracle"]:
+        """Open the oracle for ``graph_path``; None if it is missing or stale."""
+        directory = Path(out_dir) if out_dir else oracle_dir(graph_path)
+        meta_path = directory / "meta.json"
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if (
+            meta.get("version") != ORACLE_VERSION
+            or meta.get("weight") != weight
+            or meta.get("content_hash") != terrain_graph_hash(graph_path)
+        ):
+            return None
+        return cls(directory, meta)
+
+    def distance(self, source: str, target: str) -> float:
+        return float(self.dist[self.index[source], self.index[target]])
+
+    def path(self, source: str, target: str) -> Optional[List[str]]:
+        s, t = self.index[source], self.index[target]
+        if s == t:
+            return [source]
+        if not np.isfinite(self.dist[s, t]):
+            return None
+        row = self.pred[s]
+        path = [t]
+        while path[-1] != s:
+            path.append(int(row[path[-1]]))
+        return [self.nodes[i] for i in reversed(path)]
+
+    def route(self, source: str, target: str) -> Tuple[float, List[str]]:
+        """(distance, path) like ``nx.single_source_dijkstra``; raises NetworkXNoPath."""
+        path = self.path(source, target)
+        if path is None:
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+        return self.distance(source, target), path
+
+
+_oracles: Dict[Tuple[str, str], DistanceOracle] = {}
+_oracles_lock = threading.Lock()
+
+
+def get_distance_oracle(
+    graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+    weight: str = "length",
+) -> Optional[DistanceOracle]:
+    """Shared oracle for ``graph_path`` if one has been compiled and is current."""
+    key = (str(Path(graph_path).resolve()), weight)
+    current = terrain_graph_hash(graph_path)
+    with _oracles_lock:
+        oracle = _oracles.get(key)
+        if oracle is not None and oracle.content_hash == current:
+            return oracle
+        oracle = DistanceOracle.load(graph_path, weight=weight)
+        if oracle is None:
+            _oracles.pop(key, None)
+        else:
+            _oracles[key] = oracle
+        return oracle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the all-pairs distance oracle for a terrain map.")
+    parser.add_argument("graph", nargs="?", default=str(DEFAULT_TERRAIN_PATH), help="Path to the GraphML map")
+    parser.add_argument("--out", default=None, help="Output directory (default: <map>.oracle/)")
+    parser.add_argument("--weight", default="length", help="Edge attribute used as distance")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    out = compile_distance_oracle(args.graph, args.out, args.weight, args.workers)
+    print(f"Distance oracle written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# src/mars_exploration/utils/drone_assignment.py
+"""
+Optimal drone-to-target assignment.
+
+Builds the drone x target cost matrix from the reachability matrix
+(``utils/drone_reachability.py``) and solves it as a rectangular linear
+assignment (Hungarian method, ``scipy.optimize.linear_sum_assignment``):
+
+* a pair is infeasible when the target is out of the drone's range or the
+  drone's camera is below the target's required resolution;
+* a feasible pair costs its flight distance plus ``resolution_weight`` per
+  megapixel of spare resolution, so high-resolution cameras are kept for the
+  targets that need them;
+* infeasible pairs get a cost larger than any feasible assignment, so the
+  solver first maximises the number of covered targets, then minimises cost.
+
+The result is a ``DroneFleetPlan`` ready for the drone crew to review.
+"""
+import re
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from mars_exploration.models.drone_models import DroneAssignment, DroneFleetPlan
+from mars_exploration.utils.drone_reachability import DEFAULT_DRONES_PATH, compute_reachability, load_drones
+from mars_exploration.utils.hazards import get_hazard_registry
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+
+_MEGAPIXELS = re.compile(r"(\d+(?:\.\d+)?)")
+_TARGET = re.compile(r"^\s*(N\d+)\s*(?:[:(]\s*(\d+(?:\.\d+)?)\s*(?:MP)?\s*\)?)?\s*$", re.IGNORECASE)
+
+
+class DroneTarget(NamedTuple):
+    node: str
+    min_resolution: Optional[float] = None
+
+
+class AssignmentResult(NamedTuple):
+    plan: DroneFleetPlan
+    unassigned: List[str]
+
+
+def camera_megapixels(value) -> float:
+    """``"20MP"`` -> 20.0; 0.0 when unknown."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = _MEGAPIXELS.search(str(value or ""))
+    return float(m.group(1)) if m else 0.0
+
+
+def parse_targets(spec: Union[str, Iterable]) -> List[DroneTarget]:
+    """
+    Targets from ``"N5, N12:15MP"``, a list of such strings, or dicts with
+    ``node`` and optional ``min_resolution``. Duplicates are dropped.
+    """
+    items = spec.replace(";", ",").split(",") if isinstance(spec, str) else list(spec)
+    targets = {}
+    for item in items:
+        if isinstance(item, dict):
+            node, req = item["node"], item.get("min_resolution")
+            req = camera_megapixels(req) if req is not None else None
+        else:
+            m = _TARGET.match(str(item).strip().strip("'\""))
+            if not m:
+                continue
+            node, req = m.group(1).upper(), float(m.group(2)) if m.group(2) else None
+        targets.setdefault(node, DroneTarget(node, req))
+    return list(targets.values())
+
+
+def assignment_costs(
+    distances: np.ndarray,
+    camera: np.ndarray,
+    required: np.ndarray,
+    resolution_weight: float = 0.5,
+) -> np.ndarray:
+    """Drone x target costs; ``inf`` marks infeasible pairs (see module docstring)."""
+    spare = camera[:, None] - required[None, :]
+    return np.where(spare >= 0, distances + resolution_weight * spare, np.inf)
+
+
+def solve_assignment(costs: np.ndarray) -> List[Tuple[int, int]]:
+    """(drone row, target column) pairs of a maximum-cardinality, minimum-cost assignment."""
+    feasible = np.isfinite(costs)
+    if not feasible.any():
+        return []
+    # Any single infeasible pair must cost more than a whole feasible assignment
+    big = (float(costs[feasible].max()) + 1.0) * (min(costs.shape) + 1)
+    rows, cols = linear_sum_assignment(np.where(feasible, costs, big))
+    keep = feasible[rows, cols]
+    return list(zip(rows[keep].tolist(), cols[keep].tolist()))
+
+
+def plan_drone_assignments(
+    targets: Union[str, Iterable],
+    graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+    drones_path: Union[str, Path] = DEFAULT_DRONES_PATH,
+    resolution_weight: float = 0.5,
+) -> AssignmentResult:
+    """Assign at most one target per drone and one drone per target, avoiding known hazards."""
+    targets = parse_targets(targets)
+    drones = load_drones(drones_path)
+    view = get_hazard_registry(graph_path).view()
+    reach = compute_reachability(view, drones, [t.node for t in targets], keep_paths=True)
+
+    by_node = {t.node: t for t in targets}
+    columns = [by_node[n] for n in reach.node_ids]
+    camera = np.array([camera_megapixels(d.get("camera_resolution")) for d in drones])
+    required = np.array([t.min_resolution or 0.0 for t in columns])
+    pairs = solve_assignment(assignment_costs(reach.distances, camera, required, resolution_weight))
+
+    assignments = []
+    for i, j in sorted(pairs):
+        drone, target = drones[i], columns[j]
+        distance = float(reach.distances[i, j])
+        notes = f"Optimal assignment: {distance:.2f} of {drone.get('range')} range, {drone.get('camera_resolution', 'unknown')} camera"
+        if target.min_resolution:
+            notes += f" (>= {target.min_resolution:g}MP required)"
+        assignments.append(
+            DroneAssignment(
+                drone_id=drone["id"],
+                target_id=target.node,
+                path_nodes=reach.path(drone["id"], target.node),
+                total_distance=round(distance, 2),
+                notes=notes,
+            )
+        )
+
+    assigned = {a.target_id for a in assignments}
+    unassigned = [t.node for t in targets if t.node not in assigned]
+    return AssignmentResult(DroneFleetPlan(assignments=assignments), unassigned)
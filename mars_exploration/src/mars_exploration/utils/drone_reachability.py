@@ -0,0 +1,147 @@
+# src/mars_exploration/utils/drone_reachability.py
+"""
+Drone reachability matrix.
+
+``compute_reachability`` reads ``inputs/drones.json`` and answers "which nodes
+can each drone reach within its range" for the whole fleet at once: one
+cutoff-bounded Dijkstra per distinct drone location (drones parked at the
+same node share a search, bounded by the largest of their ranges), on the
+hazard-masked map. The result is a drones x nodes NumPy distance matrix with
+``inf`` wherever the node is out of range.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from mars_exploration.utils.hazards import MaskedTerrainView, get_hazard_registry
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+from mars_exploration.utils.terrain_graph import TerrainGraph
+
+DEFAULT_DRONES_PATH = DEFAULT_TERRAIN_PATH.parent / "drones.json"
+
+
+def load_drones(drones_path: Union[str, Path] = DEFAULT_DRONES_PATH) -> List[dict]:
+    return json.loads(Path(drones_path).read_text(encoding="utf-8"))
+
+
+class DroneReachability:
+    """Distances from every drone to a set of nodes, ``inf`` beyond the drone's range."""
+
+    def __init__(
+        self,
+        drones: List[dict],
+        node_ids: List[str],
+        distances: np.ndarray,
+        graph: Optional[TerrainGraph] = None,
+        predecessors: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        self.drones = drones
+        self.drone_ids: List[str] = [d["id"] for d in drones]
+        self.node_ids = node_ids
+        self.distances = distances
+        self.ranges = np.array([float(d.get("range", 0.0)) for d in drones])
+        self._drone_row = {d: i for i, d in enumerate(self.drone_ids)}
+        self._node_col = {n: j for j, n in enumerate(node_ids)}
+        self._graph = graph
+        self._predecessors = predecessors or {}
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._node_col
+
+    @property
+    def feasible(self) -> np.ndarray:
+        """Boolean drones x nodes matrix: node within the drone's range."""
+        return np.isfinite(self.distances)
+
+    def distance(self, drone_id: str, node_id: str) -> float:
+        return float(self.distances[self._drone_row[drone_id], self._node_col[node_id]])
+
+    def reachable(self, drone_id: str) -> List[Tuple[str, float]]:
+        """(node, distance) pairs the drone can reach, nearest first."""
+        row = self.distances[self._drone_row[drone_id]]
+        cols = np.flatnonzero(np.isfinite(row))
+        cols = cols[np.argsort(row[cols], kind="stable")]
+        return [(self.node_ids[j], float(row[j])) for j in cols]
+
+    def path(self, drone_id: str, node_id: str) -> Optional[List[str]]:
+        """Flight path to an in-range node; needs ``compute_reachability(..., keep_paths=True)``."""
+        if not np.isfinite(self.distance(drone_id, node_id)):
+            return None
+        location = self.drones[self._drone_row[drone_id]]["location"]
+        pred = self._predecessors.get(location)
+        if pred is None or self._graph is None:
+            raise ValueError("Reachability was computed without paths")
+        G = self._graph
+        return G.ids(G.path_from(pred, G.index[location], G.index[node_id]))
+
+    def drones_for(self, node_id: str) -> List[Tuple[str, float]]:
+        """(drone, distance) pairs that can reach ``node_id``, nearest first."""
+        col = self.distances[:, self._node_col[node_id]]
+        rows = np.flatnonzero(np.isfinite(col))
+        rows = rows[np.argsort(col[rows], kind="stable")]
+        return [(self.drone_ids[i], float(col[i])) for i in rows]
+
+
+def compute_reachability(
+    view: MaskedTerrainView,
+    drones: List[dict],
+    targets: Optional[Sequence[str]] = None,
+    weight: str = "length",
+    keep_paths: bool = False,
+) -> DroneReachability:
+    """
+    Reachability of ``drones`` over ``view``, for every node or only ``targets``.
+
+    Drones whose location is missing from the map (or blocked) reach nothing.
+    With ``keep_paths`` the predecessor row of each search is kept so flight
+    paths can be read back with ``DroneReachability.path``.
+    """
+    G = view.graph
+    node_ids = list(G.node_ids) if targets is None else [t for t in dict.fromkeys(targets) if t in G]
+    cols = np.array([G.index[n] for n in node_ids], dtype=np.int64)
+    distances = np.full((len(drones), len(node_ids)), np.inf)
+
+    # One bounded search per distinct location, as far as its longest-range drone
+    by_location: Dict[str, List[int]] = {}
+    for i, drone in enumerate(drones):
+        location = drone.get("location")
+        if location in G and not view.is_blocked(location):
+            by_location.setdefault(location, []).append(i)
+
+    predecessors = {}
+    for location, rows in by_location.items():
+        ranges = np.array([float(drones[i].get("range", 0.0)) for i in rows])
+        dist, pred = view.dijkstra(G.index[location], weight, cutoff=float(ranges.max()))
+        reach = dist[cols]
+        distances[rows] = np.where(reach[None, :] <= ranges[:, None], reach[None, :], np.inf)
+        if keep_paths:
+            predecessors[location] = pred
+    return DroneReachability(drones, node_ids, distances, G, predecessors)
+
+
+_cache: Dict[Tuple[str, str], Tuple[MaskedTerrainView, tuple, DroneReachability]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_drone_reachability(
+    graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+    drones_path: Union[str, Path] = DEFAULT_DRONES_PATH,
+) -> DroneReachability:
+    """Full drones x nodes matrix, recomputed only when the fleet file or the hazard view changes."""
+    view = get_hazard_registry(graph_path).view()
+    st = os.stat(drones_path)
+    key = (str(Path(graph_path).resolve()), str(Path(drones_path).resolve()))
+    stamp = (view.version, st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _cache.get(key)
+        # The entry keeps its view alive, so ``is`` cannot match a recycled object
+        if cached is not None and cached[0] is view and cached[1] == stamp:
+            return cached[2]
+    result = compute_reachability(view, load_drones(drones_path))
+    with _cache_lock:
+        _cache[key] = (view, stamp, result)
+    return result
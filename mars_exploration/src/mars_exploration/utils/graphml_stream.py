@@ -0,0 +1,125 @@
+# src/mars_exploration/utils/graphml_stream.py
+"""
+Incremental GraphML reading.
+
+These helpers walk a GraphML file with ``iterparse`` and discard every element
+once it has been read, so memory stays bounded by the page being returned (plus
+one degree counter per node for the summary) no matter how large the map is.
+"""
+import xml.etree.ElementTree as ET
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_graphml(path: Union[str, Path]) -> Iterator[Tuple[str, dict]]:
+    """
+    Yield ``("node", {...})`` and ``("edge", {...})`` records in file order.
+
+    Node records carry ``id`` plus their data attributes; edge records carry
+    ``source``/``target`` plus theirs. Data keys are resolved to their
+    ``attr.name`` and typed according to the ``<key>`` declarations.
+    """
+    keys: Dict[str, Tuple[str, str]] = {}
+    parent = None
+    for event, elem in ET.iterparse(str(path), events=("start", "end")):
+        tag = _local(elem.tag)
+        if event == "start":
+            if tag == "graph":
+                parent = elem
+            continue
+
+        if tag == "key":
+            keys[elem.get("id")] = (elem.get("attr.name", elem.get("id")), elem.get("attr.type", "string"))
+        elif tag in ("node", "edge"):
+            if tag == "node":
+                record = {"id": elem.get("id")}
+            else:
+                record = {"source": elem.get("source"), "target": elem.get("target")}
+            for data in elem:
+                if _local(data.tag) != "data":
+                    continue
+                name, kind = keys.get(data.get("key"), (data.get("key"), "string"))
+                record[name] = _convert(data.text, kind)
+            yield tag, record
+            # Drop the element and detach it from <graph> so nothing accumulates
+            elem.clear()
+            if parent is not None:
+                parent.clear()
+
+
+def _convert(text: Optional[str], kind: str):
+    if text is None:
+        return None
+    if kind in ("double", "float"):
+        return float(text)
+    if kind in ("int", "long"):
+        return int(text)
+    if kind == "boolean":
+        return text.strip().lower() in ("true", "1")
+    return text
+
+
+def summarize_graphml(path: Union[str, Path]) -> dict:
+    """Counts, terrain histogram, degree and edge-length statistics in one pass."""
+    nodes = edges = 0
+    terrain = Counter()
+    degree = Counter()
+    length_min, length_max, length_sum, length_n = float("inf"), float("-inf"), 0.0, 0
+
+    for kind, record in iter_graphml(path):
+        if kind == "node":
+            nodes += 1
+            terrain[record.get("terrain", "unknown")] += 1
+            degree[record["id"]] += 0
+        else:
+            edges += 1
+            degree[record["source"]] += 1
+            degree[record["target"]] += 1
+            length = record.get("length")
+            if isinstance(length, (int, float)):
+                length_min = min(length_min, length)
+                length_max = max(length_max, length)
+                length_sum += length
+                length_n += 1
+
+    degrees = list(degree.values())
+    return {
+        "nodes": nodes,
+        "edges": edges,
+        "terrain": dict(sorted(terrain.items())),
+        "degree": {
+            "min": min(degrees) if degrees else 0,
+            "max": max(degrees) if degrees else 0,
+            "mean": (sum(degrees) / len(degrees)) if degrees else 0.0,
+        },
+        "length": {
+            "min": length_min if length_n else None,
+            "max": length_max if length_n else None,
+            "mean": (length_sum / length_n) if length_n else None,
+        },
+    }
+
+
+def page_graphml(path: Union[str, Path], kind: str, cursor: int = 0, page_size: int = 100) -> Tuple[List[dict], Optional[int]]:
+    """
+    Records ``cursor .. cursor + page_size`` of ``kind`` ("node" or "edge").
+
+    Returns the page and the cursor of the next page (None on the last page).
+    Parsing stops as soon as the page is known to be complete.
+    """
+    page: List[dict] = []
+    seen = 0
+    for record_kind, record in iter_graphml(path):
+        if record_kind != kind:
+            continue
+        if seen >= cursor + page_size:
+            return page, cursor + page_size
+        if seen >= cursor:
+            page.append(record)
+        seen += 1
+    return page, None
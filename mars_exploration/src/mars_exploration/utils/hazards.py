@@ -0,0 +1,499 @@
+# src/mars_exploration/utils/hazards.py
+"""
+Hazard registry and hazard-masked routing.
+
+``HazardRegistry`` holds the no-go nodes and edges of one map (plus an
+optional k-hop safety buffer around each hazard node, found by multi-source
+BFS) and exposes them as a ``MaskedTerrainView``: the shared ``TerrainGraph``
+seen through a blocked-node mask and per-weight masked weight vectors, so the
+graph itself is never copied.
+
+Routes computed on the view are cached. Every hazard change bumps the mask
+version and invalidates only the cached routes it can affect:
+
+* blocking nodes/edges drops the routes that pass through them; any other
+  cached route avoids the change and stays optimal;
+* unblocking drops the routes a detour through the reopened nodes could
+  shorten, i.e. where ``d(s, reopened) + d(reopened, t) < cached distance``
+  (bounded with one multi-source search per direction).
+
+Hazards declared under "Known Hazards" in the mission report are loaded with
+``get_hazard_registry`` and kept in sync with the file.
+
+A registry can also be restricted to a set of terrain types (a rover's
+``terrain_compatibility``). Nodes of other terrain cannot be entered, though a
+rover already standing on one may leave it. There is one registry, and so one
+mask and one route cache, per distinct terrain signature.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from mars_exploration.utils.routing_engine import Route, get_routing_engine
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+from mars_exploration.utils.terrain_graph import UNKNOWN_TERRAIN, TerrainGraph, load_compact_terrain, run_dijkstra
+
+DEFAULT_MISSION_REPORT_PATH = DEFAULT_TERRAIN_PATH.parent / "mission_report.md"
+
+_HAZARD_SECTION = re.compile(r"^#+[^\n]*hazard[^\n]*$(.*?)(?=^#+\s|\Z)", re.IGNORECASE | re.MULTILINE | re.DOTALL)
+_HAZARD_LINE = re.compile(r"\*\*\s*Node\s+(N\d+)\s*\*\*\s*:?\s*([^\n]*)", re.IGNORECASE)
+
+RouteKey = Tuple[str, int, int]
+TerrainSignature = Optional[FrozenSet[str]]
+
+
+class HazardBlockedError(nx.NetworkXNoPath):
+    """The route's start or end lies inside a hazard zone."""
+
+
+def terrain_signature(compatibility: Optional[Iterable[str]]) -> TerrainSignature:
+    """Canonical key for a terrain compatibility list; None (no restriction) when empty."""
+    terrains = frozenset(str(t).strip().lower() for t in (compatibility or ()) if str(t).strip())
+    return terrains or None
+
+
+def parse_hazards(report_text: str) -> Dict[str, str]:
+    """``{node_id: reason}`` from the hazard section(s) of a mission report."""
+    hazards = {}
+    for section in _HAZARD_SECTION.findall(report_text):
+        for node, reason in _HAZARD_LINE.findall(section):
+            hazards[node.upper()] = reason.strip()
+    return hazards
+
+
+class MaskedTerrainView:
+    """
+    A ``TerrainGraph`` with hazard nodes and edges closed off.
+
+    ``no_entry`` marks nodes that may be left but not entered (terrain the
+    rover cannot drive); it makes the view one-way even on an undirected map.
+    """
+
+    def __init__(
+        self,
+        graph: TerrainGraph,
+        blocked_nodes: np.ndarray,
+        blocked_edges: np.ndarray,
+        version: int,
+        no_entry: Optional[np.ndarray] = None,
+    ):
+        self.graph = graph
+        self.blocked_nodes = blocked_nodes
+        self.blocked_edges = blocked_edges
+        self.version = version
+        self.no_entry = no_entry if no_entry is not None else np.zeros_like(blocked_nodes)
+        self.directed = graph.directed or bool(self.no_entry.any())
+        rows = np.repeat(np.arange(graph.number_of_nodes()), np.diff(graph.indptr))
+        # CSR positions that cannot be traversed: blocked edges, every edge touching
+        # a blocked node and every edge into a no-entry node
+        self.closed = blocked_edges | blocked_nodes[rows] | (blocked_nodes | self.no_entry)[graph.indices]
+        self._matrices: Dict[Tuple[str, bool], csr_matrix] = {}
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self.graph
+
+    def is_blocked(self, node_id: str) -> bool:
+        return bool(self.blocked_nodes[self.graph.index[node_id]])
+
+    def can_enter(self, node_id: str) -> bool:
+        i = self.graph.index[node_id]
+        return not (self.blocked_nodes[i] or self.no_entry[i])
+
+    def blocked_ids(self) -> List[str]:
+        return self.graph.ids(np.flatnonzero(self.blocked_nodes))
+
+    def matrix(self, weight: str = "length", reverse: bool = False) -> csr_matrix:
+        """Weight matrix with closed edges set to infinity (transposed with ``reverse``)."""
+        key = (weight, reverse)
+        m = self._matrices.get(key)
+        if m is None:
+            G = self.graph
+            n = G.number_of_nodes()
+            data = np.where(self.closed, np.inf, G.weights(weight))
+            m = csr_matrix((data, G.indices, G.indptr), shape=(n, n))
+            if reverse:
+                m = m.T.tocsr()
+            self._matrices[key] = m
+        return m
+
+    def dijkstra(
+        self,
+        sources: Union[int, Sequence[int]],
+        weight: str = "length",
+        min_only: bool = False,
+        reverse: bool = False,
+        cutoff: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """``TerrainGraph.dijkstra`` on the open part of the map; ``reverse`` searches towards the sources."""
+        directed_reverse = reverse and self.directed
+        return run_dijkstra(self.matrix(weight, directed_reverse), sources, cutoff, min_only)
+
+    def path_is_open(self, path: Sequence[int]) -> bool:
+        path_nodes = np.asarray(path, dtype=np.int64)
+        if self.blocked_nodes[path_nodes].any() or self.no_entry[path_nodes[1:]].any():
+            return False
+        return not any(self.closed[self.graph.edge_position(u, v)] for u, v in zip(path, path[1:]))
+
+
+class HazardRegistry:
+    """
+    No-go nodes/edges of one map and a route cache over the masked view.
+
+    ``buffer_hops`` is the default safety buffer: nodes within that many hops
+    of a hazard node are blocked too. With ``terrain`` (see
+    ``terrain_signature``) only nodes of those terrain types, or of unknown
+    terrain, can be entered.
+    """
+
+    def __init__(
+        self,
+        graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+        buffer_hops: int = 0,
+        max_routes: int = 4096,
+        terrain: TerrainSignature = None,
+    ):
+        self.graph_path = graph_path
+        self.terrain = terrain
+        self.buffer_hops = buffer_hops
+        self.max_routes = max_routes
+        self._nodes: Dict[str, Tuple[str, int]] = {}
+        self._edges: Dict[Tuple[str, str], str] = {}
+        self._from_report: Set[str] = set()
+        self._report_stamp = None
+        self._version = 0
+        self._view: Optional[MaskedTerrainView] = None
+        self._routes: "OrderedDict[RouteKey, Tuple[float, Tuple[int, ...]]]" = OrderedDict()
+        self._by_node: Dict[int, Set[RouteKey]] = defaultdict(set)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    # ---------------- Hazards ----------------
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def hazards(self) -> Dict[str, str]:
+        """``{node_id: reason}`` of the declared hazard nodes (buffers not included)."""
+        with self._lock:
+            return {node: reason for node, (reason, _) in self._nodes.items()}
+
+    def add(self, node_id: str, reason: str = "", hops: Optional[int] = None):
+        """Block ``node_id`` and everything within ``hops`` (default ``buffer_hops``) of it."""
+        with self._lock:
+            self._nodes[node_id] = (reason, self.buffer_hops if hops is None else hops)
+            self._from_report.discard(node_id)
+            self._apply()
+
+    def remove(self, node_id: str):
+        with self._lock:
+            if self._nodes.pop(node_id, None) is not None:
+                self._from_report.discard(node_id)
+                self._apply()
+
+    def add_edge(self, u: str, v: str, reason: str = ""):
+        with self._lock:
+            self._edges[(u, v)] = reason
+            self._apply()
+
+    def remove_edge(self, u: str, v: str):
+        with self._lock:
+            if self._edges.pop((u, v), None) is not None:
+                self._apply()
+
+    def load_report(self, report_path: Union[str, Path] = DEFAULT_MISSION_REPORT_PATH) -> bool:
+        """
+        Sync the hazards declared in ``report_path`` (a missing file declares none).
+
+        Cheap when the file is unchanged; returns True if the hazards changed.
+        """
+        try:
+            st = os.stat(report_path)
+            stamp = (str(Path(report_path).resolve()), st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        with self._lock:
+            if stamp == self._report_stamp and stamp is not None:
+                return False
+            declared = parse_hazards(Path(report_path).read_text(encoding="utf-8")) if stamp else {}
+            before = dict(self._nodes)
+            for node in self._from_report - declared.keys():
+                self._nodes.pop(node, None)
+            for node, reason in declared.items():
+                self._nodes[node] = (reason, self.buffer_hops)
+            self._from_report = set(declared)
+            self._report_stamp = stamp
+            if self._nodes == before:
+                return False
+            self._apply()
+            return True
+
+    # ---------------- Masked view ----------------
+    def view(self) -> MaskedTerrainView:
+        """Masked view of the current map; rebuilt (and the route cache cleared) when the map changes."""
+        with self._lock:
+            G = load_compact_terrain(self.graph_path)
+            if self._view is None or self._view.graph is not G:
+                self._clear_routes()
+                self._view = self._build_view(G)
+            return self._view
+
+    def _build_view(self, G: TerrainGraph) -> MaskedTerrainView:
+        blocked = np.zeros(G.number_of_nodes(), dtype=bool)
+        by_hops: Dict[int, List[int]] = defaultdict(list)
+        for node, (_, hops) in self._nodes.items():
+            if node in G:
+                by_hops[hops].append(G.index[node])
+        for hops, seeds in by_hops.items():
+            if hops > 0:
+                blocked |= G.hop_distances(seeds, hops) >= 0
+            else:
+                blocked[seeds] = True
+
+        edges = np.zeros(len(G.indices), dtype=bool)
+        for u, v in self._edges:
+            if u not in G or v not in G:
+                continue
+            a, b = G.index[u], G.index[v]
+            for x, y in ((a, b), (b, a)) if not G.directed else ((a, b),):
+                k = G.edge_position(x, y)
+                if k >= 0:
+                    edges[k] = True
+        no_entry = None
+        if self.terrain is not None:
+            allowed = [c for c, name in enumerate(G.terrain_categories) if name.lower() in self.terrain or name == UNKNOWN_TERRAIN]
+            no_entry = ~np.isin(G.terrain_codes, allowed)
+        return MaskedTerrainView(G, blocked, edges, self._version, no_entry)
+
+    def _apply(self):
+        """Rebuild the mask after a hazard change and invalidate the routes it affects."""
+        self._version += 1
+        old = self._view
+        if old is None:
+            return  # built lazily on first use
+        G = load_compact_terrain(self.graph_path)
+        new = self._build_view(G)
+        self._view = new
+        if old.graph is not G:
+            self._clear_routes()
+            return
+
+        closed_nodes = np.flatnonzero(new.blocked_nodes & ~old.blocked_nodes)
+        closed_edges = np.flatnonzero(new.blocked_edges & ~old.blocked_edges)
+        self._drop_through(G, closed_nodes, closed_edges)
+
+        opened_edges = np.flatnonzero(old.blocked_edges & ~new.blocked_edges)
+        reopened = np.union1d(
+            np.flatnonzero(old.blocked_nodes & ~new.blocked_nodes),
+            np.concatenate([G.edge_source(opened_edges), G.indices[opened_edges]]),
+        )
+        self._drop_improvable(new, reopened)
+
+    def _drop_through(self, G: TerrainGraph, nodes: np.ndarray, edges: np.ndarray):
+        for u in nodes.tolist():
+            for key in list(self._by_node.get(u, ())):
+                self._drop(key)
+        if not len(edges):
+            return
+        for u, v in zip(G.edge_source(edges).tolist(), G.indices[edges].tolist()):
+            for key in list(self._by_node.get(u, ())):
+                path = self._routes[key][1]
+                hops = set(zip(path, path[1:]))
+                if (u, v) in hops or (not G.directed and (v, u) in hops):
+                    self._drop(key)
+
+    def _drop_improvable(self, view: MaskedTerrainView, reopened: np.ndarray):
+        if not len(reopened) or not self._routes:
+            return
+        for weight in {key[0] for key in self._routes}:
+            from_open, _ = view.dijkstra(reopened, weight, min_only=True)
+            to_open = view.dijkstra(reopened, weight, min_only=True, reverse=True)[0] if view.directed else from_open
+            for key, (distance, _) in list(self._routes.items()):
+                if key[0] == weight and to_open[key[1]] + from_open[key[2]] < distance - 1e-9:
+                    self._drop(key)
+
+    # ---------------- Route cache ----------------
+    def _store(self, key: RouteKey, distance: float, path: Sequence[int]):
+        self._routes[key] = (distance, tuple(path))
+        self._routes.move_to_end(key)
+        for node in path:
+            self._by_node[node].add(key)
+        while len(self._routes) > self.max_routes:
+            oldest = next(iter(self._routes))
+            self._drop(oldest, evicted=True)
+
+    def _drop(self, key: RouteKey, evicted: bool = False):
+        _, path = self._routes.pop(key)
+        for node in path:
+            keys = self._by_node.get(node)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_node[node]
+        if not evicted:
+            self.invalidated += 1
+
+    def _clear_routes(self):
+        self._routes.clear()
+        self._by_node.clear()
+
+    def _lookup(self, key: RouteKey) -> Optional[Tuple[float, Tuple[int, ...]]]:
+        found = self._routes.get(key)
+        if found is not None:
+            self._routes.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def _check_open(self, view: MaskedTerrainView, node_id: str, enter: bool = False):
+        if node_id not in view:
+            raise nx.NodeNotFound(f"Node {node_id} does not exist.")
+        if view.is_blocked(node_id):
+            reason = self._nodes.get(node_id, ("within a hazard safety buffer", 0))[0]
+            raise HazardBlockedError(f"{node_id} is inside a hazard zone ({reason or 'no-go'}).")
+        if enter and not view.can_enter(node_id):
+            terrain = view.graph.terrain(view.graph.index[node_id])
+            raise HazardBlockedError(f"{node_id} is {terrain} terrain, which this rover cannot drive.")
+
+    # ---------------- Routing ----------------
+    def route(self, source: str, target: str, weight: str = "length") -> Tuple[float, List[str]]:
+        """
+        (distance, path) avoiding every hazard.
+
+        Raises ``HazardBlockedError`` if an endpoint is blocked and
+        ``nx.NetworkXNoPath`` if the hazards cut the target off.
+        """
+        with self._lock:
+            view = self.view()
+            G = view.graph
+            self._check_open(view, source)
+            self._check_open(view, target, enter=source != target)
+            key = (weight, G.index[source], G.index[target])
+            found = self._lookup(key)
+            if found is None:
+                # The unmasked optimum (oracle / CH / Dijkstra) stands if it avoids every hazard
+                distance, path = get_routing_engine(self.graph_path, weight).route(source, target)
+                path = [G.index[n] for n in path]
+                if not view.path_is_open(path):
+                    dist, pred = view.dijkstra(key[1], weight)
+                    path = G.path_from(pred, key[1], key[2])
+                    if path is None:
+                        raise nx.NetworkXNoPath(f"Hazards cut off every path between {source} and {target}.")
+                    distance = float(dist[key[2]])
+                self._store(key, float(distance), path)
+                found = self._routes[key]
+            return found[0], G.ids(found[1])
+
+    def one_to_many(
+        self,
+        source: str,
+        targets: Iterable[str],
+        weight: str = "length",
+        accumulate: Sequence[str] = (),
+    ) -> Dict[str, Route]:
+        """
+        Hazard-avoiding routes from ``source`` to each target (see ``RoutingEngine.one_to_many``).
+
+        Cached routes are reused; one masked Dijkstra covers the rest. Blocked
+        or unreachable targets are left out.
+        """
+        with self._lock:
+            view = self.view()
+            G = view.graph
+            self._check_open(view, source)
+            s = G.index[source]
+            targets = [t for t in dict.fromkeys(targets) if t in G and (t == source or view.can_enter(t))]
+
+            found = {t: self._lookup((weight, s, G.index[t])) for t in targets}
+            missing = [t for t, hit in found.items() if hit is None]
+            if missing:
+                dist, pred = view.dijkstra(s, weight)
+                for t in missing:
+                    path = G.path_from(pred, s, G.index[t])
+                    if path is not None:
+                        self._store((weight, s, G.index[t]), float(dist[G.index[t]]), path)
+                        found[t] = self._routes[(weight, s, G.index[t])]
+
+            routes = {}
+            for t, hit in found.items():
+                if hit is None:
+                    continue
+                distance, path = hit
+                totals = {attr: G.path_total(path, attr) for attr in accumulate}
+                routes[t] = Route(distance, G.ids(path), totals)
+            return routes
+
+    def many_to_many(
+        self,
+        sources: Iterable[str],
+        targets: Iterable[str],
+        weight: str = "length",
+        accumulate: Sequence[str] = (),
+    ) -> Dict[str, Dict[str, Route]]:
+        """``one_to_many`` per distinct source; sources inside a hazard zone get no routes."""
+        targets = list(targets)
+        results: Dict[str, Dict[str, Route]] = {}
+        for source in sources:
+            if source in results:
+                continue
+            try:
+                results[source] = self.one_to_many(source, targets, weight, accumulate)
+            except HazardBlockedError:
+                results[source] = {}
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            blocked = int(self._view.blocked_nodes.sum()) if self._view is not None else None
+            return {
+                "version": self._version,
+                "hazard_nodes": len(self._nodes),
+                "hazard_edges": len(self._edges),
+                "blocked_nodes": blocked,
+                "cached_routes": len(self._routes),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidated": self.invalidated,
+            }
+
+
+_registries: Dict[Tuple[str, str, TerrainSignature], HazardRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def hazard_version(graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH) -> int:
+    """
+    Sum of the mask versions of every registry of ``graph_path``. It grows
+    with every hazard change on the map, so results computed on the masks
+    (e.g. memoized tool results) can be keyed by it.
+    """
+    path = str(Path(graph_path).resolve())
+    with _registries_lock:
+        return sum(registry.version for key, registry in _registries.items() if key[0] == path)
+
+
+def get_hazard_registry(
+    graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+    report_path: Union[str, Path] = DEFAULT_MISSION_REPORT_PATH,
+    terrain: TerrainSignature = None,
+) -> HazardRegistry:
+    """
+    Shared registry per (map, mission report, terrain signature), synced with
+    the report on every call. Rovers with the same compatibility set share one.
+    """
+    key = (str(Path(graph_path).resolve()), str(Path(report_path).resolve()), terrain)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = HazardRegistry(graph_path, terrain=terrain)
+    registry.load_report(report_path)
+    return registry
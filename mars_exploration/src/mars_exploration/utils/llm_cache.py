@@ -0,0 +1,397 @@
+# src/mars_exploration/utils/llm_cache.py
+"""
+Disk-backed, content-addressed cache of LLM completions.
+
+``CachedLLM`` is a drop-in ``crewai.LLM``: each text completion is stored
+under the SHA-256 of everything that determines it (model, full message
+list, tool schemas and sampling parameters), so re-running the flow on
+unchanged inputs answers from disk instead of Ollama.
+
+* Entries are evicted least-recently-used first once the cache exceeds its
+  size budget, and expire after a maximum age.
+* Identical requests issued concurrently (e.g. by the parallel crew
+  branches) are coalesced: one goes to the backend, the others wait for it.
+* Each crew can have the cache ``on``, ``off`` or ``read-only`` (serve hits,
+  never write), via ``MARS_LLM_CACHE``: a single mode (``"on"``) or per crew
+  (``"on,rover=off,integration=read-only"``).
+
+Hit rates and the backend time saved are kept per crew; ``cache_report()``
+summarises them for the run. When LLM cassettes are recording or replaying
+(``utils/llm_cassette.py``) the cache is bypassed. Requests that do reach
+the backend go through the gateway (``utils/llm_gateway.py``).
+"""
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from crewai import LLM
+from crewai.events.event_bus import crewai_event_bus
+from crewai.events.types.llm_events import LLMCallStartedEvent, LLMCallType
+
+from mars_exploration.utils.llm_cassette import get_cassette_deck
+from mars_exploration.utils.llm_gateway import get_gateway, model_for
+
+CACHE_MODES = ("on", "off", "read-only")
+DEFAULT_CACHE_DIR = Path(".llm_cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600.0
+
+# Set while a completion served locally ("cache" or "cassette") is reported on the event bus
+served_from: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("mars_llm_served_from", default=None)
+
+# LLM attributes that change the completion, besides model and messages
+_SAMPLING_PARAMS = (
+    "temperature", "top_p", "n", "stop", "max_tokens", "max_completion_tokens",
+    "presence_penalty", "frequency_penalty", "logit_bias", "seed", "logprobs",
+    "top_logprobs", "reasoning_effort", "base_url", "api_base", "api_version",
+    "additional_params",
+)
+
+
+def request_key(model: str, messages: Any, tools: Any = None, params: Optional[dict] = None) -> str:
+    """SHA-256 of the canonical JSON of a completion request."""
+    payload = {"model": model, "messages": messages, "tools": tools or None, "params": params or {}}
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """Counters of one crew (or of the whole run)."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_seconds = 0.0
+        self.backend_seconds = 0.0
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.misses + self.coalesced
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.hits + self.coalesced) / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hit_rate, 3),
+            "saved_seconds": round(self.saved_seconds, 2),
+            "backend_seconds": round(self.backend_seconds, 2),
+        }
+
+
+class ResponseCache:
+    """
+    One JSON file per completion under ``directory/<key[:2]>/<key>.json``.
+
+    A file's mtime is its last use, so the LRU order survives restarts; the
+    in-memory index of sizes and last uses is rebuilt from a directory scan
+    on first access.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path] = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Tuple[int, float]]] = None
+        self._bytes = 0
+        self._inflight: Dict[str, Future] = {}
+        self._stats: Dict[str, CacheStats] = {}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        self._index, self._bytes = {}, 0
+        if not self.directory.is_dir():
+            return
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            self._index[path.stem] = (st.st_size, st.st_mtime)
+            self._bytes += st.st_size
+
+    def _forget(self, key: str):
+        size, _ = self._index.pop(key, (0, 0.0))
+        self._bytes -= size
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str) -> Optional[dict]:
+        """Stored entry, or None when missing or expired."""
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                return None
+            now = time.time()
+            if now - self._index[key][1] > self.max_age:
+                self._forget(key)
+                return None
+            try:
+                entry = json.loads(self._path(key).read_text(encoding="utf-8"))
+                os.utime(self._path(key), (now, now))
+            except (FileNotFoundError, ValueError):
+                self._forget(key)
+                return None
+            self._index[key] = (self._index[key][0], now)
+            return entry
+
+    def put(self, key: str, entry: dict):
+        """Store ``entry`` and evict expired, then least recently used, entries over budget."""
+        blob = json.dumps(entry, ensure_ascii=False, default=str).encode("utf-8")
+        path = self._path(key)
+        with self._lock:
+            self._load_index()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(blob)
+            os.replace(tmp, path)
+            if key in self._index:
+                self._bytes -= self._index[key][0]
+            now = time.time()
+            self._index[key] = (len(blob), now)
+            self._bytes += len(blob)
+
+            expired = [k for k, (_, used) in self._index.items() if now - used > self.max_age]
+            for k in expired:
+                self._forget(k)
+            if self._bytes > self.max_bytes:
+                for k, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+                    if self._bytes <= self.max_bytes or k == key:
+                        break
+                    self._forget(k)
+
+    def stats(self, crew: str = "") -> CacheStats:
+        with self._lock:
+            return self._stats.setdefault(crew, CacheStats())
+
+    def fetch(self, key: str, compute: Callable[[], Tuple[Any, bool]], crew: str = "", write: bool = True) -> Any:
+        """
+        Cached value for ``key``, or ``compute()``'s, coalescing concurrent
+        callers of the same key. ``compute`` returns ``(value, cacheable)``.
+        """
+        stats = self.stats(crew)
+        entry = self.get(key)
+        if entry is not None:
+            with self._lock:
+                stats.hits += 1
+                stats.saved_seconds += entry.get("latency", 0.0)
+            return entry["response"]
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            value, latency = pending.result()
+            with self._lock:
+                stats.coalesced += 1
+                stats.saved_seconds += latency
+            return value
+
+        try:
+            # Another caller may have stored it between the lookup and the registration
+            entry = self.get(key)
+            if entry is not None:
+                with self._lock:
+                    stats.hits += 1
+                    stats.saved_seconds += entry.get("latency", 0.0)
+                pending.set_result((entry["response"], entry.get("latency", 0.0)))
+                return entry["response"]
+
+            began = time.perf_counter()
+            value, cacheable = compute()
+            latency = time.perf_counter() - began
+            with self._lock:
+                stats.misses += 1
+                stats.backend_seconds += latency
+            if cacheable and write:
+                self.put(key, {"response": value, "latency": latency, "created": time.time()})
+            pending.set_result((value, latency))
+            return value
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def report(self) -> str:
+        with self._lock:
+            crews = {name: s for name, s in self._stats.items() if s.requests}
+        if not crews:
+            return "LLM cache: no requests"
+        total = CacheStats()
+        lines = []
+        for name, s in sorted(crews.items()):
+            for field in ("hits", "misses", "coalesced", "saved_seconds", "backend_seconds"):
+                setattr(total, field, getattr(total, field) + getattr(s, field))
+            lines.append(
+                f"  {name or 'default'}: {s.requests} requests, {s.hit_rate:.0%} hits "
+                f"({s.coalesced} coalesced), {s.saved_seconds:.1f}s saved"
+            )
+        lines.insert(
+            0,
+            f"LLM cache: {total.requests} requests, {total.hit_rate:.0%} hits, "
+            f"{total.saved_seconds:.1f}s of backend time saved ({total.backend_seconds:.1f}s spent)",
+        )
+        return "\n".join(lines)
+
+
+def crew_cache_mode(crew: str, setting: Optional[str] = None) -> str:
+    """Mode of ``crew`` from a ``MARS_LLM_CACHE``-style setting (default ``on``)."""
+    setting = os.environ.get("MARS_LLM_CACHE", "on") if setting is None else setting
+    mode = "on"
+    for part in setting.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        name, _, value = part.rpartition("=")
+        if name and name != crew:
+            continue
+        if value not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode {value!r}; expected one of {', '.join(CACHE_MODES)}")
+        mode = value
+        if name:
+            break
+    return mode
+
+
+_shared: Optional[ResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide cache, configured from ``MARS_LLM_CACHE_DIR``/``_MAX_MB``/``_MAX_AGE_DAYS``."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ResponseCache(
+                os.environ.get("MARS_LLM_CACHE_DIR", DEFAULT_CACHE_DIR),
+                int(float(os.environ.get("MARS_LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2**20)) * 2**20),
+                float(os.environ.get("MARS_LLM_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE / 86400)) * 86400,
+            )
+        return _shared
+
+
+def cache_report() -> str:
+    return get_response_cache().report()
+
+
+class CachedLLM(LLM):
+    """``crewai.LLM`` answering repeated text completions from the response cache."""
+
+    def __init__(self, model: str, crew: str = "", cache_mode: Optional[str] = None, cache: Optional[ResponseCache] = None, **kwargs):
+        super().__init__(model=model, **kwargs)
+        self.crew = crew
+        self.cache_mode = cache_mode or crew_cache_mode(crew)
+        if self.cache_mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode {self.cache_mode!r}")
+        self.cache = cache
+
+    def _request_params(self) -> dict:
+        params = {name: getattr(self, name, None) for name in _SAMPLING_PARAMS}
+        response_format = getattr(self, "response_format", None)
+        if response_format is not None:
+            schema = getattr(response_format, "model_json_schema", None)
+            params["response_format"] = schema() if schema else str(response_format)
+        return params
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+    ):
+        canonical = [{"role": "user", "content": messages}] if isinstance(messages, str) else messages
+        key = request_key(self.model, canonical, tools, self._request_params())
+        deck = get_cassette_deck()
+        if deck.mode == "replay":
+            result = deck.replay(self.crew, from_task, key)
+            self._emit_served("cassette", result, messages, tools, callbacks, available_functions, from_task, from_agent, canonical)
+            return result
+        if deck.mode == "record":
+            began = time.perf_counter()
+            result = self._backend_call(messages, tools, callbacks, available_functions, from_task, from_agent)
+            if isinstance(result, str):
+                deck.record(self.crew, from_task, key, self.model, canonical, result, time.perf_counter() - began, from_agent)
+            return result
+        if self.cache_mode == "off":
+            return self._backend_call(messages, tools, callbacks, available_functions, from_task, from_agent)
+
+        cache = self.cache or get_response_cache()
+        backend_called = False
+
+        def compute():
+            nonlocal backend_called
+            backend_called = True
+            result = self._backend_call(messages, tools, callbacks, available_functions, from_task, from_agent)
+            # Tool-call results depend on the tools' side effects: only plain text is stored
+            return result, isinstance(result, str)
+
+        result = cache.fetch(key, compute, crew=self.crew, write=self.cache_mode == "on")
+        if not backend_called:
+            self._emit_served("cache", result, messages, tools, callbacks, available_functions, from_task, from_agent, canonical)
+        return result
+
+    def _backend_call(self, messages, tools, callbacks, available_functions, from_task, from_agent):
+        """Completion from the backend, once the gateway grants a slot for the model."""
+        with get_gateway().slot(self.model, self.crew, from_task):
+            return super().call(messages, tools, callbacks, available_functions, from_task, from_agent)
+
+    def _prepare_completion_params(self, messages, tools=None):
+        params = super()._prepare_completion_params(messages, tools)
+        client = get_gateway().http_client(self.model)
+        if client is not None:
+            params["client"] = client
+        return params
+
+    def _emit_served(self, source, result, messages, tools, callbacks, available_functions, from_task, from_agent, canonical):
+        """Keep listeners of the event bus (token counters, tracing) informed of completions served locally."""
+        token = served_from.set(source)
+        try:
+            crewai_event_bus.emit(
+                self,
+                event=LLMCallStartedEvent(
+                    messages=messages, tools=tools, callbacks=callbacks,
+                    available_functions=available_functions, from_task=from_task,
+                    from_agent=from_agent, model=self.model,
+                ),
+            )
+            self._handle_emit_call_events(result, LLMCallType.LLM_CALL, from_task, from_agent, canonical)
+        finally:
+            served_from.reset(token)
+
+
+def crew_llm(model: Optional[str] = None, crew: str = "", **kwargs) -> LLM:
+    """LLM for the agents of ``crew`` (model from ``llm_gateway.model_for``), behind the cache, cassettes and gateway."""
+    return CachedLLM(model or model_for(crew), crew=crew, **kwargs)
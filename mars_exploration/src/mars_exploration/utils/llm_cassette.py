@@ -0,0 +1,205 @@
+# src/mars_exploration/utils/llm_cassette.py
+"""
+Record/replay of LLM traffic, so the flow can run without Ollama.
+
+With ``MARS_LLM_CASSETTE=record`` every completion requested through
+``crew_llm`` goes to the backend and is appended to a cassette, one JSONL
+file per crew and task: ``<MARS_LLM_CASSETTE_DIR>/<crew>/<task>.jsonl``
+(default directory ``cassettes/``). With ``MARS_LLM_CASSETTE=replay`` the
+same requests are answered from those files and nothing reaches the
+backend; a request missing from the cassette raises ``CassetteMiss``.
+
+Replay matches a request by its key (``llm_cache.request_key``). When the
+key is not found, e.g. because a prompt drifted, the cassette's next
+unplayed interaction is served instead and counted as unmatched in the
+report. Replay latency comes from ``MARS_LLM_REPLAY_LATENCY``:
+
+* ``recorded`` (default): sleep as long as the backend took when recording;
+* ``none``: answer immediately;
+* ``x<factor>``: the recorded latency scaled, e.g. ``x0.1``;
+* a number: that many seconds per completion.
+
+The response cache is bypassed in both modes, so recordings are complete
+and replays do not depend on what the cache holds.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Union
+
+CASSETTE_MODES = ("off", "record", "replay")
+DEFAULT_CASSETTE_DIR = Path("cassettes")
+
+_SLUG = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class CassetteMiss(LookupError):
+    """Replay found nothing to serve for a request."""
+
+
+def task_label(task: Any) -> str:
+    """File-safe name of a crewAI task: its name, or the start of its description."""
+    if task is None:
+        return "_no_task"
+    label = getattr(task, "name", None) or " ".join(str(getattr(task, "description", "") or "").split()[:6])
+    return _SLUG.sub("_", label).strip("_")[:64] or "_task"
+
+
+def replay_delay(latency: float, setting: str) -> float:
+    """Seconds to wait before serving a completion recorded with ``latency`` (see module docstring)."""
+    setting = setting.strip().lower()
+    if setting in ("", "recorded"):
+        return max(latency, 0.0)
+    if setting in ("none", "0"):
+        return 0.0
+    if setting.startswith("x"):
+        return max(latency, 0.0) * float(setting[1:])
+    return max(float(setting), 0.0)
+
+
+class Cassette:
+    """Interactions of one crew and task, in recording order."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.interactions: List[dict] = []
+        self._by_key: Dict[str, Deque[int]] = {}
+        self._played: List[bool] = []
+        self._cursor = 0
+
+    def load(self):
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                self.interactions = [json.loads(line) for line in f if line.strip()]
+        self._played = [False] * len(self.interactions)
+        for i, item in enumerate(self.interactions):
+            self._by_key.setdefault(item["key"], deque()).append(i)
+
+    def take(self, key: str) -> Optional[tuple]:
+        """``(interaction, matched)`` for ``key``, or None once the cassette is exhausted."""
+        indices = self._by_key.get(key)
+        if indices:
+            # Repeats of a request are served in recording order; the last one stays for later repeats
+            i = indices.popleft() if len(indices) > 1 else indices[0]
+            self._played[i] = True
+            return self.interactions[i], True
+        while self._cursor < len(self.interactions) and self._played[self._cursor]:
+            self._cursor += 1
+        if self._cursor == len(self.interactions):
+            return None
+        self._played[self._cursor] = True
+        return self.interactions[self._cursor], False
+
+
+class CassetteDeck:
+    """All cassettes of a run in one mode; thread-safe (the crew branches run in parallel)."""
+
+    def __init__(
+        self,
+        mode: str = "off",
+        directory: Union[str, Path] = DEFAULT_CASSETTE_DIR,
+        latency: str = "recorded",
+    ):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown LLM cassette mode {mode!r}; expected one of {', '.join(CASSETTE_MODES)}")
+        self.mode = mode
+        self.directory = Path(directory)
+        self.latency = latency
+        self._cassettes: Dict[tuple, Cassette] = {}
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.served = 0
+        self.unmatched = 0
+        self.replayed_seconds = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.mode != "off"
+
+    def _cassette(self, crew: str, task: str) -> Cassette:
+        """Cassette of ``(crew, task)``; a recording starts its file afresh on first use."""
+        key = (crew or "default", task)
+        cassette = self._cassettes.get(key)
+        if cassette is None:
+            cassette = Cassette(self.directory / key[0] / f"{task}.jsonl")
+            if self.mode == "record":
+                cassette.path.parent.mkdir(parents=True, exist_ok=True)
+                cassette.path.write_text("", encoding="utf-8")
+            else:
+                cassette.load()
+            self._cassettes[key] = cassette
+        return cassette
+
+    def record(self, crew: str, task: Any, key: str, model: str, messages: Any, response: str, latency: float, agent: Any = None):
+        """Append one completion to the cassette of ``crew`` and ``task``."""
+        label = task_label(task)
+        with self._lock:
+            cassette = self._cassette(crew, label)
+            item = {
+                "index": len(cassette.interactions),
+                "key": key,
+                "model": model,
+                "agent": getattr(agent, "role", None),
+                "messages": messages,
+                "response": response,
+                "latency": round(latency, 4),
+            }
+            cassette.interactions.append(item)
+            with open(cassette.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+            self.recorded += 1
+
+    def replay(self, crew: str, task: Any, key: str) -> str:
+        """Recorded response for the request, after the configured replay delay."""
+        label = task_label(task)
+        with self._lock:
+            cassette = self._cassette(crew, label)
+            found = cassette.take(key)
+            if found is None:
+                raise CassetteMiss(
+                    f"No recorded LLM response left for crew {crew or 'default'!r}, task {label!r} "
+                    f"in {cassette.path}; record it again with MARS_LLM_CASSETTE=record"
+                )
+            item, matched = found
+            delay = replay_delay(item.get("latency", 0.0), self.latency)
+            self.served += 1
+            self.unmatched += not matched
+            self.replayed_seconds += delay
+        if delay:
+            time.sleep(delay)
+        return item["response"]
+
+    def report(self) -> str:
+        if self.mode == "record":
+            return f"LLM cassettes: {self.recorded} completions recorded in {self.directory}/ ({len(self._cassettes)} cassettes)"
+        if self.mode == "replay":
+            return (
+                f"LLM cassettes: {self.served} completions replayed from {self.directory}/, "
+                f"{self.unmatched} unmatched, {self.replayed_seconds:.1f}s of latency"
+            )
+        return "LLM cassettes: off"
+
+
+_deck: Optional[CassetteDeck] = None
+_deck_lock = threading.Lock()
+
+
+def get_cassette_deck() -> CassetteDeck:
+    """Process-wide deck, configured from ``MARS_LLM_CASSETTE``/``_DIR`` and ``MARS_LLM_REPLAY_LATENCY``."""
+    global _deck
+    with _deck_lock:
+        if _deck is None:
+            _deck = CassetteDeck(
+                os.environ.get("MARS_LLM_CASSETTE", "off").strip().lower() or "off",
+                os.environ.get("MARS_LLM_CASSETTE_DIR", DEFAULT_CASSETTE_DIR),
+                os.environ.get("MARS_LLM_REPLAY_LATENCY", "recorded"),
+            )
+        return _deck
+
+
+def cassette_report() -> str:
+    return get_cassette_deck().report()
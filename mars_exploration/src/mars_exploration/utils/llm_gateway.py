@@ -0,0 +1,286 @@
+# src/mars_exploration/utils/llm_gateway.py
+"""
+In-process gateway in front of the local inference server.
+
+Every crew gets its LLM from ``crew_llm`` and every completion that reaches
+the backend (not answered by the response cache or a cassette) goes
+through the process-wide ``LLMGateway``:
+
+* **Models per crew** come from one registry, ``CREW_MODELS``, instead of
+  being hard-coded in each crew; ``MARS_LLM_MODEL`` overrides it, globally
+  or per crew (``"integration=ollama/qwen3:4b"``).
+* **Concurrency** is limited per backend model (``MARS_LLM_CONCURRENCY``,
+  default 2; per model ``"2,ollama/qwen3:8b=1"``). This replaces the
+  ``max_rpm`` throttle the integration crew used to apply to itself only.
+* **Priority**: callers waiting for a model are served by priority, then
+  in arrival order. A task's priority is the number of tasks its crew still
+  has to run, including itself: with the rover, drone and satellite crews
+  running side by side, the crew with the longest remaining chain is the
+  one holding back the integration stage. ``MARS_LLM_PRIORITY`` adds a
+  per-crew offset (``"rover=3"``).
+* **Connections**: Ollama requests share one pooled HTTP client with
+  keep-alive connections instead of litellm's default per-call handling.
+* **Warm models**: ``warm_crews`` asks Ollama, in the background, to load
+  the models of the crews about to run and keep them resident for
+  ``MARS_LLM_KEEP_ALIVE`` (default ``30m``); ``MARS_LLM_PRELOAD=off``
+  disables it, and it is skipped while replaying cassettes.
+
+Queue waits are kept per model and per crew (``gateway_report()``) and the
+wait of each completion is attached to its LLM span when tracing.
+"""
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+from mars_exploration.utils.llm_cassette import get_cassette_deck
+
+CREW_MODELS = {
+    "mission": "ollama/qwen3:4b",
+    "rover": "ollama/qwen3:4b",
+    "drone": "ollama/qwen3:4b",
+    "satellite": "ollama/qwen3:4b",
+    "integration": "ollama/qwen3:8b",
+}
+DEFAULT_MODEL = "ollama/qwen3:4b"
+DEFAULT_CONCURRENCY = 2
+DEFAULT_KEEP_ALIVE = "30m"
+DEFAULT_OLLAMA_BASE = "http://localhost:11434"
+
+# Providers whose litellm handler accepts a shared ``HTTPHandler`` as ``client``
+_POOLED_PROVIDERS = ("ollama", "ollama_chat")
+
+# Seconds the current completion waited for a backend slot (read by the tracer)
+queue_wait: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("mars_llm_queue_wait", default=None)
+
+
+def keyed_setting(setting: Optional[str], key: str, default: str) -> str:
+    """Value for ``key`` in a ``"<default>,<key>=<value>,..."`` setting."""
+    value = default
+    for part in (setting or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, item = part.rpartition("=")
+        if not sep:
+            value = part
+        elif name.strip() == key:
+            return item.strip()
+    return value
+
+
+def model_for(crew: str, default: Optional[str] = None) -> str:
+    """Model of ``crew``: ``MARS_LLM_MODEL`` first, then ``CREW_MODELS``."""
+    return keyed_setting(os.environ.get("MARS_LLM_MODEL"), crew, default or CREW_MODELS.get(crew, DEFAULT_MODEL))
+
+
+def task_priority(task: Any, crew: str = "") -> int:
+    """Tasks left in ``task``'s crew, itself included, plus the ``MARS_LLM_PRIORITY`` offset of ``crew``."""
+    offset = int(keyed_setting(os.environ.get("MARS_LLM_PRIORITY"), crew, "0"))
+    owner = getattr(getattr(task, "agent", None), "crew", None)
+    tasks = list(getattr(owner, "tasks", None) or ())
+    if task is None or task not in tasks:
+        return offset
+    return len(tasks) - tasks.index(task) + offset
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class WaitStats:
+    """Queue waits of one model or crew."""
+
+    def __init__(self):
+        self.waits: List[float] = []
+
+    def add(self, wait: float):
+        self.waits.append(wait)
+
+    @property
+    def calls(self) -> int:
+        return len(self.waits)
+
+    def summary(self) -> str:
+        total = sum(self.waits)
+        return (
+            f"{self.calls} calls, waited {total:.1f}s "
+            f"(p95 {_percentile(self.waits, 0.95):.2f}s, max {max(self.waits, default=0.0):.2f}s)"
+        )
+
+
+class ModelLane:
+    """At most ``limit`` completions in flight for one model; waiters leave by priority, then FIFO."""
+
+    def __init__(self, model: str, limit: int):
+        self.model = model
+        self.limit = max(1, limit)
+        self.active = 0
+        self.peak_active = 0
+        self.peak_queued = 0
+        self.stats = WaitStats()
+        self._cond = threading.Condition()
+        self._waiting: List[tuple] = []
+        self._seq = itertools.count()
+
+    @contextmanager
+    def slot(self, priority: int = 0):
+        """Hold one of the lane's slots; yields the seconds spent waiting for it."""
+        began = time.perf_counter()
+        with self._cond:
+            ticket = (-priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            self.peak_queued = max(self.peak_queued, len(self._waiting) - (self.limit - self.active))
+            while self.active >= self.limit or self._waiting[0] != ticket:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            wait = time.perf_counter() - began
+            self.stats.add(wait)
+            # A free slot may be left for the next waiter
+            self._cond.notify_all()
+        try:
+            yield wait
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._cond.notify_all()
+
+
+class LLMGateway:
+    """Process-wide lanes, HTTP pool, preloads and queue metrics (see module docstring)."""
+
+    def __init__(self, concurrency: Optional[str] = None, keep_alive: Optional[str] = None, preload: bool = True):
+        self.concurrency = concurrency if concurrency is not None else str(DEFAULT_CONCURRENCY)
+        self.keep_alive = keep_alive or DEFAULT_KEEP_ALIVE
+        self.preload_enabled = preload
+        self._lanes: Dict[str, ModelLane] = {}
+        self._crews: Dict[str, WaitStats] = {}
+        self._warmed: Dict[str, float] = {}
+        self._preloads: Dict[str, Optional[float]] = {}
+        self._lock = threading.Lock()
+        self._http = None
+
+    def lane(self, model: str) -> ModelLane:
+        with self._lock:
+            lane = self._lanes.get(model)
+            if lane is None:
+                limit = int(keyed_setting(self.concurrency, model, str(DEFAULT_CONCURRENCY)))
+                lane = self._lanes[model] = ModelLane(model, limit)
+            return lane
+
+    @contextmanager
+    def slot(self, model: str, crew: str = "", task: Any = None):
+        """Backend slot for one completion of ``model``, requested by ``task`` of ``crew``."""
+        with self.lane(model).slot(task_priority(task, crew)) as wait:
+            with self._lock:
+                self._crews.setdefault(crew, WaitStats()).add(wait)
+            token = queue_wait.set(round(wait, 4))
+            try:
+                yield wait
+            finally:
+                queue_wait.reset(token)
+
+    def http_client(self, model: str):
+        """Shared litellm ``HTTPHandler`` for ``model``'s provider, or None if it cannot take one."""
+        if model.split("/", 1)[0] not in _POOLED_PROVIDERS:
+            return None
+        with self._lock:
+            if self._http is None:
+                from litellm.llms.custom_httpx.http_handler import HTTPHandler
+
+                client = httpx.Client(
+                    timeout=httpx.Timeout(600.0, connect=5.0),
+                    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=300.0),
+                )
+                self._http = HTTPHandler(client=client)
+            return self._http
+
+    def warm(self, models: Iterable[str]):
+        """Load ``models`` on the backend in the background and keep them resident."""
+        if not self.preload_enabled or get_cassette_deck().mode == "replay":
+            return
+        now = time.time()
+        for model in sorted(set(models)):
+            if model.split("/", 1)[0] not in _POOLED_PROVIDERS:
+                continue
+            with self._lock:
+                # Each preload keeps the model for ``keep_alive``: no need to repeat it right away
+                if now - self._warmed.get(model, 0.0) < 60.0:
+                    continue
+                self._warmed[model] = now
+            threading.Thread(target=self._preload, args=(model,), name=f"warm {model}", daemon=True).start()
+
+    def _preload(self, model: str):
+        base = os.environ.get("OLLAMA_API_BASE", DEFAULT_OLLAMA_BASE).rstrip("/")
+        began = time.perf_counter()
+        try:
+            # A generate request without a prompt only loads the model
+            self.http_client(model).client.post(
+                f"{base}/api/generate",
+                json={"model": model.split("/", 1)[1], "keep_alive": self.keep_alive},
+            ).raise_for_status()
+            elapsed = time.perf_counter() - began
+        except Exception as e:
+            print(f"⚠️ Could not preload {model}: {e}")
+            elapsed = None
+        with self._lock:
+            self._preloads[model] = elapsed
+
+    def report(self) -> str:
+        with self._lock:
+            lanes = [lane for lane in self._lanes.values() if lane.stats.calls]
+            crews = {name: s for name, s in self._crews.items() if s.calls}
+            preloads = dict(self._preloads)
+        if not lanes and not preloads:
+            return "LLM gateway: no backend calls"
+        total = WaitStats()
+        for lane in lanes:
+            total.waits += lane.stats.waits
+        lines = [f"LLM gateway: {total.summary()}"]
+        for lane in sorted(lanes, key=lambda l: l.model):
+            lines.append(
+                f"  {lane.model} (limit {lane.limit}): {lane.stats.summary()}, "
+                f"peak {lane.peak_active} in flight, {lane.peak_queued} queued"
+            )
+        for name, s in sorted(crews.items()):
+            lines.append(f"  crew {name or 'default'}: {s.summary()}")
+        for model, elapsed in sorted(preloads.items()):
+            lines.append(f"  preloaded {model}: " + (f"{elapsed:.1f}s" if elapsed is not None else "failed"))
+        return "\n".join(lines)
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Process-wide gateway, configured from ``MARS_LLM_CONCURRENCY``, ``_KEEP_ALIVE`` and ``_PRELOAD``."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(
+                os.environ.get("MARS_LLM_CONCURRENCY"),
+                os.environ.get("MARS_LLM_KEEP_ALIVE"),
+                os.environ.get("MARS_LLM_PRELOAD", "on").strip().lower() not in ("0", "off", "false"),
+            )
+        return _gateway
+
+
+def warm_crews(crews: Iterable[str]):
+    """Preload the models of the crews about to run."""
+    get_gateway().warm(model_for(crew) for crew in crews)
+
+
+def gateway_report() -> str:
+    return get_gateway().report()
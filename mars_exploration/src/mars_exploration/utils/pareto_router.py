@@ -0,0 +1,178 @@
+# src/mars_exploration/utils/pareto_router.py
+"""
+Bi-objective (length, energy) routing.
+
+``ParetoRouter.front`` returns every Pareto-optimal path between two nodes:
+no other path is both shorter and cheaper in energy. It is a label-setting
+search (multi-criteria Dijkstra) with three prunings:
+
+* labels are popped in lexicographic (length, energy) order of an A* key, so a
+  new label at a node survives only if its energy beats every label already
+  settled there: dominance is a single comparison per label;
+* exact single-criterion lower bounds to the target (one reverse Dijkstra per
+  weight) discard labels that cannot beat the cheapest path found so far;
+* with an energy budget, labels that cannot reach the target within it are
+  discarded too.
+
+On maps where energy roughly tracks length a front has a handful of routes
+and a query on 10k nodes takes a few tens of milliseconds.
+
+Routing runs on the hazard-masked view (``utils/hazards.py``), optionally
+restricted to a rover's terrain signature. Edges without
+an ``energy`` attribute count their length as energy.
+"""
+import heapq
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from mars_exploration.utils.hazards import MaskedTerrainView, TerrainSignature, get_hazard_registry
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+from mars_exploration.utils.terrain_graph import run_dijkstra
+
+_EPS = 1e-9
+
+
+class ParetoRoute(NamedTuple):
+    length: float
+    energy: float
+    path: List[str]
+
+
+class ParetoRouter:
+    """Pareto routes over one masked view; per-target lower bounds are cached."""
+
+    def __init__(self, view: MaskedTerrainView):
+        self.view = view
+        G = view.graph
+        n = G.number_of_nodes()
+        energy = np.where(np.isnan(G.energy), G.length, G.energy)
+        # Reverse weight matrices for the lower bounds (closed edges at infinity)
+        self._reverse = {}
+        for name, weights in (("length", G.length), ("energy", energy)):
+            m = csr_matrix((np.where(view.closed, np.inf, weights), G.indices, G.indptr), shape=(n, n))
+            self._reverse[name] = m.T.tocsr() if view.directed else m
+        # Plain lists: the label loop reads them element by element
+        self._indptr = G.indptr.tolist()
+        self._indices = G.indices.tolist()
+        self._length = G.length.tolist()
+        self._energy = energy.tolist()
+        self._closed = view.closed.tolist()
+        self._bounds: Dict[int, Tuple[List[float], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _lower_bounds(self, t: int) -> Tuple[List[float], List[float]]:
+        """Exact remaining length and energy from every node to ``t`` (inf = cut off)."""
+        with self._lock:
+            bounds = self._bounds.get(t)
+            if bounds is None:
+                bounds = self._bounds[t] = (
+                    run_dijkstra(self._reverse["length"], t)[0].tolist(),
+                    run_dijkstra(self._reverse["energy"], t)[0].tolist(),
+                )
+            return bounds
+
+    def front(
+        self,
+        source: str,
+        target: str,
+        energy_budget: Optional[float] = None,
+        epsilon: float = 0.0,
+    ) -> List[ParetoRoute]:
+        """
+        Pareto-optimal routes from ``source`` to ``target``, shortest first.
+
+        The last entry is the least-energy route. With ``epsilon`` > 0 a longer
+        partial route is only kept if it saves more than that fraction of
+        energy over the ones already settled at its node: an approximate front
+        that stays small on maps where energy and length are unrelated. Returns an empty list when no route fits
+        ``energy_budget``; raises ``nx.NetworkXNoPath`` when the target cannot
+        be reached at all.
+        """
+        G = self.view.graph
+        s, t = G.index[source], G.index[target]
+        h_len, h_en = self._lower_bounds(t)
+        if h_len[s] == float("inf"):
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+
+        indptr, indices, lengths, energies, closed = self._indptr, self._indices, self._length, self._energy, self._closed
+        # Label i: node, length, energy, parent label
+        lab_node: List[int] = [s]
+        lab_len: List[float] = [0.0]
+        lab_en: List[float] = [0.0]
+        lab_parent: List[int] = [-1]
+        settled_energy: Dict[int, float] = {}
+        heap = [(h_len[s], h_en[s], 0)]
+        found: List[int] = []
+        # A label must be able to reach the target within this energy: the
+        # budget, then (strictly) less than the cheapest route found so far
+        cap = float("inf") if energy_budget is None else energy_budget + _EPS
+        keep = 1.0 - epsilon
+
+        while heap:
+            _, _, i = heapq.heappop(heap)
+            u, e = lab_node[i], lab_en[i]
+            if e + h_en[u] > cap or e >= settled_energy.get(u, float("inf")) * keep - _EPS:
+                continue
+            settled_energy[u] = e
+            if u == t:
+                found.append(i)
+                cap = e * keep - 2 * _EPS
+                continue
+
+            l = lab_len[i]
+            for k in range(indptr[u], indptr[u + 1]):
+                if closed[k]:
+                    continue
+                v = indices[k]
+                ne = e + energies[k]
+                if ne + h_en[v] > cap or ne >= settled_energy.get(v, float("inf")) * keep - _EPS:
+                    continue
+                nl = l + lengths[k]
+                lab_node.append(v)
+                lab_len.append(nl)
+                lab_en.append(ne)
+                lab_parent.append(i)
+                heapq.heappush(heap, (nl + h_len[v], ne + h_en[v], len(lab_node) - 1))
+
+        routes = []
+        for i in found:
+            path = []
+            j = i
+            while j >= 0:
+                path.append(lab_node[j])
+                j = lab_parent[j]
+            path.reverse()
+            routes.append(ParetoRoute(lab_len[i], lab_en[i], G.ids(path)))
+        return routes
+
+
+_routers: Dict[Tuple[str, TerrainSignature], ParetoRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_pareto_router(graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH, terrain: TerrainSignature = None) -> ParetoRouter:
+    """Shared router per terrain signature over the current hazard view (rebuilt when the view changes)."""
+    view = get_hazard_registry(graph_path, terrain=terrain).view()
+    key = (str(Path(graph_path).resolve()), terrain)
+    with _routers_lock:
+        router = _routers.get(key)
+        if router is None or router.view is not view:
+            router = _routers[key] = ParetoRouter(view)
+        return router
+
+
+def pareto_front(
+    source: str,
+    target: str,
+    graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+    energy_budget: Optional[float] = None,
+    epsilon: float = 0.0,
+    terrain: TerrainSignature = None,
+) -> List[ParetoRoute]:
+    """Pareto-optimal (length, energy) routes avoiding known hazards; see ``ParetoRouter.front``."""
+    return get_pareto_router(graph_path, terrain).front(source, target, energy_budget, epsilon)
@@ -0,0 +1,442 @@
+# src/mars_exploration/utils/routing_engine.py
+"""
+Point-to-point routing over the terrain graph.
+
+``RoutingEngine`` answers distance and path queries from the fastest backend
+available for the current map:
+
+1. a compiled all-pairs oracle (``utils/distance_oracle.py``), when present;
+2. a contraction hierarchy built with ``build_contraction_hierarchy``;
+3. plain Dijkstra over the compact CSR graph (``utils/terrain_graph.py``).
+
+A contraction hierarchy contracts nodes one at a time (least important first),
+adding shortcut edges that preserve shortest distances between the remaining
+nodes. A query is then a bidirectional Dijkstra that only follows edges towards
+higher-ranked nodes, which settles a tiny fraction of the graph.
+"""
+import argparse
+import heapq
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import networkx as nx
+import numpy as np
+
+from mars_exploration.utils.distance_oracle import get_distance_oracle
+from mars_exploration.utils.terrain_cache import (
+    DEFAULT_TERRAIN_PATH,
+    load_terrain_graph,
+    terrain_graph_hash,
+)
+from mars_exploration.utils.terrain_graph import TerrainGraph, load_compact_terrain
+
+CH_VERSION = 1
+
+# Witness searches stop after settling this many nodes. A failed search only
+# adds a redundant shortcut, never a wrong one.
+_WITNESS_SETTLE_LIMIT = 64
+
+
+def routing_dir(graph_path: Union[str, Path]) -> Path:
+    """Default location of prebuilt routing structures for a GraphML file."""
+    return Path(graph_path).with_suffix(".routing")
+
+
+class ContractionHierarchy:
+    """Upward graph of a contraction hierarchy over an undirected terrain graph."""
+
+    def __init__(self, nodes, rank, up_indptr, up_indices, up_weight, up_middle, content_hash, weight):
+        self.nodes: List[str] = list(nodes)
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(self.nodes)}
+        self.rank = np.asarray(rank, dtype=np.int32)
+        self.up_indptr = np.asarray(up_indptr, dtype=np.int64)
+        self.up_indices = np.asarray(up_indices, dtype=np.int32)
+        self.up_weight = np.asarray(up_weight, dtype=np.float64)
+        self.up_middle = np.asarray(up_middle, dtype=np.int32)
+        self.content_hash = content_hash
+        self.weight = weight
+
+        # Python-side adjacency: the query loop is pure Python, and list access
+        # is much cheaper than numpy scalar indexing there
+        self._up: List[List[Tuple[int, float, int]]] = [
+            list(zip(
+                self.up_indices[a:b].tolist(),
+                self.up_weight[a:b].tolist(),
+                self.up_middle[a:b].tolist(),
+            ))
+            for a, b in zip(self.up_indptr[:-1].tolist(), self.up_indptr[1:].tolist())
+        ]
+
+    # ---------------- Build ----------------
+    @classmethod
+    def build(cls, G: nx.Graph, weight: str = "length", content_hash: str = "") -> "ContractionHierarchy":
+        if G.is_directed():
+            raise ValueError("Contraction hierarchies are only built for undirected terrain graphs.")
+
+        nodes = [str(n) for n in G.nodes]
+        index = {n: i for i, n in enumerate(nodes)}
+        n = len(nodes)
+
+        # Remaining graph: adj[v][u] = (weight, middle node or -1)
+        adj: List[Dict[int, Tuple[float, int]]] = [dict() for _ in range(n)]
+        for u, v, w in G.edges(data=weight, default=1.0):
+            a, b = index[str(u)], index[str(v)]
+            if a == b:
+                continue
+            w = float(w)
+            if b not in adj[a] or w < adj[a][b][0]:
+                adj[a][b] = (w, -1)
+                adj[b][a] = (w, -1)
+
+        def witness_dists(source: int, skip: int, limit: float) -> Dict[int, float]:
+            dist = {source: 0.0}
+            heap = [(0.0, source)]
+            settled = 0
+            while heap and settled < _WITNESS_SETTLE_LIMIT:
+                d, x = heapq.heappop(heap)
+                if d > dist.get(x, float("inf")) or d > limit:
+                    continue
+                settled += 1
+                for y, (w, _) in adj[x].items():
+                    if y == skip:
+                        continue
+                    nd = d + w
+                    if nd < dist.get(y, float("inf")):
+                        dist[y] = nd
+                        heapq.heappush(heap, (nd, y))
+            return dist
+
+        def shortcuts_for(v: int) -> List[Tuple[int, int, float]]:
+            neigh = list(adj[v].items())
+            needed = []
+            for i, (u, (wu, _)) in enumerate(neigh):
+                later = neigh[i + 1:]
+                if not later:
+                    continue
+                limit = wu + max(wx for _, (wx, _) in later)
+                dist = witness_dists(u, v, limit)
+                for x, (wx, _) in later:
+                    via = wu + wx
+                    if dist.get(x, float("inf")) > via:
+                        needed.append((u, x, via))
+            return needed
+
+        deleted = [0] * n
+
+        def priority(v: int, needed: List[Tuple[int, int, float]]) -> int:
+            # Edge difference plus contracted-neighbour count (spreads contraction evenly)
+            return 2 * (len(needed) - len(adj[v])) + deleted[v]
+
+        heap = [(priority(v, shortcuts_for(v)), v) for v in range(n)]
+        heapq.heapify(heap)
+
+        rank = np.empty(n, dtype=np.int32)
+        up: List[List[Tuple[int, float, int]]] = [[] for _ in range(n)]
+        contracted = [False] * n
+        order = 0
+
+        while heap:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+            # Lazy update: re-evaluate and defer if no longer the cheapest
+            needed = shortcuts_for(v)
+            p = priority(v, needed)
+            if heap and p > heap[0][0]:
+                heapq.heappush(heap, (p, v))
+                continue
+
+            for u, x, w in needed:
+                if x not in adj[u] or w < adj[u][x][0]:
+                    adj[u][x] = (w, v)
+                    adj[x][u] = (w, v)
+
+            for u, (w, middle) in adj[v].items():
+                up[v].append((u, w, middle))
+                del adj[u][v]
+                deleted[u] += 1
+            adj[v] = {}
+
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(edges) for edges in up])
+        flat = [e for edges in up for e in edges]
+        return cls(
+            nodes,
+            rank,
+            indptr,
+            [e[0] for e in flat],
+            [e[1] for e in flat],
+            [e[2] for e in flat],
+            content_hash,
+            weight,
+        )
+
+    # ---------------- Persistence ----------------
+    def save(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "version": CH_VERSION,
+            "content_hash": self.content_hash,
+            "weight": self.weight,
+            "nodes": self.nodes,
+        }
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+                rank=self.rank,
+                up_indptr=self.up_indptr,
+                up_indices=self.up_indices,
+                up_weight=self.up_weight,
+                up_middle=self.up_middle,
+            )
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> Optional["ContractionHierarchy"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            if meta.get("version") != CH_VERSION:
+                return None
+            return cls(
+                meta["nodes"],
+                data["rank"],
+                data["up_indptr"],
+                data["up_indices"],
+                data["up_weight"],
+                data["up_middle"],
+                meta["content_hash"],
+                meta["weight"],
+            )
+
+    # ---------------- Queries ----------------
+    def _search(self, s: int, t: int):
+        inf = float("inf")
+        dist = ({s: 0.0}, {t: 0.0})
+        parent: Tuple[Dict[int, int], Dict[int, int]] = ({s: -1}, {t: -1})
+        heaps = ([(0.0, s)], [(0.0, t)])
+        best, meet = inf, -1
+        if s == t:
+            return 0.0, s, parent
+
+        while heaps[0] or heaps[1]:
+            # Expand the direction with the smaller frontier key
+            side = 0 if heaps[0] and (not heaps[1] or heaps[0][0][0] <= heaps[1][0][0]) else 1
+            d, v = heapq.heappop(heaps[side])
+            if d >= best:
+                heaps[side].clear()
+                continue
+            if d > dist[side][v]:
+                continue
+            other = dist[1 - side].get(v)
+            if other is not None and d + other < best:
+                best, meet = d + other, v
+            # Stall-on-demand: v is reached more cheaply through a higher
+            # node, so nothing relaxed from it can be on a shortest path
+            if any(dist[side].get(u, inf) + w < d for u, w, _ in self._up[v]):
+                continue
+            for u, w, _ in self._up[v]:
+                nd = d + w
+                if nd < dist[side].get(u, inf):
+                    dist[side][u] = nd
+                    parent[side][u] = v
+                    heapq.heappush(heaps[side], (nd, u))
+
+        return best, meet, parent
+
+    def _edge_middle(self, a: int, b: int) -> int:
+        low, high = (a, b) if self.rank[a] < self.rank[b] else (b, a)
+        for u, _, middle in self._up[low]:
+            if u == high:
+                return middle
+        raise KeyError(f"No hierarchy edge between {self.nodes[a]} and {self.nodes[b]}")
+
+    def _unpack(self, a: int, b: int, out: List[int]) -> None:
+        # Iterative unpacking: shortcut chains can be deep on large maps
+        stack = [(a, b)]
+        while stack:
+            x, y = stack.pop()
+            middle = self._edge_middle(x, y)
+            if middle < 0:
+                out.append(y)
+            else:
+                stack.append((middle, y))
+                stack.append((x, middle))
+
+    def distance(self, source: str, target: str) -> float:
+        best, _, _ = self._search(self.index[source], self.index[target])
+        return best
+
+    def route(self, source: str, target: str) -> Tuple[float, List[str]]:
+        """(distance, path); raises ``nx.NetworkXNoPath`` when unreachable."""
+        s, t = self.index[source], self.index[target]
+        best, meet, parent = self._search(s, t)
+        if meet < 0:
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+
+        up_chain = [meet]
+        while parent[0][up_chain[-1]] != -1:
+            up_chain.append(parent[0][up_chain[-1]])
+        up_chain.reverse()  # s ... meet
+        down_chain = [meet]
+        while parent[1][down_chain[-1]] != -1:
+            down_chain.append(parent[1][down_chain[-1]])  # meet ... t
+
+        chain = up_chain + down_chain[1:]
+        path = [chain[0]]
+        for a, b in zip(chain, chain[1:]):
+            self._unpack(a, b, path)
+        return best, [self.nodes[i] for i in path]
+
+
+def build_contraction_hierarchy(
+    graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+    weight: str = "length",
+    out_path: Optional[Union[str, Path]] = None,
+) -> Path:
+    """Build the hierarchy for ``graph_path`` on ``weight`` and save it to disk."""
+    G = load_terrain_graph(graph_path)
+    ch = ContractionHierarchy.build(G, weight, terrain_graph_hash(graph_path))
+    out = Path(out_path) if out_path else routing_dir(graph_path) / f"ch_{weight}.npz"
+    return ch.save(out)
+
+
+class Route(NamedTuple):
+    """One shortest route plus per-edge attribute sums along it (None if any edge lacks the attribute)."""
+    distance: float
+    path: List[str]
+    totals: Dict[str, Optional[float]]
+
+
+class RoutingEngine:
+    """Shortest distance/path queries on one map and one edge weight."""
+
+    def __init__(self, graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH, weight: str = "length"):
+        self.graph_path = Path(graph_path)
+        self.weight = weight
+        self._ch: Optional[ContractionHierarchy] = None
+        self._ch_checked: Optional[str] = None
+
+    @property
+    def graph(self) -> TerrainGraph:
+        return load_compact_terrain(self.graph_path)
+
+    def hierarchy(self) -> Optional[ContractionHierarchy]:
+        """The prebuilt hierarchy for the current map contents, if any."""
+        current = terrain_graph_hash(self.graph_path)
+        if self._ch_checked != current:
+            ch = ContractionHierarchy.load(routing_dir(self.graph_path) / f"ch_{self.weight}.npz")
+            if ch is not None and (ch.content_hash != current or ch.weight != self.weight):
+                ch = None
+            self._ch, self._ch_checked = ch, current
+        return self._ch
+
+    def backend(self) -> str:
+        if get_distance_oracle(self.graph_path, self.weight) is not None:
+            return "oracle"
+        if self.hierarchy() is not None:
+            return "contraction_hierarchy"
+        return "dijkstra"
+
+    def route(self, source: str, target: str) -> Tuple[float, List[str]]:
+        """(distance, path); raises ``nx.NetworkXNoPath`` when unreachable."""
+        oracle = get_distance_oracle(self.graph_path, self.weight)
+        if oracle is not None:
+            return oracle.route(source, target)
+        ch = self.hierarchy()
+        if ch is not None:
+            return ch.route(source, target)
+        return self.graph.shortest_path(source, target, weight=self.weight)
+
+    def distance(self, source: str, target: str) -> float:
+        return self.route(source, target)[0]
+
+    def shortest_path(self, source: str, target: str) -> List[str]:
+        return self.route(source, target)[1]
+
+    def one_to_many(
+        self,
+        source: str,
+        targets: Iterable[str],
+        accumulate: Sequence[str] = (),
+    ) -> Dict[str, Route]:
+        """
+        Routes from ``source`` to every reachable target from one Dijkstra run.
+
+        The search runs once over the compact graph; each target's path is read
+        off the predecessor row, and attributes named in ``accumulate`` (e.g.
+        ``energy``) are summed along it. Unreachable targets are left out.
+        """
+        G = self.graph
+        targets = [t for t in targets if t in G]
+        s = G.index[source]
+        dist, pred = G.dijkstra(s, self.weight)
+
+        routes = {}
+        for t in targets:
+            if t in routes:
+                continue
+            path = G.path_from(pred, s, G.index[t])
+            if path is None:
+                continue
+            totals = {attr: G.path_total(path, attr) for attr in accumulate}
+            routes[t] = Route(float(dist[G.index[t]]), G.ids(path), totals)
+        return routes
+
+    def many_to_many(
+        self,
+        sources: Iterable[str],
+        targets: Iterable[str],
+        accumulate: Sequence[str] = (),
+    ) -> Dict[str, Dict[str, Route]]:
+        """``one_to_many`` once per distinct source."""
+        targets = list(targets)
+        results: Dict[str, Dict[str, Route]] = {}
+        for source in sources:
+            if source not in results:
+                results[source] = self.one_to_many(source, targets, accumulate)
+        return results
+
+
+_engines: Dict[Tuple[str, str], RoutingEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_routing_engine(graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH, weight: str = "length") -> RoutingEngine:
+    """Shared engine per (map, weight)."""
+    key = (str(Path(graph_path).resolve()), weight)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = RoutingEngine(graph_path, weight)
+        return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build contraction hierarchies for a terrain map.")
+    parser.add_argument("graph", nargs="?", default=str(DEFAULT_TERRAIN_PATH), help="Path to the GraphML map")
+    parser.add_argument(
+        "--weight",
+        action="append",
+        default=None,
+        help="Edge attribute to build for; repeat for several (default: length)",
+    )
+    args = parser.parse_args()
+
+    for weight in args.weight or ["length"]:
+        out = build_contraction_hierarchy(args.graph, weight)
+        print(f"Contraction hierarchy ({weight}) written to {out}")
+
+
+if __name__ == "__main__":
+    main()
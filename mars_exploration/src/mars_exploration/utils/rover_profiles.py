@@ -0,0 +1,48 @@
+# src/mars_exploration/utils/rover_profiles.py
+"""
+Rover terrain capabilities.
+
+Maps each rover in ``inputs/rovers.json`` to the terrain signature of its
+``terrain_compatibility`` list, and hands out the shared hazard registry for
+that signature (see ``utils/hazards.py``): rovers that can drive the same
+terrain types share one traversability mask and one route cache.
+"""
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from mars_exploration.utils.hazards import (
+    DEFAULT_MISSION_REPORT_PATH,
+    HazardRegistry,
+    TerrainSignature,
+    get_hazard_registry,
+    terrain_signature,
+)
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+
+DEFAULT_ROVERS_PATH = DEFAULT_TERRAIN_PATH.parent / "rovers.json"
+
+
+def load_rovers(rovers_path: Union[str, Path] = DEFAULT_ROVERS_PATH) -> List[dict]:
+    return json.loads(Path(rovers_path).read_text(encoding="utf-8"))
+
+
+def rover_signatures(rovers: List[dict]) -> Dict[str, TerrainSignature]:
+    """``{rover_id: terrain signature}`` for every rover with an id."""
+    return {r["id"]: terrain_signature(r.get("terrain_compatibility")) for r in rovers if r.get("id")}
+
+
+def rover_signature(rover_id: str, rovers_path: Union[str, Path] = DEFAULT_ROVERS_PATH) -> TerrainSignature:
+    """Terrain signature of one rover; raises ``KeyError`` for an unknown id."""
+    return rover_signatures(load_rovers(rovers_path))[rover_id]
+
+
+def get_rover_registry(
+    rover_id: Optional[str] = None,
+    graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+    rovers_path: Union[str, Path] = DEFAULT_ROVERS_PATH,
+    report_path: Union[str, Path] = DEFAULT_MISSION_REPORT_PATH,
+) -> HazardRegistry:
+    """Hazard registry restricted to ``rover_id``'s terrain (unrestricted when no rover is given)."""
+    terrain = rover_signature(rover_id, rovers_path) if rover_id else None
+    return get_hazard_registry(graph_path, report_path, terrain)
@@ -0,0 +1,217 @@
+# src/mars_exploration/utils/task_artifacts.py
+"""
+Incremental re-execution of crew tasks.
+
+Before running, an ``IncrementalTask`` fingerprints everything its output
+depends on:
+
+* its interpolated description and expected output (the crew inputs it
+  uses), output model schema and output file;
+* the outputs of upstream tasks it receives as ``context``;
+* its agent's role, goal and backstory (the YAML config), model and
+  sampling parameters, and its tools;
+* the content of the data files behind them: files the tools read (from
+  ``@memoize_tool``) and files named in the description (e.g. the mission
+  report path handed to the mission crew).
+
+Successful outputs, raw text plus the pydantic or JSON output, are kept in
+an artifact store (``.task_artifacts/``, one JSON file per fingerprint). On
+a rerun a task whose fingerprint is stored is not executed: its output is
+restored, its ``output_file`` rewritten and its events emitted as usual, so
+downstream tasks and the flow see the same thing. Editing one rover in
+``rovers.json`` therefore reruns only the tasks that read it, and the tasks
+downstream whose context actually changed.
+
+``MARS_TASK_CACHE`` takes the modes of ``MARS_LLM_CACHE`` (``on``, ``off``,
+``read-only``, per crew: ``"on,integration=off"``). Task reuse is disabled
+while LLM cassettes record or replay, so those runs execute every task.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Union
+
+from crewai.events.event_bus import crewai_event_bus
+from crewai.events.types.task_events import TaskCompletedEvent, TaskStartedEvent
+from crewai.tasks.task_output import TaskOutput
+
+from mars_exploration.utils.llm_cache import crew_cache_mode
+from mars_exploration.utils.llm_cassette import get_cassette_deck
+from mars_exploration.utils.token_budget import BudgetedTask
+from mars_exploration.utils.tool_cache import file_digest, tool_data_files
+
+DEFAULT_ARTIFACTS_DIR = Path(".task_artifacts")
+
+# File names mentioned in a task description (``src/.../mission_report.md``)
+_DATA_FILE = re.compile(r"[\w./\\-]+\.(?:md|json|graphml|ya?ml|csv|txt)\b")
+
+
+class ArtifactStore:
+    """Task outputs under ``directory/<fingerprint[:2]>/<fingerprint>.json``."""
+
+    def __init__(self, directory: Union[str, Path] = DEFAULT_ARTIFACTS_DIR):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.executed = 0
+
+    def _path(self, fingerprint: str) -> Path:
+        return self.directory / fingerprint[:2] / f"{fingerprint}.json"
+
+    def get(self, fingerprint: str) -> Optional[dict]:
+        try:
+            return json.loads(self._path(fingerprint).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, fingerprint: str, entry: dict):
+        path = self._path(fingerprint)
+        blob = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(blob, encoding="utf-8")
+            os.replace(tmp, path)
+
+    def count(self, reused: bool):
+        with self._lock:
+            if reused:
+                self.reused += 1
+            else:
+                self.executed += 1
+
+    def report(self) -> str:
+        total = self.reused + self.executed
+        if not total:
+            return "Task artifacts: no tasks"
+        return f"Task artifacts: {self.reused}/{total} tasks reused from {self.directory}/, {self.executed} executed"
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Process-wide store in ``MARS_TASK_ARTIFACTS_DIR`` (default ``.task_artifacts``)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore(os.environ.get("MARS_TASK_ARTIFACTS_DIR", DEFAULT_ARTIFACTS_DIR))
+        return _store
+
+
+def artifacts_report() -> str:
+    return get_artifact_store().report()
+
+
+def _schema(model: Any) -> Any:
+    return model.model_json_schema() if model is not None else None
+
+
+def _description_files(text: str) -> List[str]:
+    return sorted({m for m in _DATA_FILE.findall(text or "") if os.path.isfile(m)})
+
+
+def task_fingerprint(task: "IncrementalTask", agent: Any, context: Optional[str], tools: List[Any]) -> str:
+    """SHA-256 of the effective inputs of ``task`` (see module docstring)."""
+    llm = getattr(agent, "llm", None)
+    request_params = getattr(llm, "_request_params", None)
+    files = _description_files(f"{task.description}\n{task.expected_output}")
+    for tool in tools:
+        files += [str(p) for p in tool_data_files(tool)]
+    payload = {
+        "task": {
+            "description": task.description,
+            "expected_output": task.expected_output,
+            "output_pydantic": _schema(task.output_pydantic),
+            "output_json": _schema(task.output_json),
+            "output_file": task.output_file,
+            "token_budget": task.token_budget,
+        },
+        "context": context or "",
+        "agent": {
+            "role": getattr(agent, "role", None),
+            "goal": getattr(agent, "goal", None),
+            "backstory": getattr(agent, "backstory", None),
+            "model": getattr(llm, "model", str(llm)),
+            "params": request_params() if callable(request_params) else None,
+        },
+        "tools": sorted(f"{type(t).__module__}.{type(t).__qualname__}:{getattr(t, 'description', '')}" for t in tools),
+        "files": sorted({(str(Path(f).resolve()), file_digest(f)) for f in files}),
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class IncrementalTask(BudgetedTask):
+    """``BudgetedTask`` skipped, with its stored output restored, when its inputs did not change."""
+
+    def _reuse_mode(self, agent: Any) -> str:
+        if get_cassette_deck().active:
+            return "off"
+        crew = getattr(getattr(agent, "llm", None), "crew", "")
+        return crew_cache_mode(crew, os.environ.get("MARS_TASK_CACHE", "on"))
+
+    def execute_sync(self, agent=None, context=None, tools=None) -> TaskOutput:
+        agent = agent or self.agent
+        mode = self._reuse_mode(agent)
+        if mode == "off" or agent is None:
+            return super().execute_sync(agent, context, tools)
+
+        store = get_artifact_store()
+        fingerprint = task_fingerprint(self, agent, context, list(tools or self.tools or agent.tools or []))
+        entry = store.get(fingerprint)
+        if entry is not None:
+            store.count(reused=True)
+            return self._restore(entry, agent, context)
+
+        output = super().execute_sync(agent, context, tools)
+        store.count(reused=False)
+        if mode == "on":
+            store.put(fingerprint, {
+                "task": self.name,
+                "raw": output.raw,
+                "pydantic": output.pydantic.model_dump(mode="json") if output.pydantic is not None else None,
+                "json_dict": output.json_dict,
+                "agent": output.agent,
+                "created": time.time(),
+            })
+        return output
+
+    def _restore(self, entry: dict, agent: Any, context: Optional[str]) -> TaskOutput:
+        """Stored output, with the side effects of a normal run (output file, callbacks, events)."""
+        print(f"♻️ {self.name or 'task'}: inputs unchanged, reusing the stored output")
+        self.agent = agent
+        self.prompt_context = context
+        crewai_event_bus.emit(self, TaskStartedEvent(context=context, task=self))
+        pydantic_output = None
+        if entry.get("pydantic") is not None and self.output_pydantic is not None:
+            pydantic_output = self.output_pydantic.model_validate(entry["pydantic"])
+        output = TaskOutput(
+            name=self.name or self.description,
+            description=self.description,
+            expected_output=self.expected_output,
+            raw=entry["raw"],
+            pydantic=pydantic_output,
+            json_dict=entry.get("json_dict"),
+            agent=entry.get("agent") or agent.role,
+            output_format=self._get_output_format(),
+        )
+        self.output = output
+        if self.callback:
+            self.callback(output)
+        crew = getattr(agent, "crew", None)
+        if crew and crew.task_callback and crew.task_callback != self.callback:
+            crew.task_callback(output)
+        if self.output_file:
+            if output.json_dict:
+                content = output.json_dict
+            else:
+                content = pydantic_output.model_dump_json() if pydantic_output else output.raw
+            self._save_file(content)
+        crewai_event_bus.emit(self, TaskCompletedEvent(output=output, task=self))
+        return output
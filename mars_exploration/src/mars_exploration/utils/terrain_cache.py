@@ -0,0 +1,175 @@
+# src/mars_exploration/utils/terrain_cache.py
+"""
+Process-wide registry of parsed terrain graphs.
+
+Every graph tool used to call ``nx.read_graphml`` on each invocation. The
+registry parses a GraphML file once and hands out the same (frozen) graph to
+every caller until the file on disk changes. When a current compiled
+``.mterrain`` file sits next to the map it is loaded instead of the XML
+(see ``utils/compiled_terrain.py``).
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import networkx as nx
+
+DEFAULT_TERRAIN_PATH = (Path(__file__).resolve().parents[1] / "inputs" / "mars_terrain.graphml")
+
+
+def file_content_hash(path: Union[str, Path]) -> str:
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_terrain(path: Union[str, Path]) -> nx.Graph:
+    """Load a map as networkx, from its compiled ``.mterrain`` form when that is current."""
+    # Imported here: the compiled format is built on top of this module
+    from mars_exploration.utils.compiled_terrain import load_fresh_compiled
+
+    compiled = load_fresh_compiled(path)
+    if compiled is not None:
+        return compiled.to_networkx()
+    return nx.read_graphml(path)
+
+
+def _compiled_source_hash(path: str, stamp: tuple) -> Optional[str]:
+    """Source hash stamped in a compiled ``.mterrain`` header, if it was compiled from this exact file."""
+    from mars_exploration.utils.compiled_terrain import compiled_path, read_header
+
+    header = read_header(compiled_path(path))
+    if header is not None and (header.get("source_mtime_ns"), header.get("source_size")) == stamp:
+        return header.get("source_sha256")
+    return None
+
+
+class _Entry:
+    __slots__ = ("stamp", "content_hash", "graph")
+
+    def __init__(self, stamp, content_hash, graph):
+        self.stamp = stamp
+        self.content_hash = content_hash
+        self.graph = graph
+
+
+class TerrainGraphCache:
+    """
+    Caches parsed terrain graphs keyed by resolved path.
+
+    An entry is reused while the file's (mtime, size) stamp is unchanged. When the
+    stamp changes the content hash is recomputed, and the file is only re-parsed
+    if the bytes actually differ. Content hashes are kept per stamp on their
+    own, so ``content_hash`` never loads the graph.
+    """
+
+    def __init__(self, loader: Callable[[str], Any] = read_terrain, freeze: bool = True):
+        self._loader = loader
+        self._freeze = freeze
+        self._entries: Dict[str, _Entry] = {}
+        self._hashes: Dict[str, Tuple[tuple, str]] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path: Union[str, Path]) -> str:
+        return str(Path(path).resolve())
+
+    def _hash(self, key: str, stamp: tuple) -> str:
+        """Content hash of ``key`` at ``stamp``: from a current compiled header, or by reading the file."""
+        cached = self._hashes.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        content_hash = _compiled_source_hash(key, stamp) or file_content_hash(key)
+        self._hashes[key] = (stamp, content_hash)
+        return content_hash
+
+    def get(self, path: Union[str, Path]) -> Any:
+        """Return the loaded graph for ``path``, loading it on a miss."""
+        key = self._key(path)
+        st = os.stat(key)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stamp == stamp:
+                self.hits += 1
+                return entry.graph
+
+            content_hash = self._hash(key, stamp)
+            if entry is not None and entry.content_hash == content_hash:
+                # Touched but not modified: keep the parsed graph
+                entry.stamp = stamp
+                self.hits += 1
+                return entry.graph
+
+            graph = self._loader(key)
+            if self._freeze:
+                graph = nx.freeze(graph)
+            self._entries[key] = _Entry(stamp, content_hash, graph)
+            self.misses += 1
+            return graph
+
+    def content_hash(self, path: Union[str, Path]) -> str:
+        """Content hash of the file at ``path``, without loading its graph."""
+        key = self._key(path)
+        st = os.stat(key)
+        with self._lock:
+            return self._hash(key, (st.st_mtime_ns, st.st_size))
+
+    def invalidate(self, path: Optional[Union[str, Path]] = None) -> None:
+        """Drop one cached graph, or every cached graph when ``path`` is None."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._hashes.clear()
+            else:
+                self._entries.pop(self._key(path), None)
+                self._hashes.pop(self._key(path), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+_registry = TerrainGraphCache()
+# Caches of structures derived from the same files (e.g. compact graphs)
+_derived: List[TerrainGraphCache] = []
+
+
+def register_derived_cache(cache: TerrainGraphCache) -> TerrainGraphCache:
+    """Have ``invalidate_terrain_graph`` clear ``cache`` as well."""
+    _derived.append(cache)
+    return cache
+
+
+def load_terrain_graph(path: Union[str, Path] = DEFAULT_TERRAIN_PATH) -> nx.Graph:
+    """Shared, read-only terrain graph for ``path``. Do not mutate the result."""
+    return _registry.get(path)
+
+
+def terrain_graph_hash(path: Union[str, Path] = DEFAULT_TERRAIN_PATH) -> str:
+    """Freshness hash of the map file; cheap, the graph itself is not loaded."""
+    return _registry.content_hash(path)
+
+
+def invalidate_terrain_graph(path: Optional[Union[str, Path]] = None) -> None:
+    _registry.invalidate(path)
+    for cache in _derived:
+        cache.invalidate(path)
+
+
+def terrain_cache_stats() -> dict:
+    return _registry.stats()
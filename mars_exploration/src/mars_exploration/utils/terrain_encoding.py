@@ -0,0 +1,92 @@
+# src/mars_exploration/utils/terrain_encoding.py
+"""
+Compact text encoding of the terrain graph for LLM prompts.
+
+The raw GraphML spends most of its tokens on XML markup. This encoding keeps
+only what the agents use: one line per node with a one/two-letter terrain code
+and its routes as ``neighbour:length/energy`` with rounded weights. Each
+undirected route is written once, under its first endpoint.
+
+    Terrain codes: C=crater, I=icy, P=plain, R=rocky, S=sandy
+    N0 R | N19:10.6/15.4 N25:7.3/5.9
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from mars_exploration.utils.terrain_graph import TerrainGraph, load_compact_terrain
+from mars_exploration.utils.tokenizer import count_tokens
+
+
+def terrain_abbreviations(categories: Sequence[str]) -> Dict[str, str]:
+    """Shortest unique upper-case prefix for every terrain category."""
+    codes = {}
+    for size in range(1, max((len(c) for c in categories), default=1) + 1):
+        pending = [c for c in categories if c not in codes]
+        if not pending:
+            break
+        prefixes = [c[:size].upper() for c in pending]
+        for c, prefix in zip(pending, prefixes):
+            if prefixes.count(prefix) == 1 and prefix not in codes.values():
+                codes[c] = prefix
+    for c in categories:
+        codes.setdefault(c, c.upper())
+    return codes
+
+
+def _fmt(value: float, decimals: int) -> str:
+    if value != value:  # NaN: attribute missing
+        return "?"
+    text = f"{value:.{decimals}f}"
+    return text.rstrip("0").rstrip(".") if "." in text else text
+
+
+def encode_terrain(T: TerrainGraph, nodes: Optional[Iterable[int]] = None, decimals: int = 1) -> str:
+    """Adjacency-list text for ``T`` (or the subgraph induced by ``nodes``)."""
+    if nodes is None:
+        selected = np.arange(T.number_of_nodes())
+    else:
+        selected = np.unique(np.asarray(list(nodes), dtype=np.int64))
+    member = np.zeros(T.number_of_nodes(), dtype=bool)
+    member[selected] = True
+
+    codes = terrain_abbreviations(T.terrain_categories)
+    lines: List[str] = [
+        "Terrain codes: " + ", ".join(f"{codes[c]}={c}" for c in T.terrain_categories),
+        "Format: node terrain | neighbour:length/energy (each route listed once)",
+    ]
+    for u in selected.tolist():
+        lo, hi = T.indptr[u], T.indptr[u + 1]
+        routes = []
+        for k in range(lo, hi):
+            v = int(T.indices[k])
+            if not member[v] or (not T.directed and v < u):
+                continue
+            routes.append(f"{T.node_ids[v]}:{_fmt(T.length[k], decimals)}/{_fmt(T.energy[k], decimals)}")
+        line = f"{T.node_ids[u]} {codes[T.terrain(u)]}"
+        if routes:
+            line += " | " + " ".join(routes)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def encode_terrain_region(
+    graph_path: Union[str, Path],
+    focus: Optional[Iterable[str]] = None,
+    hops: int = 1,
+    decimals: int = 1,
+) -> str:
+    """
+    Encode the map at ``graph_path``, restricted to ``hops`` around the ``focus``
+    node ids when any are given (unknown ids are ignored).
+    """
+    T = load_compact_terrain(graph_path)
+    seeds = [T.index[n] for n in (focus or []) if n in T]
+    nodes = T.region(seeds, hops=hops) if seeds else None
+    return encode_terrain(T, nodes, decimals)
+
+
+def estimate_tokens(text: str) -> int:
+    """Prompt token estimate, with the tokenizer of ``utils/tokenizer.py``."""
+    return count_tokens(text)
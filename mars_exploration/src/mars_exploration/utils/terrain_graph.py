@@ -0,0 +1,311 @@
+# src/mars_exploration/utils/terrain_graph.py
+"""
+Array-backed terrain graph.
+
+``TerrainGraph`` stores the map as a CSR adjacency (``indptr`` / ``indices``)
+with one float array per edge weight and a categorical terrain code per node.
+For an undirected map every edge is stored in both directions. Rows are
+sorted by neighbour index so an edge lookup is a binary search.
+
+Shortest paths run on scipy's compiled Dijkstra over these arrays instead of
+walking networkx's dict-of-dicts.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from mars_exploration.utils.terrain_cache import (
+    DEFAULT_TERRAIN_PATH,
+    TerrainGraphCache,
+    load_terrain_graph,
+    register_derived_cache,
+)
+
+UNKNOWN_TERRAIN = "unknown"
+
+
+class TerrainGraph:
+    """Compact CSR terrain graph with an id <-> index mapping."""
+
+    def __init__(
+        self,
+        node_ids: Sequence[str],
+        terrain_codes: np.ndarray,
+        terrain_categories: Sequence[str],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        length: np.ndarray,
+        energy: np.ndarray,
+        directed: bool = False,
+    ):
+        self.node_ids: List[str] = list(node_ids)
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(self.node_ids)}
+        self.terrain_codes = terrain_codes
+        self.terrain_categories: List[str] = list(terrain_categories)
+        self.indptr = indptr
+        self.indices = indices
+        self.length = length
+        self.energy = energy
+        self.directed = directed
+        self._matrices: Dict[str, csr_matrix] = {}
+
+    # ---------------- Construction ----------------
+    @classmethod
+    def from_networkx(cls, G: nx.Graph) -> "TerrainGraph":
+        node_ids = [str(n) for n in G.nodes]
+        index = {n: i for i, n in enumerate(node_ids)}
+        n = len(node_ids)
+
+        terrains = [str(data.get("terrain", UNKNOWN_TERRAIN)) for _, data in G.nodes(data=True)]
+        categories = sorted(set(terrains))
+        code_of = {c: i for i, c in enumerate(categories)}
+        terrain_codes = np.array([code_of[t] for t in terrains], dtype=np.uint8)
+
+        src, dst, length, energy = [], [], [], []
+        for u, v, data in G.edges(data=True):
+            a, b = index[str(u)], index[str(v)]
+            w = float(data.get("length", 1.0))
+            e = float(data["energy"]) if data.get("energy") is not None else np.nan
+            src.append(a), dst.append(b), length.append(w), energy.append(e)
+            if not G.is_directed() and a != b:
+                src.append(b), dst.append(a), length.append(w), energy.append(e)
+
+        src = np.asarray(src, dtype=np.int32)
+        dst = np.asarray(dst, dtype=np.int32)
+        order = np.lexsort((dst, src))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(indptr, src + 1, 1)
+        np.cumsum(indptr, out=indptr)
+
+        return cls(
+            node_ids,
+            terrain_codes,
+            categories,
+            indptr,
+            dst[order],
+            np.asarray(length, dtype=np.float64)[order],
+            np.asarray(energy, dtype=np.float64)[order],
+            directed=G.is_directed(),
+        )
+
+    @classmethod
+    def from_graphml(cls, path: Union[str, Path]) -> "TerrainGraph":
+        return cls.from_networkx(load_terrain_graph(path))
+
+    def to_networkx(self) -> nx.Graph:
+        """Rebuild a networkx graph with ``terrain`` node and ``length``/``energy`` edge attributes."""
+        G = nx.DiGraph() if self.directed else nx.Graph()
+        for i, node in enumerate(self.node_ids):
+            G.add_node(node, terrain=self.terrain(i))
+        for u in range(self.number_of_nodes()):
+            for k in range(self.indptr[u], self.indptr[u + 1]):
+                v = int(self.indices[k])
+                if not self.directed and v < u:
+                    continue
+                attrs = {"length": float(self.length[k])}
+                if not np.isnan(self.energy[k]):
+                    attrs["energy"] = float(self.energy[k])
+                G.add_edge(self.node_ids[u], self.node_ids[v], **attrs)
+        return G
+
+    # ---------------- Basic accessors ----------------
+    def __contains__(self, node_id) -> bool:
+        return node_id in self.index
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def number_of_nodes(self) -> int:
+        return len(self.node_ids)
+
+    def number_of_edges(self) -> int:
+        half_edges = len(self.indices)
+        return half_edges if self.directed else (half_edges + int(self.self_loops())) // 2
+
+    def self_loops(self) -> int:
+        rows = np.repeat(np.arange(self.number_of_nodes()), np.diff(self.indptr))
+        return int(np.count_nonzero(rows == self.indices))
+
+    def terrain(self, i: int) -> str:
+        return self.terrain_categories[self.terrain_codes[i]]
+
+    def neighbors(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def edge_position(self, u: int, v: int) -> int:
+        """Index of edge (u, v) in the CSR arrays, or -1 if absent."""
+        lo, hi = self.indptr[u], self.indptr[u + 1]
+        k = lo + int(np.searchsorted(self.indices[lo:hi], v))
+        return k if k < hi and self.indices[k] == v else -1
+
+    def weights(self, weight: str) -> np.ndarray:
+        if weight == "length":
+            return self.length
+        if weight == "energy":
+            return self.energy
+        raise KeyError(f"Unknown edge weight '{weight}'")
+
+    def matrix(self, weight: str = "length") -> csr_matrix:
+        """Sparse adjacency matrix for ``weight`` (cached)."""
+        m = self._matrices.get(weight)
+        if m is None:
+            n = self.number_of_nodes()
+            m = csr_matrix((self.weights(weight), self.indices, self.indptr), shape=(n, n))
+            self._matrices[weight] = m
+        return m
+
+    # ---------------- Shortest paths ----------------
+    def dijkstra(
+        self,
+        sources: Union[int, Sequence[int]],
+        weight: str = "length",
+        cutoff: Optional[float] = None,
+        min_only: bool = False,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distances and predecessors from each source (``-1`` = no predecessor).
+
+        With ``min_only`` the sources are searched together and a single row of
+        distances to the nearest source is returned.
+        """
+        return run_dijkstra(self.matrix(weight), sources, cutoff, min_only)
+
+    @staticmethod
+    def path_from(pred: np.ndarray, source: int, target: int) -> Optional[List[int]]:
+        """Walk a predecessor row back from ``target``; None if unreachable."""
+        if source == target:
+            return [source]
+        if pred[target] < 0:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(int(pred[path[-1]]))
+        path.reverse()
+        return path
+
+    def path_total(self, path: Sequence[int], weight: str) -> Optional[float]:
+        """Sum of ``weight`` along ``path``; None if an edge lacks the attribute."""
+        values = self.weights(weight)
+        total = 0.0
+        for u, v in zip(path, path[1:]):
+            x = values[self.edge_position(u, v)]
+            if np.isnan(x):
+                return None
+            total += float(x)
+        return total
+
+    def shortest_path(self, source: str, target: str, weight: str = "length") -> Tuple[float, List[str]]:
+        """(distance, path) by node id; raises ``nx.NetworkXNoPath`` when unreachable."""
+        s, t = self.index[source], self.index[target]
+        dist, pred = self.dijkstra(s, weight)
+        path = self.path_from(pred, s, t)
+        if path is None:
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+        return float(dist[t]), [self.node_ids[i] for i in path]
+
+    def ids(self, indices: Iterable[int]) -> List[str]:
+        return [self.node_ids[i] for i in indices]
+
+    # ---------------- Regions ----------------
+    def hop_distances(self, sources: Sequence[int], max_hops: Optional[int] = None) -> np.ndarray:
+        """Multi-source BFS: hop count to the nearest source (-1 = not reached)."""
+        hops = np.full(self.number_of_nodes(), -1, dtype=np.int32)
+        frontier = np.unique(np.asarray(sources, dtype=np.int64))
+        hops[frontier] = 0
+        level = 0
+        while frontier.size and (max_hops is None or level < max_hops):
+            level += 1
+            starts, stops = self.indptr[frontier], self.indptr[frontier + 1]
+            counts = stops - starts
+            if not counts.sum():
+                break
+            # Gather every neighbour of the frontier in one vectorized step
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            neigh = np.unique(self.indices[offsets])
+            frontier = neigh[hops[neigh] < 0]
+            hops[frontier] = level
+        return hops
+
+    def region(
+        self,
+        seeds: Sequence[int],
+        hops: Optional[int] = None,
+        max_distance: Optional[float] = None,
+        weight: str = "length",
+    ) -> np.ndarray:
+        """Sorted indices of nodes within ``hops`` of, or ``max_distance`` from, any seed."""
+        seeds = np.asarray(seeds, dtype=np.int64)
+        if max_distance is not None:
+            dist, _ = self.dijkstra(seeds, weight, cutoff=max_distance, min_only=True)
+            inside = np.isfinite(dist)
+            if hops is not None:
+                inside &= self.hop_distances(seeds, hops) >= 0
+            return np.flatnonzero(inside)
+        return np.flatnonzero(self.hop_distances(seeds, 0 if hops is None else hops) >= 0)
+
+    def induced_edges(self, nodes: Sequence[int]) -> np.ndarray:
+        """CSR positions of the edges with both endpoints in ``nodes`` (each undirected edge once)."""
+        member = np.zeros(self.number_of_nodes(), dtype=bool)
+        member[np.asarray(nodes, dtype=np.int64)] = True
+        rows = np.repeat(np.arange(self.number_of_nodes()), np.diff(self.indptr))
+        keep = member[rows] & member[self.indices]
+        if not self.directed:
+            keep &= rows <= self.indices
+        return np.flatnonzero(keep)
+
+    def edge_source(self, positions: np.ndarray) -> np.ndarray:
+        """Row (source node) of each CSR edge position."""
+        return np.searchsorted(self.indptr, positions, side="right") - 1
+
+
+def run_dijkstra(
+    matrix: csr_matrix,
+    sources: Union[int, Sequence[int]],
+    cutoff: Optional[float] = None,
+    min_only: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """scipy Dijkstra over a CSR weight matrix, with ``-1`` for missing predecessors."""
+    kwargs = {"limit": cutoff} if cutoff is not None else {}
+    if min_only:
+        dist, pred, _ = dijkstra(
+            matrix,
+            directed=True,
+            indices=np.atleast_1d(sources),
+            return_predecessors=True,
+            min_only=True,
+            **kwargs,
+        )
+    else:
+        dist, pred = dijkstra(
+            matrix,
+            directed=True,
+            indices=sources,
+            return_predecessors=True,
+            **kwargs,
+        )
+    pred[pred < 0] = -1
+    return dist, pred
+
+
+def _read_compact(path: str) -> TerrainGraph:
+    # The compiled format depends on this module, hence the local import
+    from mars_exploration.utils.compiled_terrain import load_fresh_compiled
+
+    compiled = load_fresh_compiled(path)
+    return compiled if compiled is not None else TerrainGraph.from_graphml(path)
+
+
+_compact_registry = register_derived_cache(TerrainGraphCache(loader=_read_compact, freeze=False))
+
+
+def load_compact_terrain(path: Union[str, Path] = DEFAULT_TERRAIN_PATH) -> TerrainGraph:
+    """
+    Shared compact graph for ``path``, rebuilt only when the file changes.
+
+    Memory-mapped from ``<map>.mterrain`` when a current compiled file exists.
+    """
+    return _compact_registry.get(path)
@@ -0,0 +1,315 @@
+# src/mars_exploration/utils/token_budget.py
+"""
+Per-task prompt token budgets.
+
+A task's YAML entry may declare how many prompt tokens its interpolated
+description may use, and how each ``{input}`` is shortened when the total
+does not fit::
+
+    plan_rover_routes_task:
+      description: ...
+      token_budget:
+        max_tokens: 6000        # whole prompt of the task
+        reserve: 2000           # agent prompt, tool schemas, earlier task outputs
+        inputs:
+          routes_hint: {policy: compact_json, min_tokens: 600}
+          rovers_json: {policy: compact_json}
+
+Inputs not listed are kept whole and only count against the budget. The
+tokens left after the template and the reserve are shared among the listed
+inputs: an input smaller than its share is kept whole, the others get equal
+shares of the rest (never less than ``min_tokens``, never more than their
+own ``max_tokens``), and the input's policy shortens it to its share:
+
+* ``head`` / ``tail`` / ``head_tail``: keep the start, the end, or both;
+* ``drop_sections``: drop Markdown sections (``drop`` patterns first, then
+  from the end, never the ``keep`` ones);
+* ``compact_json``: minified JSON with rounded floats, then long lists of
+  objects cut (noting how many items were left out);
+* ``compact_terrain``: the terrain encoding with integer weights, then lines
+  cut from the end;
+* ``keep``: never shortened.
+
+Tokens are counted by ``utils/tokenizer.py`` (``MARS_TOKENIZER`` or
+tiktoken's cl100k). ``BudgetedTask`` applies the budget on every kickoff and
+prints the decision.
+"""
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from crewai import Task
+from pydantic import Field
+
+from mars_exploration.utils.tokenizer import count_tokens, tokenizer
+
+DEFAULT_RESERVE = 1500
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_\-]*)\}")
+_HEADING = re.compile(r"^#{1,6}\s", re.MULTILINE)
+_TERRAIN_WEIGHT = re.compile(r":(\d+(?:\.\d+)?)/(\d+(?:\.\d+)?)")
+
+
+# ---------------- Policies ----------------
+
+def _omitted(tokens: int) -> str:
+    return f"[... {tokens} tokens omitted to fit the task's token budget ...]"
+
+
+def _line_head(text: str, tokens: int) -> str:
+    """First ``tokens`` tokens, ending at a line break when there is one."""
+    cut = tokenizer().head(text, tokens)
+    return cut[: cut.rfind("\n")] if "\n" in cut[len(cut) // 2:] else cut
+
+
+def _line_tail(text: str, tokens: int) -> str:
+    cut = tokenizer().tail(text, tokens)
+    return cut[cut.find("\n") + 1:] if "\n" in cut[: len(cut) // 2] else cut
+
+
+def truncate_head(text: str, limit: int, options: dict) -> str:
+    size = count_tokens(text)
+    if size <= limit:
+        return text
+    marker = count_tokens(_omitted(size)) + 1
+    kept = _line_head(text, limit - marker)
+    return f"{kept}\n{_omitted(size - count_tokens(kept))}"
+
+
+def truncate_tail(text: str, limit: int, options: dict) -> str:
+    size = count_tokens(text)
+    if size <= limit:
+        return text
+    marker = count_tokens(_omitted(size)) + 1
+    kept = _line_tail(text, limit - marker)
+    return f"{_omitted(size - count_tokens(kept))}\n{kept}"
+
+
+def truncate_head_tail(text: str, limit: int, options: dict) -> str:
+    """Keep ``head_share`` (default 0.7) of the budget from the start and the rest from the end."""
+    size = count_tokens(text)
+    if size <= limit:
+        return text
+    room = limit - count_tokens(_omitted(size)) - 2
+    first = int(room * float(options.get("head_share", 0.7)))
+    head, tail = _line_head(text, first), _line_tail(text, room - first)
+    return f"{head}\n{_omitted(size - count_tokens(head) - count_tokens(tail))}\n{tail}"
+
+
+def drop_sections(text: str, limit: int, options: dict) -> str:
+    """Drop whole Markdown sections, keeping their headings; ``head_tail`` if that is not enough."""
+    if count_tokens(text) <= limit:
+        return text
+    starts = [m.start() for m in _HEADING.finditer(text)]
+    if not starts:
+        return truncate_head_tail(text, limit, options)
+    bounds = list(zip([0] + starts, starts + [len(text)]))
+    sections = [text[a:b] for a, b in bounds if b > a]
+    keep = [re.compile(p, re.IGNORECASE) for p in options.get("keep", [])]
+    drop = [re.compile(p, re.IGNORECASE) for p in options.get("drop", [])]
+
+    def heading(section: str) -> str:
+        return section.split("\n", 1)[0]
+
+    def droppable(section: str) -> bool:
+        return _HEADING.match(section) is not None and not any(p.search(heading(section)) for p in keep)
+
+    # Sections named in ``drop`` go first, then the others from the end of the document
+    order = [i for i, s in enumerate(sections) if droppable(s) and any(p.search(heading(s)) for p in drop)]
+    order += [i for i in reversed(range(len(sections))) if droppable(sections[i]) and i not in order]
+    size = sum(count_tokens(s) for s in sections)
+    for i in order:
+        if size <= limit:
+            break
+        short = f"{heading(sections[i])}\n[section omitted to fit the task's token budget]\n\n"
+        saved = count_tokens(sections[i]) - count_tokens(short)
+        if saved > 0:
+            size -= saved
+            sections[i] = short
+    return truncate_head_tail("".join(sections), limit, options)
+
+
+def _round_floats(value: Any, decimals: int) -> Any:
+    if isinstance(value, float):
+        return round(value, decimals)
+    if isinstance(value, list):
+        return [_round_floats(v, decimals) for v in value]
+    if isinstance(value, dict):
+        return {k: _round_floats(v, decimals) for k, v in value.items()}
+    return value
+
+
+_MORE = " more items omitted to fit the task's token budget"
+
+
+def _record_lists(value: Any, found: Optional[list] = None) -> list:
+    """Lists of objects inside ``value`` (routes, tours, ...); lists of scalars such as paths are left whole."""
+    found = [] if found is None else found
+    items = value if isinstance(value, list) else value.values() if isinstance(value, dict) else ()
+    if isinstance(value, list) and any(isinstance(v, dict) for v in value):
+        found.append(value)
+    for item in items:
+        _record_lists(item, found)
+    return found
+
+
+def compact_json(text: str, limit: int, options: dict) -> str:
+    """Minify and round floats (``decimals``, default 2); then cut the largest lists of objects by a quarter at a time."""
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return truncate_head_tail(text, limit, options)
+
+    def dump(value) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    data = _round_floats(data, int(options.get("decimals", 2)))
+    out = dump(data)
+    while count_tokens(out) > limit:
+        lists = [records for records in _record_lists(data) if sum(isinstance(r, dict) for r in records) > 1]
+        if not lists:
+            return truncate_head_tail(out, limit, options)
+        records = max(lists, key=lambda r: len(dump(r)))
+        omitted = int(records.pop().split()[1]) if isinstance(records[-1], str) and records[-1].endswith(_MORE) else 0
+        keep = max(len(records) * 3 // 4, 1)
+        omitted += len(records) - keep
+        del records[keep:]
+        records.append(f"... {omitted}{_MORE}")
+        out = dump(data)
+    return out
+
+
+def compact_terrain(text: str, limit: int, options: dict) -> str:
+    """Round ``neighbour:length/energy`` weights (``decimals``, default 0), then cut lines from the end."""
+    if count_tokens(text) <= limit:
+        return text
+    decimals = int(options.get("decimals", 0))
+
+    def fmt(value: str) -> str:
+        rounded = f"{float(value):.{decimals}f}"
+        return rounded.rstrip("0").rstrip(".") if "." in rounded else rounded
+
+    text = _TERRAIN_WEIGHT.sub(lambda m: f":{fmt(m.group(1))}/{fmt(m.group(2))}", text)
+    return truncate_head(text, limit, options)
+
+
+def keep(text: str, limit: int, options: dict) -> str:
+    return text
+
+
+POLICIES: Dict[str, Callable[[str, int, dict], str]] = {
+    "keep": keep,
+    "head": truncate_head,
+    "tail": truncate_tail,
+    "head_tail": truncate_head_tail,
+    "drop_sections": drop_sections,
+    "compact_json": compact_json,
+    "compact_terrain": compact_terrain,
+}
+
+
+# ---------------- Budget ----------------
+
+class BudgetDecision:
+    """What a budget did to the inputs of one kickoff."""
+
+    def __init__(self, task: str, max_tokens: int, reserve: int, template: int):
+        self.task = task
+        self.max_tokens = max_tokens
+        self.reserve = reserve
+        self.template = template
+        # input -> (tokens before, tokens after, policy applied or None)
+        self.inputs: Dict[str, Tuple[int, int, Optional[str]]] = {}
+
+    @property
+    def total(self) -> int:
+        return self.template + self.reserve + sum(after for _, after, _ in self.inputs.values())
+
+    @property
+    def truncated(self) -> List[str]:
+        return [name for name, (_, _, policy) in self.inputs.items() if policy]
+
+    def as_dict(self) -> dict:
+        return {
+            "max_tokens": self.max_tokens,
+            "total": self.total,
+            "inputs": {name: {"before": b, "after": a, "policy": p} for name, (b, a, p) in self.inputs.items()},
+        }
+
+    def summary(self) -> str:
+        head = f"📏 Token budget {self.task}: ~{self.total}/{self.max_tokens} tokens (reserve {self.reserve})"
+        if not self.truncated:
+            return head + ", all inputs kept"
+        parts = [f"{name} {b}→{a} ({p})" for name, (b, a, p) in self.inputs.items() if p]
+        over = " — still over budget" if self.total > self.max_tokens else ""
+        return f"{head}, shortened: " + ", ".join(parts) + over
+
+
+class TokenBudget:
+    """The ``token_budget`` block of a task's YAML config."""
+
+    def __init__(self, max_tokens: int, reserve: int = DEFAULT_RESERVE, inputs: Optional[Dict[str, dict]] = None):
+        self.max_tokens = int(max_tokens)
+        self.reserve = int(reserve)
+        self.inputs = {name: dict(spec or {}) for name, spec in (inputs or {}).items()}
+        for name, spec in self.inputs.items():
+            policy = spec.setdefault("policy", "head_tail")
+            if policy not in POLICIES:
+                raise ValueError(f"Unknown truncation policy {policy!r} for input {name!r}; expected one of {', '.join(POLICIES)}")
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> Optional["TokenBudget"]:
+        if not config:
+            return None
+        return cls(config["max_tokens"], config.get("reserve", DEFAULT_RESERVE), config.get("inputs"))
+
+    def fit(self, template: str, inputs: Dict[str, Any], task: str = "") -> Tuple[Dict[str, Any], BudgetDecision]:
+        """Copy of ``inputs`` with the inputs used by ``template`` shortened to fit, and the decision taken."""
+        uses: Dict[str, int] = {}
+        for name in _PLACEHOLDER.findall(template):
+            if name in inputs:
+                uses[name] = uses.get(name, 0) + 1
+        decision = BudgetDecision(task, self.max_tokens, self.reserve, count_tokens(_PLACEHOLDER.sub("", template)))
+
+        sizes = {name: count_tokens(str(inputs[name])) for name in uses}
+        fitted = dict(inputs)
+        flexible = [name for name in uses if self.inputs.get(name, {}).get("policy", "keep") != "keep"]
+        room = self.max_tokens - decision.template - self.reserve
+        room -= sum(sizes[name] * uses[name] for name in uses if name not in flexible)
+
+        # Water-filling: smallest inputs first, each gets at most an equal share of what is left
+        shares: Dict[str, int] = {}
+        pending = sorted(flexible, key=lambda name: sizes[name] * uses[name])
+        for k, name in enumerate(pending):
+            spec = self.inputs[name]
+            share = max(room, 0) // (len(pending) - k) // uses[name]
+            share = max(share, int(spec.get("min_tokens", 0)))
+            if spec.get("max_tokens") is not None:
+                share = min(share, int(spec["max_tokens"]))
+            shares[name] = min(share, sizes[name])
+            room -= shares[name] * uses[name]
+
+        for name in uses:
+            before = sizes[name]
+            policy = self.inputs.get(name, {}).get("policy", "keep")
+            if name in shares and before > shares[name]:
+                fitted[name] = POLICIES[policy](str(inputs[name]), shares[name], self.inputs[name])
+                decision.inputs[name] = (before * uses[name], count_tokens(fitted[name]) * uses[name], policy)
+            else:
+                decision.inputs[name] = (before * uses[name], before * uses[name], None)
+        return fitted, decision
+
+
+class BudgetedTask(Task):
+    """``Task`` fitting its interpolated inputs into the ``token_budget`` of its YAML config."""
+
+    # Filled from the YAML ``config`` like the other Task fields
+    token_budget: Optional[Dict[str, Any]] = Field(default=None, description="Prompt token budget of the task.")
+    budget_decision: Optional[BudgetDecision] = Field(default=None, exclude=True)
+
+    def interpolate_inputs_and_add_conversation_history(self, inputs):
+        budget = TokenBudget.from_config(self.token_budget)
+        if budget is not None and inputs:
+            template = f"{self._original_description or self.description}\n{self._original_expected_output or self.expected_output}"
+            inputs, self.budget_decision = budget.fit(template, inputs, self.name or "task")
+            print(self.budget_decision.summary())
+        super().interpolate_inputs_and_add_conversation_history(inputs)
@@ -0,0 +1,71 @@
+# src/mars_exploration/utils/tokenizer.py
+"""
+Prompt token counting, shared by the token budgets and the terrain encoding.
+
+Tokens are counted with the tokenizer at ``MARS_TOKENIZER`` (a Hugging Face
+``tokenizer.json``, e.g. Qwen's) when set, otherwise with tiktoken's cl100k.
+tiktoken downloads its vocabulary on first use (``TIKTOKEN_CACHE_DIR`` keeps
+it across runs); without it, and offline, the estimate is ~4 chars/token.
+"""
+import os
+from functools import lru_cache
+from typing import Callable, Optional
+
+
+class _Tokenizer:
+    """``encode`` to a list of ids and ``decode`` back; chars/4 when no vocabulary can be loaded."""
+
+    def __init__(self):
+        self.name = "chars/4"
+        self._encode: Optional[Callable[[str], list]] = None
+        self._decode: Optional[Callable[[list], str]] = None
+        path = os.environ.get("MARS_TOKENIZER")
+        if path:
+            try:
+                from tokenizers import Tokenizer
+
+                tokenizer = Tokenizer.from_file(path)
+                self._encode = lambda text: tokenizer.encode(text, add_special_tokens=False).ids
+                self._decode = tokenizer.decode
+                self.name = os.path.basename(path)
+                return
+            except Exception as e:
+                print(f"⚠️ Could not load MARS_TOKENIZER={path}: {e}; falling back to cl100k")
+        try:
+            import tiktoken
+
+            encoding = tiktoken.get_encoding("cl100k_base")
+            self._encode = lambda text: encoding.encode(text, disallowed_special=())
+            self._decode = encoding.decode
+            self.name = "cl100k"
+        except Exception:
+            pass
+
+    def count(self, text: str) -> int:
+        if self._encode is None:
+            return -(-len(text) // 4)
+        return len(self._encode(text))
+
+    def head(self, text: str, tokens: int) -> str:
+        if tokens <= 0:
+            return ""
+        if self._encode is None:
+            return text[: tokens * 4]
+        return self._decode(self._encode(text)[:tokens])
+
+    def tail(self, text: str, tokens: int) -> str:
+        if tokens <= 0:
+            return ""
+        if self._encode is None:
+            return text[-tokens * 4:]
+        return self._decode(self._encode(text)[-tokens:])
+
+
+@lru_cache(maxsize=1)
+def tokenizer() -> _Tokenizer:
+    return _Tokenizer()
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens of ``text`` (see module docstring for the tokenizer used)."""
+    return tokenizer().count(text)
@@ -0,0 +1,205 @@
+# src/mars_exploration/utils/tool_cache.py
+"""
+Memoization of crewAI tool results across agents and crews.
+
+Agents of different crews often ask the same question (same start/end and
+range, the same fleet file). ``@memoize_tool(...)`` wraps a ``BaseTool``
+subclass's ``_run`` (both ``BaseTool.run`` and the structured tool handed
+to agents go through it) so identical calls are answered from one
+process-wide LRU shared by every instance of every tool in the flow run.
+
+The key is the tool class, its arguments after validation by the tool's
+``args_schema`` (``"10"`` and ``10.0`` are the same range), the content
+hash of every data file the result depends on, so editing the map, the
+fleet files or the mission report invalidates the affected results, and
+any in-memory state the tool declares (e.g. the hazard mask version, which
+changes when hazards are added or removed at runtime). Results
+starting with ``"Error"`` are not kept: they usually mean a missing file or
+a transient failure.
+"""
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+DEFAULT_MAX_ENTRIES = 2048
+
+# "hit" or "miss" of the last memoized tool call in this context (read by the tracer)
+tool_cache_lookup: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("mars_tool_cache_lookup", default=None)
+
+_digests: Dict[str, Tuple[tuple, str]] = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path: Union[str, Path]) -> Optional[str]:
+    """SHA-256 of a file's content, recomputed only when its size or mtime changes (None if missing)."""
+    try:
+        resolved = str(Path(path).resolve())
+        st = os.stat(resolved)
+    except (OSError, TypeError, ValueError):
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _digests_lock:
+        cached = _digests.get(resolved)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    h = hashlib.sha256()
+    with open(resolved, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _digests_lock:
+        _digests[resolved] = (stamp, digest)
+    return digest
+
+
+class ToolStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+
+class ToolResultCache:
+    """Thread-safe LRU of tool results with per-tool hit/miss counters."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._stats: Dict[str, ToolStats] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tool: str, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            stats = self._stats.setdefault(tool, ToolStats())
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                stats.hits += 1
+                return True, self._entries[key]
+            stats.misses += 1
+            return False, None
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+    def stats(self) -> Dict[str, ToolStats]:
+        with self._lock:
+            return dict(self._stats)
+
+    def report(self) -> str:
+        stats = self.stats()
+        if not stats:
+            return "Tool cache: no calls"
+        hits = sum(s.hits for s in stats.values())
+        calls = hits + sum(s.misses for s in stats.values())
+        lines = [f"Tool cache: {calls} calls, {hits} answered from cache ({hits / calls:.0%})"]
+        for name, s in sorted(stats.items()):
+            lines.append(f"  {name}: {s.hits} hits / {s.misses} misses")
+        return "\n".join(lines)
+
+
+tool_result_cache = ToolResultCache()
+
+
+def tool_cache_report() -> str:
+    return tool_result_cache.report()
+
+
+def tool_data_files(tool) -> List[Union[str, Path]]:
+    """Data files a ``@memoize_tool`` tool reads besides its call arguments (``path_fields`` and ``files``)."""
+    path_fields, files = getattr(type(tool), "_memo_data_files", ((), ()))
+    return [p for p in [getattr(tool, f, None) for f in path_fields] + list(files) if p]
+
+
+def _normalized_arguments(tool, run, args, kwargs) -> dict:
+    bound = inspect.signature(run).bind(tool, *args, **kwargs)
+    bound.apply_defaults()
+    arguments = {k: v for k, v in list(bound.arguments.items())[1:]}
+    # Variadic parameters are flattened into the mapping
+    for name, param in inspect.signature(run).parameters.items():
+        if param.kind is inspect.Parameter.VAR_KEYWORD:
+            arguments.update(arguments.pop(name, {}))
+        elif param.kind is inspect.Parameter.VAR_POSITIONAL:
+            arguments[name] = list(arguments.get(name, ()))
+
+    schema = getattr(tool, "args_schema", None)
+    fields = getattr(schema, "model_fields", {})
+    given = {k: v for k, v in arguments.items() if k in fields and v is not None}
+    if given:
+        try:
+            validated = schema.model_validate(given).model_dump(include=set(given))
+            arguments.update(validated)
+        except Exception:
+            pass
+    return arguments
+
+
+def memoize_tool(
+    path_fields: Sequence[str] = (),
+    path_args: Sequence[str] = (),
+    files: Iterable[Union[str, Path]] = (),
+    cache: Optional[ToolResultCache] = None,
+    state: Optional[Callable[[Any], Any]] = None,
+):
+    """
+    Class decorator memoizing a ``BaseTool``'s ``_run``.
+
+    ``path_fields`` name tool attributes holding data file paths (e.g.
+    ``map_path``), ``path_args`` call arguments holding them (e.g.
+    ``file_path``), and ``files`` are fixed data files; all are hashed into
+    the key. ``state(tool)``, called on every call, adds in-memory state the
+    result depends on.
+    """
+    files = tuple(files)
+
+    def decorate(cls):
+        run = cls._run
+
+        @functools.wraps(run)
+        def _run(self, *args, **kwargs):
+            store = cache or tool_result_cache
+            arguments = _normalized_arguments(self, run, args, kwargs)
+            paths = [getattr(self, f, None) for f in path_fields]
+            paths += [arguments.get(a) for a in path_args]
+            paths += list(files)
+            payload = {
+                "tool": f"{cls.__module__}.{cls.__qualname__}",
+                "args": arguments,
+                "files": [[str(p), file_digest(p)] for p in paths if p],
+                "state": state(self) if state is not None else None,
+            }
+            key = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+            found, value = store.get(cls.__name__, key)
+            tool_cache_lookup.set("hit" if found else "miss")
+            if found:
+                return value
+            value = run(self, *args, **kwargs)
+            if not (isinstance(value, str) and value.startswith("Error")):
+                store.put(key, value)
+            return value
+
+        cls._run = _run
+        cls._memo_data_files = (tuple(path_fields), files)
+        return cls
+
+    return decorate
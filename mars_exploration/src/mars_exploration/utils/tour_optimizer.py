@@ -0,0 +1,347 @@
+# src/mars_exploration/utils/tour_optimizer.py
+"""
+Multi-rover tour optimizer with recharge stops.
+
+Given the target nodes and the rovers in ``rovers.json``, decides which rover
+visits which targets and in what order:
+
+1. a distance/energy matrix between rover starts and targets is built per
+   terrain signature (hazards and terrain compatibility respected, see
+   ``utils/hazards.py``) and cached per hazard-view version;
+2. nearest insertion builds the tours: the target closest to any tour is
+   inserted at the cheapest position of any rover that can reach it;
+3. 2-opt (segment reversal within a tour) and or-opt (moving runs of up to
+   three targets within or between tours) improve them until no move helps.
+
+The rovers drive in parallel, so the fleet objective is the longest tour
+plus a tenth of the summed durations (which keeps short tours short too).
+Tours are open (they end at the last target). A tour's cost is its duration:
+driving time (length / rover speed) plus recharge time. Energy is tracked in
+battery percentage points, using the ``energy`` edge attribute along each
+leg; whenever a leg would leave the rover below the recharge threshold the
+rover first recharges to full, in place or, when recharge stations are
+given, at the station that adds the least detour.
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from mars_exploration.utils.hazards import HazardRegistry, MaskedTerrainView, get_hazard_registry, terrain_signature
+from mars_exploration.utils.rover_profiles import DEFAULT_ROVERS_PATH, load_rovers
+from mars_exploration.utils.terrain_cache import DEFAULT_TERRAIN_PATH
+
+RECHARGE_THRESHOLD = 30.0
+FULL_CHARGE = 100.0
+# Battery percentage points recovered per time unit while recharging
+DEFAULT_RECHARGE_RATE = 20.0
+
+_MAX_ROUNDS = 100
+_OR_OPT_MAX_SEGMENT = 3
+_EPS = 1e-9
+# Weight of the summed tour durations next to the longest one
+_TOTAL_TIME_WEIGHT = 0.1
+
+
+class TourStop(NamedTuple):
+    node: str
+    action: str  # "start", "visit" or "recharge"
+    eta: float
+    energy: float
+    path: List[str]  # leg driven from the previous stop (empty for the start)
+
+
+class RoverTour(NamedTuple):
+    rover_id: str
+    stops: List[TourStop]
+    distance: float
+    duration: float
+    energy_used: float
+    recharges: int
+    warnings: List[str]
+
+
+class TourPlan(NamedTuple):
+    tours: List[RoverTour]
+    unassigned: List[str]
+
+    def to_dict(self) -> dict:
+        return {
+            "tours": [
+                {
+                    "rover_id": t.rover_id,
+                    "stops": [
+                        {"node": s.node, "action": s.action, "eta": round(s.eta, 2), "energy": round(s.energy, 2), "path": s.path}
+                        for s in t.stops
+                    ],
+                    "distance": round(t.distance, 2),
+                    "duration": round(t.duration, 2),
+                    "energy_used": round(t.energy_used, 2),
+                    "recharges": t.recharges,
+                    "warnings": t.warnings,
+                }
+                for t in self.tours
+            ],
+            "unassigned": self.unassigned,
+        }
+
+
+class LegMatrix:
+    """Shortest-leg length, energy and path between every pair of ``nodes`` (inf = unreachable)."""
+
+    def __init__(self, registry: HazardRegistry, nodes: Sequence[str]):
+        self.nodes = list(nodes)
+        self.index = {n: i for i, n in enumerate(self.nodes)}
+        n = len(self.nodes)
+        self.length = np.full((n, n), np.inf)
+        self.energy = np.full((n, n), np.inf)
+        self.paths: Dict[Tuple[int, int], List[str]] = {}
+        routes = registry.many_to_many(self.nodes, self.nodes, accumulate=("energy",))
+        for source, row in routes.items():
+            i = self.index[source]
+            for target, route in row.items():
+                j = self.index[target]
+                self.length[i, j] = route.distance
+                # Edges without energy data: assume one point per unit of length
+                self.energy[i, j] = route.totals["energy"] if route.totals["energy"] is not None else route.distance
+                self.paths[(i, j)] = route.path
+
+_matrices: "OrderedDict[tuple, Tuple[MaskedTerrainView, LegMatrix]]" = OrderedDict()
+_matrices_lock = threading.Lock()
+
+
+def leg_matrix(registry: HazardRegistry, nodes: Sequence[str]) -> LegMatrix:
+    """Cached ``LegMatrix`` for the registry's current view."""
+    view = registry.view()
+    key = (id(registry), registry.version, tuple(nodes))
+    with _matrices_lock:
+        cached = _matrices.get(key)
+        # The entry keeps its view alive, so ``is`` cannot match a recycled object
+        if cached is not None and cached[0] is view:
+            _matrices.move_to_end(key)
+            return cached[1]
+    matrix = LegMatrix(registry, nodes)
+    with _matrices_lock:
+        _matrices[key] = (view, matrix)
+        while len(_matrices) > 32:
+            _matrices.popitem(last=False)
+    return matrix
+
+
+class _Rover:
+    """One rover's parameters and its matrix, plus the tour simulation."""
+
+    def __init__(self, spec: dict, matrix: LegMatrix, threshold: float, rate: float, stations: List[int]):
+        self.id = spec["id"]
+        self.start = matrix.index[spec["location"]]
+        self.energy = float(spec.get("energy", FULL_CHARGE))
+        self.speed = float(spec.get("speed") or 1.0)
+        self.m = matrix
+        self.threshold = threshold
+        self.rate = rate
+        self.stations = stations
+
+    def reaches(self, t: int) -> bool:
+        return np.isfinite(self.m.length[self.start, t])
+
+    def simulate(self, seq: Sequence[int], detail: bool = False):
+        """
+        Drive ``seq`` from the start; returns the duration, or with ``detail``
+        the list of (node, action, eta, energy) stops plus totals.
+        """
+        L, E = self.m.length, self.m.energy
+        energy, time, distance, used, recharges = self.energy, 0.0, 0.0, 0.0, 0
+        stops = [(self.start, "start", 0.0, energy)] if detail else None
+        warnings = []
+        here = self.start
+        for nxt in seq:
+            if not np.isfinite(L[here, nxt]):
+                return float("inf") if not detail else None
+            if energy - E[here, nxt] < self.threshold:
+                station = self._best_station(here, nxt, energy)
+                if station is not None and station != here:
+                    time += L[here, station] / self.speed
+                    distance += L[here, station]
+                    energy -= E[here, station]
+                    used += E[here, station]
+                    here = station
+                time += max(FULL_CHARGE - energy, 0.0) / self.rate
+                energy = FULL_CHARGE
+                recharges += 1
+                if detail:
+                    stops.append((here, "recharge", time, energy))
+                if energy - E[here, nxt] < self.threshold:
+                    warnings.append(
+                        f"Leg {self.m.nodes[here]} -> {self.m.nodes[nxt]} needs {E[here, nxt]:.1f} energy "
+                        f"and drops below {self.threshold:g}% even from a full charge."
+                    )
+            time += L[here, nxt] / self.speed
+            distance += L[here, nxt]
+            energy -= E[here, nxt]
+            used += E[here, nxt]
+            here = nxt
+            if detail:
+                stops.append((here, "visit", time, energy))
+        if not detail:
+            return time
+        return stops, time, distance, used, recharges, warnings
+
+    def _best_station(self, here: int, nxt: int, energy: float) -> Optional[int]:
+        """Recharge station with the least detour that the rover can still reach (None: recharge in place)."""
+        L, E = self.m.length, self.m.energy
+        best, best_cost = None, float("inf")
+        for s in self.stations:
+            if energy - E[here, s] < 0:
+                continue
+            cost = L[here, s] + L[s, nxt]
+            if cost < best_cost:
+                best, best_cost = s, cost
+        return best
+
+
+def _objective(costs: Sequence[float]) -> float:
+    """Fleet cost: the longest tour (rovers drive in parallel) plus a share of the total driving time."""
+    return max(costs, default=0.0) + _TOTAL_TIME_WEIGHT * sum(costs)
+
+
+def _with(costs: List[float], changes: Dict[int, float]) -> float:
+    return _objective([changes.get(k, c) for k, c in enumerate(costs)])
+
+
+def _improve(rovers: List[_Rover], tours: List[List[int]]) -> None:
+    """2-opt within tours and or-opt within/between tours, in place, until no move lowers the objective."""
+    costs = [r.simulate(t) for r, t in zip(rovers, tours)]
+    current = _objective(costs)
+    for _ in range(_MAX_ROUNDS):
+        improved = False
+
+        # 2-opt: reverse tour[i..j]
+        for k, rover in enumerate(rovers):
+            for i in range(len(tours[k]) - 1):
+                for j in range(i + 1, len(tours[k])):
+                    tour = tours[k]
+                    candidate = tour[:i] + tour[i:j + 1][::-1] + tour[j + 1:]
+                    cost = rover.simulate(candidate)
+                    value = _with(costs, {k: cost})
+                    if value < current - _EPS:
+                        tours[k], costs[k], current, improved = candidate, cost, value, True
+
+        # or-opt: move a run of up to three targets to the best position of any tour
+        for a in range(len(tours)):
+            for size in range(1, _OR_OPT_MAX_SEGMENT + 1):
+                i = 0
+                while i + size <= len(tours[a]):
+                    segment = tours[a][i:i + size]
+                    rest = tours[a][:i] + tours[a][i + size:]
+                    rest_cost = rovers[a].simulate(rest)
+                    best = None
+                    for b, rover in enumerate(rovers):
+                        if not all(rover.reaches(t) for t in segment):
+                            continue
+                        base = rest if b == a else tours[b]
+                        for pos in range(len(base) + 1):
+                            for seg in (segment, segment[::-1]):
+                                candidate = base[:pos] + seg + base[pos:]
+                                cost = rover.simulate(candidate)
+                                value = _with(costs, {b: cost} if b == a else {a: rest_cost, b: cost})
+                                if value < current - _EPS and (best is None or value < best[0]):
+                                    best = (value, b, candidate, cost)
+                    if best is None:
+                        i += 1
+                        continue
+                    current, b, candidate, cost = best
+                    if b != a:
+                        tours[a], costs[a] = rest, rest_cost
+                    tours[b], costs[b] = candidate, cost
+                    improved = True
+        if not improved:
+            break
+
+
+def _construct(rovers: List[_Rover], targets: List[int]) -> Tuple[List[List[int]], List[int]]:
+    """Nearest insertion over all rovers; returns the tours and the targets no rover reaches."""
+    tours: List[List[int]] = [[] for _ in rovers]
+    costs = [0.0 for _ in rovers]
+    pending = [t for t in targets if any(r.reaches(t) for r in rovers)]
+    unreachable = [t for t in targets if t not in pending]
+
+    def nearness(t):
+        # Distance from the closest node already on a tour (rover starts included)
+        return min(
+            min(r.m.length[n, t] for n in [r.start] + tour)
+            for r, tour in zip(rovers, tours)
+            if r.reaches(t)
+        )
+
+    while pending:
+        t = min(pending, key=nearness)
+        pending.remove(t)
+        best = None
+        for k, (rover, tour) in enumerate(zip(rovers, tours)):
+            if not rover.reaches(t):
+                continue
+            for pos in range(len(tour) + 1):
+                candidate = tour[:pos] + [t] + tour[pos:]
+                cost = rover.simulate(candidate)
+                value = _with(costs, {k: cost})
+                if best is None or value < best[0]:
+                    best = (value, k, candidate, cost)
+        if best is None or not np.isfinite(best[0]):
+            unreachable.append(t)
+            continue
+        _, k, candidate, cost = best
+        tours[k], costs[k] = candidate, cost
+    return tours, unreachable
+
+
+def optimize_tours(
+    targets: Iterable[str],
+    rovers: Optional[List[dict]] = None,
+    graph_path: Union[str, Path] = DEFAULT_TERRAIN_PATH,
+    recharge_threshold: float = RECHARGE_THRESHOLD,
+    recharge_rate: float = DEFAULT_RECHARGE_RATE,
+    recharge_nodes: Sequence[str] = (),
+) -> TourPlan:
+    """
+    Tours for ``rovers`` (default: ``rovers.json``) covering ``targets``.
+
+    Targets no rover can reach (unknown, hazardous or on incompatible
+    terrain) are returned as unassigned; rovers parked off the map are
+    left out. Recharge stations off the map are ignored.
+    """
+    rovers = load_rovers(DEFAULT_ROVERS_PATH) if rovers is None else rovers
+    graph = get_hazard_registry(graph_path).view().graph
+    rovers = [r for r in rovers if r.get("id") and r.get("location") in graph]
+    targets = list(dict.fromkeys(targets))
+    unknown = [t for t in targets if t not in graph]
+    targets = [t for t in targets if t in graph]
+    recharge_nodes = [n for n in dict.fromkeys(recharge_nodes) if n in graph]
+    nodes = list(dict.fromkeys([r["location"] for r in rovers] + targets + recharge_nodes))
+
+    sims = []
+    for spec in rovers:
+        registry = get_hazard_registry(graph_path, terrain=terrain_signature(spec.get("terrain_compatibility")))
+        matrix = leg_matrix(registry, nodes)
+        stations = [matrix.index[n] for n in recharge_nodes]
+        sims.append(_Rover(spec, matrix, recharge_threshold, recharge_rate, stations))
+
+    # All matrices share the node order, so target indices are common
+    index = {n: i for i, n in enumerate(nodes)}
+    tours, unreachable = _construct(sims, [index[t] for t in targets])
+    _improve(sims, tours)
+
+    result = []
+    for rover, tour in zip(sims, tours):
+        stops, duration, distance, used, recharges, warnings = rover.simulate(tour, detail=True)
+        named = []
+        previous = None
+        for node, action, eta, energy in stops:
+            path = rover.m.paths[(previous, node)] if previous is not None and previous != node else []
+            named.append(TourStop(rover.m.nodes[node], action, float(eta), float(energy), path))
+            previous = node
+        if energy_below := [s for s in named if s.energy < 0]:
+            warnings.append(f"Energy runs out before {energy_below[0].node}.")
+        result.append(RoverTour(rover.id, named, float(distance), float(duration), float(used), recharges, warnings))
+    return TourPlan(result, [nodes[t] for t in unreachable] + unknown)
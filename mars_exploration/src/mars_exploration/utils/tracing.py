@@ -0,0 +1,431 @@
+# src/mars_exploration/utils/tracing.py
+"""
+Nested tracing spans for a flow run, fed by the crewAI event bus.
+
+``start_tracing()`` registers handlers for the flow, crew, task, agent, LLM
+and tool events and turns each start/end pair into a span:
+
+    method -> crew -> task -> agent -> llm / tool
+
+Parents follow the execution context (the flow branches run in their own
+asyncio tasks and threads, and both carry ``contextvars`` along), with the
+task and agent ids of the events as a fallback for threads that do not.
+Every closed span is appended as one JSON line to the trace file, with
+start/end times and its attributes: prompt/completion tokens of LLM calls,
+the iteration number of each call within its agent, the token budget
+decision of each task, a hash of tool arguments, whether the LLM
+response cache, the cassettes or the tool cache answered, and how long a
+completion queued in the LLM gateway. With ``otel=True`` (``MARS_TRACE_OTEL=1``) the spans are
+also exported through the OpenTelemetry API, if installed.
+
+Run the module on a trace file for the critical path and a per-crew time
+breakdown::
+
+    python -m mars_exploration.utils.tracing traces/run.jsonl
+"""
+import argparse
+import contextvars
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from crewai.events.event_bus import crewai_event_bus
+from crewai.events.types.agent_events import (
+    AgentExecutionCompletedEvent,
+    AgentExecutionErrorEvent,
+    AgentExecutionStartedEvent,
+)
+from crewai.events.types.crew_events import (
+    CrewKickoffCompletedEvent,
+    CrewKickoffFailedEvent,
+    CrewKickoffStartedEvent,
+)
+from crewai.events.types.flow_events import (
+    MethodExecutionFailedEvent,
+    MethodExecutionFinishedEvent,
+    MethodExecutionStartedEvent,
+)
+from crewai.events.types.llm_events import LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent
+from crewai.events.types.task_events import TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent
+from crewai.events.types.tool_usage_events import ToolUsageErrorEvent, ToolUsageFinishedEvent, ToolUsageStartedEvent
+
+from mars_exploration.utils.llm_cache import served_from
+from mars_exploration.utils.llm_gateway import queue_wait
+from mars_exploration.utils.tool_cache import tool_cache_lookup
+
+DEFAULT_TRACE_DIR = Path("traces")
+
+_current: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("mars_trace_span", default=None)
+
+
+def args_hash(args: Any) -> str:
+    blob = json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def _token_process(callbacks) -> Any:
+    """The agent's token counter among an LLM call's callbacks, if any."""
+    for callback in callbacks or ():
+        process = getattr(callback, "token_cost_process", None)
+        if process is not None:
+            return process
+    return None
+
+
+def _crew_label(crew: Any, fallback: Optional[str]) -> str:
+    """Crew name for the report; ``@CrewBase`` crews are all called ``crew``, so use their LLM's label."""
+    name = getattr(crew, "name", None) or fallback
+    if not name or name == "crew":
+        for agent in getattr(crew, "agents", None) or ():
+            label = getattr(getattr(agent, "llm", None), "crew", None)
+            if label:
+                return label
+    return name or "crew"
+
+
+class Span:
+    __slots__ = ("id", "parent", "kind", "name", "start", "end", "attrs", "status", "token", "otel")
+
+    def __init__(self, span_id: int, parent: Optional[int], kind: str, name: str, start: float, attrs: dict):
+        self.id = span_id
+        self.parent = parent
+        self.kind = kind
+        self.name = name
+        self.start = start
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.status = "ok"
+        self.token = None
+        self.otel = None
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "parent": self.parent,
+            "kind": self.kind,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "end": round(self.end, 6),
+            "duration": round(self.end - self.start, 6),
+            "status": self.status,
+            "attrs": self.attrs,
+        }
+
+
+class Tracer:
+    """Spans of one run, written to ``path`` as they close."""
+
+    def __init__(self, path: Union[str, Path], otel: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._open: Dict[tuple, Span] = {}
+        self._iterations: Dict[int, int] = defaultdict(int)
+        self._otel = None
+        if otel:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                print("⚠️ MARS_TRACE_OTEL set but opentelemetry is not installed; writing JSONL only")
+            else:
+                self._otel = trace.get_tracer("mars_exploration")
+
+    # -- span bookkeeping -------------------------------------------------------------------------
+
+    def _begin(self, key: tuple, kind: str, name: str, start: float, parent_key: Optional[tuple] = None, **attrs) -> Span:
+        with self._lock:
+            parent = self._open.get(parent_key) if parent_key else None
+            parent_id = parent.id if parent is not None else _current.get()
+            span = Span(next(self._ids), parent_id, kind, name, start, attrs)
+            self._open[key] = span
+            by_id = {s.id: s for s in self._open.values()}
+        span.token = _current.set(span.id)
+        if self._otel is not None:
+            from opentelemetry import trace
+
+            parent_otel = by_id.get(parent_id).otel if parent_id in by_id else None
+            context = trace.set_span_in_context(parent_otel) if parent_otel is not None else None
+            span.otel = self._otel.start_span(f"{kind}:{name}", context=context, start_time=int(start * 1e9))
+        return span
+
+    def _finish(self, key: tuple, end: float, status: str = "ok", **attrs) -> Optional[Span]:
+        with self._lock:
+            span = self._open.pop(key, None)
+        if span is None:
+            return None
+        span.end = end
+        span.status = status
+        span.attrs.update({k: v for k, v in attrs.items() if v is not None})
+        try:
+            _current.reset(span.token)
+        except ValueError:
+            # Closed from another context (e.g. a task finished by its worker thread)
+            _current.set(span.parent)
+        if span.otel is not None:
+            for name, value in span.attrs.items():
+                if isinstance(value, (str, bool, int, float)):
+                    span.otel.set_attribute(name, value)
+            span.otel.end(end_time=int(end * 1e9))
+        line = json.dumps(span.as_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+        return span
+
+    def close(self):
+        """Close the spans still open (an interrupted run) and the file."""
+        now = time.time()
+        for key in list(self._open):
+            self._finish(key, now, status="unfinished")
+        with self._lock:
+            self._file.close()
+
+    # -- event handlers ---------------------------------------------------------------------------
+
+    def install(self):
+        bus = crewai_event_bus
+
+        @bus.on(MethodExecutionStartedEvent)
+        def method_started(source, event):
+            self._begin(("method", id(source), event.method_name), "method", event.method_name,
+                        event.timestamp.timestamp(), flow=event.flow_name)
+
+        @bus.on(MethodExecutionFinishedEvent)
+        def method_finished(source, event):
+            self._finish(("method", id(source), event.method_name), event.timestamp.timestamp())
+
+        @bus.on(MethodExecutionFailedEvent)
+        def method_failed(source, event):
+            self._finish(("method", id(source), event.method_name), event.timestamp.timestamp(), "error",
+                         error=str(event.error))
+
+        @bus.on(CrewKickoffStartedEvent)
+        def crew_started(source, event):
+            self._begin(("crew", id(source)), "crew", _crew_label(source, event.crew_name),
+                        event.timestamp.timestamp())
+
+        @bus.on(CrewKickoffCompletedEvent)
+        def crew_completed(source, event):
+            self._finish(("crew", id(source)), event.timestamp.timestamp(), total_tokens=event.total_tokens)
+
+        @bus.on(CrewKickoffFailedEvent)
+        def crew_failed(source, event):
+            self._finish(("crew", id(source)), event.timestamp.timestamp(), "error", error=event.error)
+
+        @bus.on(TaskStartedEvent)
+        def task_started(source, event):
+            task = event.task or source
+            crew = getattr(getattr(task, "agent", None), "crew", None)
+            span = self._begin(("task", str(task.id)), "task", task.name or " ".join(str(task.description).split()[:8]),
+                               event.timestamp.timestamp(), parent_key=("crew", id(crew)) if crew is not None else None,
+                               agent=getattr(task.agent, "role", None))
+            decision = getattr(task, "budget_decision", None)
+            if decision is not None:
+                span.attrs["token_budget"] = decision.as_dict()
+
+        @bus.on(TaskCompletedEvent)
+        def task_completed(source, event):
+            task = event.task or source
+            self._finish(("task", str(task.id)), event.timestamp.timestamp())
+
+        @bus.on(TaskFailedEvent)
+        def task_failed(source, event):
+            task = event.task or source
+            self._finish(("task", str(task.id)), event.timestamp.timestamp(), "error", error=event.error)
+
+        @bus.on(AgentExecutionStartedEvent)
+        def agent_started(source, event):
+            task_id = str(getattr(event.task, "id", ""))
+            self._begin(("agent", str(event.agent.id), task_id), "agent", event.agent.role,
+                        event.timestamp.timestamp(), parent_key=("task", task_id),
+                        tools=len(event.tools or ()))
+
+        @bus.on(AgentExecutionCompletedEvent)
+        def agent_completed(source, event):
+            span = self._finish(("agent", str(event.agent.id), str(getattr(event.task, "id", ""))),
+                                event.timestamp.timestamp())
+            if span is not None:
+                self._iterations.pop(span.id, None)
+
+        @bus.on(AgentExecutionErrorEvent)
+        def agent_failed(source, event):
+            self._finish(("agent", str(event.agent.id), str(getattr(event.task, "id", ""))),
+                         event.timestamp.timestamp(), "error", error=event.error)
+
+        @bus.on(LLMCallStartedEvent)
+        def llm_started(source, event):
+            process = _token_process(event.callbacks)
+            span = self._begin(
+                ("llm", threading.get_ident(), id(source)), "llm", event.model or getattr(source, "model", "llm"),
+                event.timestamp.timestamp(), parent_key=("agent", event.agent_id, event.task_id),
+                served_from=served_from.get(), queue_wait=queue_wait.get(),
+            )
+            with self._lock:
+                self._iterations[span.parent] += 1
+                span.attrs["iteration"] = self._iterations[span.parent]
+            span.attrs["_tokens"] = (process, process.prompt_tokens, process.completion_tokens) if process else None
+
+        def llm_ended(source, event, status, **attrs):
+            key = ("llm", threading.get_ident(), id(source))
+            span = self._open.get(key)
+            tokens = span.attrs.pop("_tokens", None) if span is not None else None
+            if tokens is not None:
+                process, prompt, completion = tokens
+                attrs["prompt_tokens"] = process.prompt_tokens - prompt
+                attrs["completion_tokens"] = process.completion_tokens - completion
+            self._finish(key, event.timestamp.timestamp(), status, **attrs)
+
+        @bus.on(LLMCallCompletedEvent)
+        def llm_completed(source, event):
+            llm_ended(source, event, "ok", response_chars=len(str(event.response or "")))
+
+        @bus.on(LLMCallFailedEvent)
+        def llm_failed(source, event):
+            llm_ended(source, event, "error", error=event.error)
+
+        @bus.on(ToolUsageStartedEvent)
+        def tool_started(source, event):
+            tool_cache_lookup.set(None)
+            self._begin(("tool", threading.get_ident(), event.tool_name), "tool", event.tool_name,
+                        event.timestamp.timestamp(), parent_key=("agent", event.agent_id, event.task_id),
+                        args_hash=args_hash(event.tool_args))
+
+        @bus.on(ToolUsageFinishedEvent)
+        def tool_finished(source, event):
+            self._finish(("tool", threading.get_ident(), event.tool_name), event.finished_at.timestamp(),
+                         cache_hit=event.from_cache or tool_cache_lookup.get() == "hit")
+
+        @bus.on(ToolUsageErrorEvent)
+        def tool_failed(source, event):
+            self._finish(("tool", threading.get_ident(), event.tool_name), event.timestamp.timestamp(), "error",
+                         error=str(event.error))
+
+        self._handlers = [
+            method_started, method_finished, method_failed, crew_started, crew_completed, crew_failed,
+            task_started, task_completed, task_failed, agent_started, agent_completed, agent_failed,
+            llm_started, llm_completed, llm_failed, tool_started, tool_finished, tool_failed,
+        ]
+        return self
+
+
+_tracer: Optional[Tracer] = None
+
+
+def start_tracing(path: Optional[Union[str, Path]] = None, otel: Optional[bool] = None) -> Optional[Tracer]:
+    """
+    Trace the run into ``path`` (default ``MARS_TRACE``; ``MARS_TRACE=1``
+    picks ``traces/run_<timestamp>.jsonl``). Returns None when tracing is off.
+    """
+    global _tracer
+    path = path or os.environ.get("MARS_TRACE")
+    if not path or str(path).lower() in ("0", "off", "false"):
+        return None
+    if str(path).lower() in ("1", "on", "true"):
+        path = DEFAULT_TRACE_DIR / f"run_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    if otel is None:
+        otel = os.environ.get("MARS_TRACE_OTEL", "").lower() in ("1", "on", "true")
+    if _tracer is None:
+        _tracer = Tracer(path, otel=otel).install()
+    return _tracer
+
+
+# -- trace analysis -------------------------------------------------------------------------------
+
+
+def load_spans(path: Union[str, Path]) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def critical_path(spans: List[dict]) -> List[dict]:
+    """
+    Spans that determined the end of the run: from the root that ended last,
+    repeatedly the child that ended last (the one its parent waited for).
+    """
+    children: Dict[Optional[int], List[dict]] = defaultdict(list)
+    ids = {s["id"] for s in spans}
+    for s in spans:
+        children[s["parent"] if s["parent"] in ids else None].append(s)
+    path = []
+    level = children[None]
+    while level:
+        span = max(level, key=lambda s: (s["end"], -s["start"]))
+        path.append(span)
+        level = children[span["id"]]
+    return path
+
+
+def crew_breakdown(spans: List[dict]) -> Dict[str, dict]:
+    """Per crew: wall time, time in LLM calls and tools, calls, cache hits and tokens."""
+    by_id = {s["id"]: s for s in spans}
+
+    def crew_of(span):
+        while span is not None:
+            if span["kind"] == "crew":
+                return span
+            span = by_id.get(span["parent"])
+        return None
+
+    rows: Dict[str, dict] = {}
+    for s in spans:
+        if s["kind"] == "crew":
+            row = rows.setdefault(s["name"], defaultdict(float))
+            row["runs"] += 1
+            row["wall"] += s["duration"]
+    for s in spans:
+        if s["kind"] not in ("llm", "tool"):
+            continue
+        crew = crew_of(s)
+        if crew is None:
+            continue
+        row = rows[crew["name"]]
+        row[f"{s['kind']}_seconds"] += s["duration"]
+        row[f"{s['kind']}_calls"] += 1
+        attrs = s.get("attrs", {})
+        row["cache_hits"] += bool(attrs.get("served_from") or attrs.get("cache_hit"))
+        row["prompt_tokens"] += attrs.get("prompt_tokens", 0) or 0
+        row["completion_tokens"] += attrs.get("completion_tokens", 0) or 0
+        row["queue_seconds"] += attrs.get("queue_wait", 0) or 0
+    return {name: dict(row) for name, row in rows.items()}
+
+
+def format_report(spans: List[dict]) -> str:
+    if not spans:
+        return "Empty trace"
+    start = min(s["start"] for s in spans)
+    end = max(s["end"] for s in spans)
+    lines = [f"Trace: {len(spans)} spans, {end - start:.1f}s", "", "Critical path:"]
+    for depth, s in enumerate(critical_path(spans)):
+        offset = s["start"] - start
+        lines.append(f"  {'  ' * depth}{s['kind']:<6} {s['name'][:60]:<60} {s['duration']:8.2f}s  (+{offset:.1f}s)")
+
+    lines += ["", "Per crew:"]
+    lines.append(f"  {'crew':<22}{'wall':>9}{'llm':>9}{'tools':>9}{'other':>9}{'calls':>7}{'hits':>6}{'queued':>9}{'tokens in/out':>16}")
+    for name, row in sorted(crew_breakdown(spans).items(), key=lambda item: -item[1].get("wall", 0.0)):
+        wall, llm, tools = row.get("wall", 0.0), row.get("llm_seconds", 0.0), row.get("tool_seconds", 0.0)
+        calls = int(row.get("llm_calls", 0) + row.get("tool_calls", 0))
+        tokens = f"{int(row.get('prompt_tokens', 0))}/{int(row.get('completion_tokens', 0))}"
+        lines.append(
+            f"  {name[:21]:<22}{wall:8.1f}s{llm:8.1f}s{tools:8.1f}s{max(wall - llm - tools, 0.0):8.1f}s"
+            f"{calls:>7}{int(row.get('cache_hits', 0)):>6}{row.get('queue_seconds', 0.0):8.1f}s{tokens:>16}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    parser = argparse.ArgumentParser(description="Critical path and per-crew time breakdown of a flow trace.")
+    parser.add_argument("trace", help="JSONL trace written with MARS_TRACE")
+    args = parser.parse_args(argv)
+    print(format_report(load_spans(args.trace)))
+
+
+if __name__ == "__main__":
+    main()